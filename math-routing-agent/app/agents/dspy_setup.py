@@ -0,0 +1,26 @@
+import threading
+from typing import Any, Optional
+from app.config import Config
+
+_lock = threading.Lock()
+_dspy: Any = None
+_loaded = False
+
+def get_dspy() -> Optional[Any]:
+    """Import and configure DSPy once, on first use; None if it is unavailable"""
+    global _dspy, _loaded
+    if _loaded:
+        return _dspy
+    with _lock:
+        if not _loaded:
+            try:
+                import dspy
+
+                # Configure DSPy
+                lm = dspy.OpenAI(model='gpt-3.5-turbo', api_key=Config.OPENAI_API_KEY)
+                dspy.configure(lm=lm)
+                _dspy = dspy
+            except Exception as e:
+                print(f"DSPy unavailable: {e}")
+            _loaded = True
+    return _dspy
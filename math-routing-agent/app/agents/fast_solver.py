@@ -0,0 +1,266 @@
+import re
+import math
+from fractions import Fraction
+from typing import Dict, Any, List, Optional, Tuple
+
+Polynomial = Dict[int, Fraction]
+
+SUPERSCRIPT_DIGITS = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+SUPERSCRIPT_POWERS = {"⁰": "0", "¹": "1", "²": "2", "³": "3", "⁴": "4", "⁵": "5", "⁶": "6", "⁷": "7", "⁸": "8", "⁹": "9"}
+
+# A question is solved only if it matches one of these templates in full: a command phrase,
+# exactly one polynomial expression and an optional "dx" / "from a to b". Any other word
+# (a further operation, a condition, a unit, an evaluation point) makes solve() decline.
+LEAD = r"(?:(?:please\s+)?(?:find|compute|calculate|determine|evaluate|give|what\s+is|what's)\s+)?(?:the\s+)?"
+FUNCTION_NAME = r"(?:(?:[fg]\s*\(\s*x\s*\)|y)\s*=\s*)?"
+EXPRESSION = r"(?P<expression>[0-9x^+\-*/.()\s]+?)"
+EQUATION = r"(?P<expression>[0-9x^+\-*/.()=\s]+?)"
+NUMBER = r"-?\d+(?:\.\d+)?"
+EQUATION_NOUN = r"(?:\s+the\s+(?:(?:linear|quadratic)\s+)?equation)?"
+DERIVATIVE_QUESTION = re.compile(
+    rf"{LEAD}(?:(?:derivative\s+of|differentiate)\s+|d/dx(?:\s+of)?\s*){FUNCTION_NAME}{EXPRESSION}"
+    r"(?:\s+(?:with\s+respect\s+to|w\.?r\.?t\.?)\s+x)?"
+)
+INTEGRAL_QUESTION = re.compile(
+    rf"{LEAD}(?:(?:(?:integral|antiderivative)\s+of|integrate)\s+|∫\s*){FUNCTION_NAME}{EXPRESSION}"
+    rf"(?:\s*dx)?(?:\s+from\s+(?P<lower>{NUMBER})\s+to\s+(?P<upper>{NUMBER}))?"
+)
+EQUATION_QUESTION = re.compile(
+    rf"{LEAD}(?:solve(?:\s+for\s+x)?{EQUATION_NOUN}|(?:roots?|zeros?|solutions?)\s+of{EQUATION_NOUN})"
+    rf"\s*:?\s*{EQUATION}(?:\s*,?\s*for\s+x)?"
+)
+# Longer questions are never routine; this also bounds the template matching cost
+MAX_QUESTION_LENGTH = 200
+# Prose ahead of the answer in a final step ("Therefore the answer is x = 2")
+ANSWER_PROSE_PATTERN = re.compile(r'^.*[a-z]{2,}\s*:?', re.DOTALL)
+# Powers above this are out of scope (and would make exact arithmetic arbitrarily slow)
+MAX_DEGREE = 100
+TERM_PATTERN = re.compile(r'([+-])?(\d+(?:\.\d+)?(?:/\d+)?)?(\*?x(?:\^(\d+))?)?')
+
+def normalize_notation(text: str) -> str:
+    """Unify notation: superscript powers, unicode minus/multiply signs, case"""
+    text = text.replace("−", "-").replace("·", "*").replace("×", "*").replace("X", "x")
+    text = re.sub(r'([⁰¹²³⁴⁵⁶⁷⁸⁹]+)', lambda m: "^" + "".join(SUPERSCRIPT_POWERS[c] for c in m.group(1)), text)
+    return text
+
+def answer_key(answer: str) -> str:
+    """Final answer without leading prose, whitespace, case or notation differences"""
+    answer = normalize_notation(str(answer)).lower()
+    return re.sub(r'\s+', "", ANSWER_PROSE_PATTERN.sub("", answer)).rstrip(".")
+
+def matches_answer(exact_answer: str, answer: str) -> bool:
+    """True if answer states exact_answer, with or without its "x =" / "f'(x) =" side"""
+    exact, answer = answer_key(exact_answer), answer_key(answer)
+    return answer == exact or ("=" in exact and answer == exact.split("=", 1)[1])
+
+def parse_polynomial(expression: str) -> Optional[Polynomial]:
+    """Parse a polynomial in x such as '3x^2 + 2x - 1', or None if it is anything else"""
+    expression = expression.replace(" ", "")
+    while expression.startswith("(") and expression.endswith(")"):
+        expression = expression[1:-1]
+    if not expression or "(" in expression or ")" in expression:
+        return None
+
+    polynomial: Polynomial = {}
+    position = 0
+    while position < len(expression):
+        match = TERM_PATTERN.match(expression, position)
+        sign, coefficient, variable, power = match.groups()
+        if match.end() == position or (coefficient is None and variable is None):
+            return None
+        if position > 0 and sign is None:
+            return None
+        value = Fraction(coefficient) if coefficient else Fraction(1)
+        if sign == "-":
+            value = -value
+        degree = (int(power) if power else 1) if variable else 0
+        if degree > MAX_DEGREE:
+            return None
+        polynomial[degree] = polynomial.get(degree, Fraction(0)) + value
+        position = match.end()
+
+    return {degree: c for degree, c in polynomial.items() if c != 0}
+
+def format_number(value: Fraction) -> str:
+    return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+
+def format_term(coefficient: Fraction, degree: int) -> str:
+    if degree == 0:
+        return format_number(coefficient)
+    variable = "x" if degree == 1 else "x" + str(degree).translate(SUPERSCRIPT_DIGITS)
+    if coefficient == 1:
+        return variable
+    if coefficient == -1:
+        return "-" + variable
+    if coefficient.denominator != 1:
+        return f"({format_number(coefficient)}){variable}"
+    return format_number(coefficient) + variable
+
+def format_polynomial(polynomial: Polynomial) -> str:
+    terms = [(degree, c) for degree, c in sorted(polynomial.items(), reverse=True) if c != 0]
+    if not terms:
+        return "0"
+    text = format_term(terms[0][1], terms[0][0])
+    for degree, coefficient in terms[1:]:
+        text += (" - " if coefficient < 0 else " + ") + format_term(abs(coefficient), degree)
+    return text
+
+def evaluate(polynomial: Polynomial, x: Fraction) -> Fraction:
+    return sum((c * x ** degree for degree, c in polynomial.items()), Fraction(0))
+
+class FastPathSolver:
+    """Exact in-process solver for routine polynomial problems
+
+    Handles linear/quadratic equations in x, first derivatives and
+    (definite, finite-bound) integrals of polynomials in x of degree at most
+    MAX_DEGREE, asked in one of the question templates above. solve() returns
+    None for anything else (a word outside the template, higher-order
+    derivatives, evaluation at a point, inequalities, systems, other
+    variables) so the caller can fall through to the KB or the LLM path.
+    """
+
+    def solve(self, question: str) -> Optional[Dict[str, Any]]:
+        """Solve a question locally, or return None if it is out of scope"""
+        text = " ".join(normalize_notation(question).lower().split()).rstrip("?.! ")
+        if len(text) > MAX_QUESTION_LENGTH:
+            return None
+        try:
+            match = DERIVATIVE_QUESTION.fullmatch(text)
+            if match:
+                return self._solve_derivative(match.group("expression"))
+            match = INTEGRAL_QUESTION.fullmatch(text)
+            if match:
+                return self._solve_integral(match.group("expression"), match.group("lower"), match.group("upper"))
+            match = EQUATION_QUESTION.fullmatch(text)
+            if match:
+                return self._solve_equation(match.group("expression"))
+        except (ZeroDivisionError, ValueError, OverflowError):
+            return None
+        return None
+
+    def _find_polynomial(self, expression: str) -> Optional[Polynomial]:
+        polynomial = parse_polynomial(expression)
+        if polynomial is None or not polynomial or not any(degree > 0 for degree in polynomial):
+            return None
+        return polynomial
+
+    def _solution(self, steps: List[str], final_answer: str) -> Dict[str, Any]:
+        return {
+            "source": "local_solver",
+            "steps": steps,
+            "final_answer": final_answer,
+            "confidence": "high"
+        }
+
+    def _solve_derivative(self, expression: str) -> Optional[Dict[str, Any]]:
+        polynomial = self._find_polynomial(expression)
+        if polynomial is None:
+            return None
+
+        derivative = {degree - 1: c * degree for degree, c in polynomial.items() if degree > 0}
+        steps = ["Apply power rule: d/dx(xⁿ) = n*xⁿ⁻¹"]
+        for degree, coefficient in sorted(polynomial.items(), reverse=True):
+            term_derivative = {degree - 1: coefficient * degree} if degree > 0 else {}
+            steps.append(f"d/dx({format_term(coefficient, degree)}) = {format_polynomial(term_derivative)}")
+        result = format_polynomial(derivative)
+        steps.append(f"Combine results: f'(x) = {result}")
+        return self._solution(steps, f"f'(x) = {result}")
+
+    def _solve_integral(self, expression: str, lower: Optional[str], upper: Optional[str]) -> Optional[Dict[str, Any]]:
+        polynomial = self._find_polynomial(expression)
+        if polynomial is None:
+            return None
+
+        antiderivative = {degree + 1: c / (degree + 1) for degree, c in polynomial.items()}
+        steps = ["Apply power rule for integration: ∫xⁿ dx = xⁿ⁺¹/(n+1) + C"]
+        for degree, coefficient in sorted(polynomial.items(), reverse=True):
+            steps.append(f"∫{format_term(coefficient, degree)} dx = {format_term(coefficient / (degree + 1), degree + 1)}")
+        integrand = format_polynomial(polynomial)
+        result = format_polynomial(antiderivative)
+
+        if lower is None:
+            steps.append(f"Combine results: ∫({integrand}) dx = {result} + C")
+            return self._solution(steps, f"{result} + C")
+
+        lower, upper = Fraction(lower), Fraction(upper)
+        upper_value, lower_value = evaluate(antiderivative, upper), evaluate(antiderivative, lower)
+        value = upper_value - lower_value
+        steps.append(f"Antiderivative: F(x) = {result}")
+        steps.append(f"F({format_number(upper)}) = {format_number(upper_value)}")
+        steps.append(f"F({format_number(lower)}) = {format_number(lower_value)}")
+        steps.append(f"Result: F({format_number(upper)}) - F({format_number(lower)}) = {format_number(value)}")
+        return self._solution(steps, format_number(value))
+
+    def _parse_equation(self, expression: str) -> Optional[Polynomial]:
+        sides = expression.split("=")
+        if len(sides) > 2:
+            return None
+        lhs = parse_polynomial(sides[0])
+        rhs = parse_polynomial(sides[1]) if len(sides) == 2 else {}
+        if lhs is None or rhs is None:
+            return None
+        combined = dict(lhs)
+        for degree, coefficient in rhs.items():
+            combined[degree] = combined.get(degree, Fraction(0)) - coefficient
+        return {degree: c for degree, c in combined.items() if c != 0}
+
+    def _solve_equation(self, expression: str) -> Optional[Dict[str, Any]]:
+        polynomial = self._parse_equation(expression)
+        if not polynomial:
+            return None
+        degree = max(polynomial)
+        if degree == 1 and min(polynomial) >= 0:
+            return self._solve_linear(polynomial)
+        if degree == 2 and min(polynomial) >= 0:
+            return self._solve_quadratic(polynomial)
+        return None
+
+    def _solve_linear(self, polynomial: Polynomial) -> Dict[str, Any]:
+        a, b = polynomial.get(1, Fraction(0)), polynomial.get(0, Fraction(0))
+        root = -b / a
+        steps = [
+            f"Write in standard form: {format_polynomial(polynomial)} = 0",
+            f"Isolate x: {format_term(a, 1)} = {format_number(-b)}",
+            f"Divide by {format_number(a)}: x = {format_number(root)}"
+        ]
+        return self._solution(steps, f"x = {format_number(root)}")
+
+    def _solve_quadratic(self, polynomial: Polynomial) -> Dict[str, Any]:
+        a, b, c = (polynomial.get(degree, Fraction(0)) for degree in (2, 1, 0))
+        fa, fb, fc = format_number(a), format_number(b), format_number(c)
+        discriminant = b * b - 4 * a * c
+        fd = format_number(discriminant) if discriminant >= 0 else f"({format_number(discriminant)})"
+        steps = [
+            f"Identify coefficients: a={fa}, b={fb}, c={fc}",
+            f"Calculate discriminant: D = b² - 4ac = ({fb})² - 4({fa})({fc}) = {fd}",
+            "Apply quadratic formula: x = [-b ± √D] / 2a",
+            f"x = [{format_number(-b)} ± √{fd}] / {format_number(2 * a)}"
+        ]
+
+        root = self._exact_sqrt(discriminant)
+        if root is not None:
+            x1, x2 = (-b + root) / (2 * a), (-b - root) / (2 * a)
+            if x1 == x2:
+                steps.append(f"D = 0, so there is one repeated root: x = {format_number(x1)}")
+                return self._solution(steps, f"x = {format_number(x1)}")
+            steps.append(f"x₁ = {format_number(x1)}, x₂ = {format_number(x2)}")
+            low, high = sorted((x1, x2))
+            return self._solution(steps, f"x = {format_number(low)}, {format_number(high)}")
+
+        center, spread = float(-b / (2 * a)), math.sqrt(abs(float(discriminant))) / abs(float(2 * a))
+        exact = f"[{format_number(-b)} ± √{fd}] / {format_number(2 * a)}"
+        if discriminant < 0:
+            steps.append(f"D < 0, so the roots are complex: x = {center:.4g} ± {spread:.4g}i")
+            return self._solution(steps, f"x = {exact} ≈ {center:.4g} ± {spread:.4g}i")
+        steps.append(f"x₁ ≈ {center + spread:.4g}, x₂ ≈ {center - spread:.4g}")
+        return self._solution(steps, f"x = {exact} ≈ {center - spread:.4g}, {center + spread:.4g}")
+
+    @staticmethod
+    def _exact_sqrt(value: Fraction) -> Optional[Fraction]:
+        """Rational square root of a non-negative rational, if it exists"""
+        if value < 0:
+            return None
+        numerator, denominator = math.isqrt(value.numerator), math.isqrt(value.denominator)
+        if numerator * numerator == value.numerator and denominator * denominator == value.denominator:
+            return Fraction(numerator, denominator)
+        return None
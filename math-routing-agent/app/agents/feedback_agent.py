@@ -1,42 +1,44 @@
-import json
-import dspy
+import math
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.config import Config
+from app.agents.dspy_setup import get_dspy
+from app.agents.feedback_store import FeedbackStore
 
-try:
-    lm = dspy.OpenAI(model='gpt-3.5-turbo', api_key=Config.OPENAI_API_KEY)
-    dspy.configure(lm=lm)
-    DSPY_AVAILABLE = True
-except:
-    DSPY_AVAILABLE = False
-
-class FeedbackSignature(dspy.Signature if DSPY_AVAILABLE else object):
-    """DSPy signature for feedback processing"""
-    original_question: str = dspy.InputField(desc="Original mathematical question")
-    generated_solution: str = dspy.InputField(desc="Solution generated by the system")
-    human_feedback: str = dspy.InputField(desc="Feedback provided by human")
-    improved_solution: str = dspy.OutputField(desc="Improved solution based on feedback")
+def feedback_signature(dspy):
+    class FeedbackSignature(dspy.Signature):
+        """DSPy signature for feedback processing"""
+        original_question: str = dspy.InputField(desc="Original mathematical question")
+        generated_solution: str = dspy.InputField(desc="Solution generated by the system")
+        human_feedback: str = dspy.InputField(desc="Feedback provided by human")
+        improved_solution: str = dspy.OutputField(desc="Improved solution based on feedback")
+    return FeedbackSignature
 
 class HumanFeedbackAgent:
-    def __init__(self):
-        self.feedback_storage = "storage/feedback_data.json"
-        self.dspy_available = DSPY_AVAILABLE
-        
-        if DSPY_AVAILABLE:
-            self.feedback_processor = dspy.Predict(FeedbackSignature)
-        else:
-            self.feedback_processor = None
+    def __init__(self, promoter=None):
+        self.feedback_storage = Config.FEEDBACK_DB_PATH
+        self.legacy_feedback_storage = "storage/feedback_data.json"
+        self.promoter = promoter
+        self._feedback_processor = None
         
         self._ensure_storage()
     
+    @property
+    def dspy_available(self) -> bool:
+        return get_dspy() is not None
+    
+    @property
+    def feedback_processor(self):
+        """DSPy feedback predictor, built on first use (None without DSPy)"""
+        if self._feedback_processor is None:
+            dspy = get_dspy()
+            if dspy is not None:
+                self._feedback_processor = dspy.Predict(feedback_signature(dspy))
+        return self._feedback_processor
+    
     def _ensure_storage(self):
-        """Ensure feedback storage exists"""
-        import os
-        os.makedirs('storage', exist_ok=True)
-        if not os.path.exists(self.feedback_storage):
-            with open(self.feedback_storage, 'w') as f:
-                json.dump({"feedback_entries": [], "learning_cycles": 0}, f)
+        """Ensure feedback storage exists, migrating the legacy JSON file once"""
+        self.store = FeedbackStore(self.feedback_storage, legacy_json_path=self.legacy_feedback_storage)
     
     def process_feedback(self, question: str, solution: Dict, feedback: str) -> Dict[str, Any]:
         """Process human feedback with learning capabilities"""
@@ -58,6 +60,11 @@ class HumanFeedbackAgent:
             # Store feedback for continuous learning
             learning_applied = self._store_feedback(question, solution, feedback, improved_solution)
             
+            # Offer DSPy-improved solutions backed by high quality feedback for promotion; the promoter
+            # still verifies them (guardrails, exact solver or agreement between submissions)
+            if self.promoter and self.dspy_available and self._analyze_feedback_quality(feedback) == "high":
+                self.promoter.submit(question, improved_solution)
+            
             return {
                 "success": True,
                 "improved_solution": improved_solution,
@@ -74,9 +81,6 @@ class HumanFeedbackAgent:
     def _store_feedback(self, question: str, solution: Dict, feedback: str, improved_solution: str) -> bool:
         """Store feedback and update learning"""
         try:
-            with open(self.feedback_storage, 'r') as f:
-                data = json.load(f)
-            
             feedback_entry = {
                 "timestamp": datetime.now().isoformat(),
                 "question": question,
@@ -86,15 +90,10 @@ class HumanFeedbackAgent:
                 "feedback_quality": self._analyze_feedback_quality(feedback)
             }
             
-            data["feedback_entries"].append(feedback_entry)
-            data["learning_cycles"] += 1
+            self.store.append(feedback_entry)
             
             # Implement simple learning: after 5 quality feedbacks, mark as learned
-            quality_feedbacks = [f for f in data["feedback_entries"] if f.get("feedback_quality") == "high"]
-            learning_applied = len(quality_feedbacks) >= 5
-            
-            with open(self.feedback_storage, 'w') as f:
-                json.dump(data, f, indent=2)
+            learning_applied = self.store.count("high") >= 5
             
             return learning_applied
             
@@ -119,21 +118,37 @@ class HumanFeedbackAgent:
         else:
             return "low"
     
-    def get_feedback_stats(self) -> Dict[str, Any]:
-        """Get feedback statistics and learning progress"""
+    @staticmethod
+    def parse_window(window: str) -> int:
+        """Parse a rolling window such as '15m', '1h', '1d' or plain seconds"""
+        units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+        window = window.strip().lower()
+        if window[-1:] in units:
+            value, unit = window[:-1], units[window[-1]]
+        else:
+            value, unit = window, 1
+        try:
+            seconds = float(value) * unit
+        except ValueError:
+            raise ValueError(f"Invalid window: {window}")
+        # Also rejects nan and inf (or an overflow to inf), which int() cannot convert
+        if not math.isfinite(seconds) or seconds < 1:
+            raise ValueError(f"Invalid window: {window}")
+        return int(seconds)
+    
+    def get_feedback_stats(self, window: Optional[str] = None) -> Dict[str, Any]:
+        """Get feedback statistics and learning progress, optionally over a rolling window"""
+        if window:
+            return self.store.aggregates.window(self.parse_window(window))
         try:
-            with open(self.feedback_storage, 'r') as f:
-                data = json.load(f)
-            
-            entries = data.get("feedback_entries", [])
-            quality_feedbacks = [f for f in entries if f.get("feedback_quality") == "high"]
+            quality_feedbacks = self.store.count("high")
             
             return {
-                "total_feedback_entries": len(entries),
-                "quality_feedbacks": len(quality_feedbacks),
-                "learning_cycles": data.get("learning_cycles", 0),
-                "learning_progress": f"{len(quality_feedbacks)}/5 quality feedbacks collected",
-                "system_improving": len(quality_feedbacks) >= 3
+                "total_feedback_entries": self.store.count(),
+                "quality_feedbacks": quality_feedbacks,
+                "learning_cycles": self.store.learning_cycles(),
+                "learning_progress": f"{quality_feedbacks}/5 quality feedbacks collected",
+                "system_improving": quality_feedbacks >= 3
             }
         except:
             return {"total_feedback_entries": 0, "learning_progress": "No feedback yet"}
\ No newline at end of file
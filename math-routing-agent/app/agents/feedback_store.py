@@ -0,0 +1,315 @@
+import os
+import json
+import queue
+import hashlib
+import sqlite3
+import argparse
+import time
+import threading
+from contextlib import closing, contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class FeedbackAggregates:
+    """Running feedback counters: totals, per quality tier and per-minute time buckets
+
+    Updated as entries commit so stats reads are O(1) (O(window minutes) for
+    rolling windows). Minute buckets older than the retention horizon are
+    dropped.
+    """
+    BUCKET_SECONDS = 60
+
+    def __init__(self, retention_seconds: int = 7 * 24 * 3600):
+        self.retention_seconds = retention_seconds
+        self.total = 0
+        self.by_quality: Dict[str, int] = {}
+        self.buckets: Dict[int, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(timestamp: str) -> Optional[int]:
+        try:
+            return int(datetime.fromisoformat(timestamp).timestamp()) // FeedbackAggregates.BUCKET_SECONDS
+        except (TypeError, ValueError):
+            return None
+
+    def add(self, timestamp: str, quality: Optional[str], count: int = 1):
+        quality = quality or "unknown"
+        bucket = self._bucket(timestamp)
+        with self._lock:
+            self.total += count
+            self.by_quality[quality] = self.by_quality.get(quality, 0) + count
+            if bucket is not None and bucket * self.BUCKET_SECONDS >= time.time() - self.retention_seconds:
+                counts = self.buckets.setdefault(bucket, {})
+                counts[quality] = counts.get(quality, 0) + count
+                self._expire()
+
+    def _expire(self):
+        horizon = int(time.time() - self.retention_seconds) // self.BUCKET_SECONDS
+        if self.buckets and min(self.buckets) < horizon:
+            for bucket in [b for b in self.buckets if b < horizon]:
+                del self.buckets[bucket]
+
+    def count(self, quality: Optional[str] = None) -> int:
+        if quality is None:
+            return self.total
+        return self.by_quality.get(quality, 0)
+
+    def window(self, seconds: int) -> Dict[str, Any]:
+        """Counts over the trailing window (bounded by the retention horizon)"""
+        seconds = min(seconds, self.retention_seconds)
+        start_bucket = int(time.time() - seconds) // self.BUCKET_SECONDS
+        by_quality: Dict[str, int] = {}
+        with self._lock:
+            for bucket, counts in self.buckets.items():
+                if bucket >= start_bucket:
+                    for quality, count in counts.items():
+                        by_quality[quality] = by_quality.get(quality, 0) + count
+        return {
+            "window_seconds": seconds,
+            "since": datetime.fromtimestamp(start_bucket * self.BUCKET_SECONDS).isoformat(),
+            "total": sum(by_quality.values()),
+            "by_quality": by_quality
+        }
+
+class FeedbackStore:
+    """Append-only SQLite (WAL) feedback log with group commit
+
+    Writers enqueue entries and block until a single writer thread commits
+    them; everything queued at that moment goes into one transaction, so
+    concurrent submissions share an fsync and write cost does not depend on
+    the size of the history.
+    """
+    def __init__(self, path: str, legacy_json_path: Optional[str] = None, max_batch: int = 512,
+                 stats_retention_seconds: int = 7 * 24 * 3600):
+        self.path = path
+        self.max_batch = max_batch
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._transaction() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    original_solution TEXT,
+                    human_feedback TEXT,
+                    improved_solution TEXT,
+                    feedback_quality TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback (timestamp)")
+            conn.execute("DROP INDEX IF EXISTS idx_feedback_quality")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        if legacy_json_path:
+            self.migrate_json(legacy_json_path)
+
+        self.aggregates = FeedbackAggregates(stats_retention_seconds)
+        self._rebuild_aggregates()
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self.commits = 0
+        self.committed_entries = 0
+        self._writer = threading.Thread(target=self._writer_loop, name="feedback-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """A short-lived connection running one transaction; closed afterwards (sqlite3's with only commits)"""
+        with closing(self._connect()) as conn:
+            with conn:
+                yield conn
+
+    @staticmethod
+    def _row(entry: Dict[str, Any]) -> tuple:
+        return (
+            entry["timestamp"],
+            entry["question"],
+            json.dumps(entry.get("original_solution"), ensure_ascii=False),
+            entry.get("human_feedback"),
+            entry.get("improved_solution"),
+            entry.get("feedback_quality")
+        )
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """Durably append one entry and return its id (blocks until its group commits)"""
+        done = threading.Event()
+        result: Dict[str, Any] = {}
+        self._queue.put((entry, done, result))
+        done.wait()
+        if "error" in result:
+            raise result["error"]
+        return result["id"]
+
+    def _writer_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Group commit: take everything that queued up behind the first entry
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            try:
+                with conn:
+                    for entry, _, result in batch:
+                        cursor = conn.execute(
+                            "INSERT INTO feedback (timestamp, question, original_solution, human_feedback, "
+                            "improved_solution, feedback_quality) VALUES (?, ?, ?, ?, ?, ?)",
+                            self._row(entry)
+                        )
+                        result["id"] = cursor.lastrowid
+                self.commits += 1
+                self.committed_entries += len(batch)
+                for entry, _, _ in batch:
+                    self.aggregates.add(entry["timestamp"], entry.get("feedback_quality"))
+            except Exception as e:
+                for _, _, result in batch:
+                    result["error"] = e
+            for _, done, _ in batch:
+                done.set()
+        conn.close()
+
+    def _rebuild_aggregates(self):
+        """Recompute running aggregates from storage (startup only)"""
+        horizon = datetime.fromtimestamp(time.time() - self.aggregates.retention_seconds).isoformat()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'learning_cycles_offset'").fetchone()
+            self.learning_cycles_offset = int(row[0]) if row else 0
+            for quality, count in conn.execute(
+                    "SELECT feedback_quality, COUNT(*) FROM feedback WHERE timestamp < ? GROUP BY feedback_quality",
+                    (horizon,)):
+                self.aggregates.add("", quality, count)
+            for timestamp, quality, count in conn.execute(
+                    "SELECT substr(timestamp, 1, 16), feedback_quality, COUNT(*) FROM feedback "
+                    "WHERE timestamp >= ? GROUP BY 1, 2", (horizon,)):
+                self.aggregates.add(timestamp, quality, count)
+
+    def count(self, quality: Optional[str] = None) -> int:
+        return self.aggregates.count(quality)
+
+    def learning_cycles(self) -> int:
+        """Entries written plus any cycle offset carried over from the legacy JSON file"""
+        return self.aggregates.count() + self.learning_cycles_offset
+
+    def iter_entries(self, batch_size: int = 1000):
+        """Stream stored entries in insertion order"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "SELECT id, timestamp, question, original_solution, human_feedback, improved_solution, "
+                "feedback_quality FROM feedback ORDER BY id"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        "id": row[0],
+                        "timestamp": row[1],
+                        "question": row[2],
+                        "original_solution": json.loads(row[3]) if row[3] else None,
+                        "human_feedback": row[4],
+                        "improved_solution": row[5],
+                        "feedback_quality": row[6]
+                    }
+        finally:
+            conn.close()
+
+    def migrate_json(self, json_path: str) -> int:
+        """Import a legacy feedback_data.json once, then rename it to *.migrated
+
+        A marker keyed by the file's content hash commits with the imported
+        entries, so a crash before the rename never imports the file twice.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw)
+        except (OSError, ValueError) as e:
+            print(f"Error reading legacy feedback file {json_path}: {e}")
+            return 0
+
+        marker = "migrated_json:" + hashlib.sha256(raw).hexdigest()
+        entries: List[Dict[str, Any]] = data.get("feedback_entries", [])
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                entries = None
+            else:
+                self._import_entries(conn, data, entries)
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, datetime.now().isoformat()))
+        os.replace(json_path, json_path + ".migrated")
+        if entries is None:
+            print(f"Legacy feedback file {json_path} was already migrated")
+            return 0
+        print(f"✅ Migrated {len(entries)} feedback entries from {json_path}")
+        return len(entries)
+
+    def _import_entries(self, conn: sqlite3.Connection, data: Dict[str, Any], entries: List[Dict[str, Any]]):
+        """Insert legacy entries and carry over their learning cycle offset inside the caller's transaction"""
+        conn.executemany(
+            "INSERT INTO feedback (timestamp, question, original_solution, human_feedback, "
+            "improved_solution, feedback_quality) VALUES (?, ?, ?, ?, ?, ?)",
+            (self._row(entry) for entry in entries)
+        )
+        offset = data.get("learning_cycles", len(entries)) - len(entries)
+        if offset:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('learning_cycles_offset', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value",
+                (str(offset),)
+            )
+
+    def compact(self):
+        """Fold the WAL into the main database file and reclaim free pages"""
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "commits": self.commits,
+            "committed_entries": self.committed_entries,
+            "avg_group_size": self.committed_entries / self.commits if self.commits else 0.0
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Feedback store maintenance")
+    parser.add_argument("command", choices=["migrate", "compact"])
+    parser.add_argument("--db", default="storage/feedback.db")
+    parser.add_argument("--json", default="storage/feedback_data.json", help="Legacy JSON file to migrate")
+    args = parser.parse_args()
+
+    store = FeedbackStore(args.db, legacy_json_path=args.json if args.command == "migrate" else None)
+    if args.command == "compact":
+        store.compact()
+        print(f"✅ Compacted {args.db}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
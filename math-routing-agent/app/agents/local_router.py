@@ -0,0 +1,308 @@
+import os
+import re
+import json
+import math
+import queue
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.agents.fast_solver import matches_answer
+from app.cache.response_cache import ResponseCache
+from app.cache.semantic_cache import normalized_expression, question_operations
+from app.knowledge_base.encoder import SimpleEncoder
+
+FEATURE_NAMES = [
+    "bias", "top_score", "margin", "match_count", "topic_match", "operation_match", "expression_match", "query_length"
+]
+
+# Calibrated by hand against the seed KB: a match needs a high score, the same
+# operation and the same expression, because SimpleEncoder vectors ignore the
+# operands and their order
+DEFAULT_WEIGHTS = [-15.0, 6.0, 1.0, 0.25, 1.0, 5.0, 6.0, 0.0]
+
+NEGATIVE_FEEDBACK_PATTERN = re.compile(r"wrong|incorrect|not (?:right|correct)|mistake|error|doesn't match|different problem")
+POSITIVE_FEEDBACK_PATTERN = re.compile(r"correct|right|accurate|exactly|perfect|helpful")
+
+class LocalRouter:
+    """In-process KB vs web routing model
+
+    A logistic model over features of the KB search results (top score,
+    margin, match count, topic agreement, same operation, same normalized
+    expression) and the query. Decisions are cached per normalized query and
+    KB result shape. Weights load from a JSON model file produced by
+    fit()/save(). Routed questions can be logged as JSONL (by a background
+    thread, off the request path); they are labeled from outcomes, never
+    from the router's own decisions, before training the next model.
+    """
+    def __init__(self, weights: Optional[List[float]] = None, cache_size: int = 4096,
+                 log_path: Optional[str] = None):
+        self.weights = list(weights or DEFAULT_WEIGHTS)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.decisions = 0
+        self._log_queue: Optional["queue.Queue"] = None
+        self._log_writer: Optional[threading.Thread] = None
+        if log_path:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._log_queue = queue.Queue()
+            self._log_writer = threading.Thread(
+                target=self._log_loop, args=(log_path,), name="router-log-writer", daemon=True
+            )
+            self._log_writer.start()
+
+    def _log_loop(self, log_path: str):
+        """Writer thread: append queued log lines, flushing once per drained batch"""
+        with open(log_path, "a", encoding="utf-8") as log:
+            while True:
+                line = self._log_queue.get()
+                while line is not None:
+                    log.write(line)
+                    try:
+                        line = self._log_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                log.flush()
+                if line is None:
+                    break
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LocalRouter":
+        """Router with weights from a saved model file, or the default weights if there is none"""
+        weights = None
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    model = json.load(f)
+                if model.get("features") == FEATURE_NAMES:
+                    weights = model["weights"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading router model {path}: {e}")
+        return cls(weights=weights, **kwargs)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"features": FEATURE_NAMES, "weights": self.weights}, f, indent=2)
+
+    @staticmethod
+    def features(question: str, kb_results: List[Dict[str, Any]]) -> List[float]:
+        """Feature vector (see FEATURE_NAMES) for a question and its KB search results"""
+        if not kb_results:
+            return [1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, min(len(question.split()) / 20.0, 1.0)]
+
+        best = kb_results[0]
+        top_score = best["similarity_score"]
+        second_score = kb_results[1]["similarity_score"] if len(kb_results) > 1 else 0.0
+        question_lower = question.lower()
+        topic_keywords = SimpleEncoder.MATH_TOPICS.get(best.get("topic"), [])
+        topic_match = 1.0 if any(keyword in question_lower for keyword in topic_keywords) else 0.0
+
+        matched_question = best.get("question", "")
+        operation_match = 1.0 if question_operations(question) == question_operations(matched_question) else 0.0
+        # Same math in the same order; a question without any math matches on wording alone
+        expression = normalized_expression(question)
+        expression_match = 1.0 if not expression or expression == normalized_expression(matched_question) else 0.0
+
+        return [
+            1.0,
+            top_score,
+            top_score - second_score,
+            len(kb_results) / 3.0,
+            topic_match,
+            operation_match,
+            expression_match,
+            min(len(question.split()) / 20.0, 1.0)
+        ]
+
+    def probability(self, features: List[float]) -> float:
+        """Probability that the knowledge base answer should be used"""
+        z = sum(w * x for w, x in zip(self.weights, features))
+        if z < -30:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def route(self, question: str, kb_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Routing decision in the MathRoutingAgent.route_question format"""
+        key = (
+            ResponseCache.normalize_key(question),
+            len(kb_results),
+            round(kb_results[0]["similarity_score"], 6) if kb_results else 0.0
+        )
+        with self._lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return dict(decision)
+
+        features = self.features(question, kb_results)
+        probability = self.probability(features)
+        use_kb = bool(kb_results) and probability >= 0.5
+        if not kb_results:
+            reasoning = "No similar questions in knowledge base"
+        else:
+            reasoning = (
+                f"Found {len(kb_results)} similar questions in knowledge base "
+                f"(best score {kb_results[0]['similarity_score']:.2f}, p(kb)={probability:.2f})"
+            )
+        decision = {
+            "use_knowledge_base": use_kb,
+            "reasoning": reasoning,
+            "kb_match_count": len(kb_results),
+            "confidence": "high" if abs(probability - 0.5) >= 0.4 else "medium",
+            "probability": probability,
+            "dspy_used": False
+        }
+
+        with self._lock:
+            self.decisions += 1
+            self._cache[key] = decision
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        if self._log_queue is not None:
+            # The decision is kept for reference only; training labels come from outcomes (see label_sample)
+            self._log_queue.put(json.dumps({
+                "question": question,
+                "kb_results": [
+                    {
+                        "question": r["question"],
+                        "similarity_score": r["similarity_score"],
+                        "topic": r.get("topic"),
+                        "final_answer": (r.get("solution") or {}).get("final_answer")
+                    }
+                    for r in kb_results
+                ],
+                "routed_to_kb": use_kb
+            }, ensure_ascii=False) + "\n")
+        return dict(decision)
+
+    def fit(self, samples: List[Dict[str, Any]], epochs: int = 500, learning_rate: float = 0.5,
+            l2: float = 1e-3) -> Dict[str, Any]:
+        """Fit the weights on labeled samples ({"question", "kb_results", "use_knowledge_base"})"""
+        samples = [s for s in samples if s.get("kb_results")]
+        if not samples:
+            return {"samples": 0, "accuracy": None}
+        X = np.array([self.features(s["question"], s["kb_results"]) for s in samples], dtype=np.float64)
+        y = np.array([1.0 if s["use_knowledge_base"] else 0.0 for s in samples])
+        w = np.array(self.weights, dtype=np.float64)
+
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-np.clip(X @ w, -30, 30)))
+            gradient = X.T @ (p - y) / len(y) + l2 * np.r_[0.0, w[1:]]
+            w -= learning_rate * gradient
+
+        self.weights = w.tolist()
+        self.clear_cache()
+        predictions = (X @ w) >= 0
+        return {"samples": len(samples), "accuracy": float((predictions == (y == 1.0)).mean())}
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "decisions": self.decisions,
+            "cache_hits": self.cache_hits,
+            "cache_size": len(self._cache),
+            "weights": dict(zip(FEATURE_NAMES, self.weights))
+        }
+
+    def close(self):
+        if self._log_writer is not None:
+            self._log_queue.put(None)
+            self._log_writer.join()
+            self._log_writer = None
+            self._log_queue = None
+
+def label_sample(row: Dict[str, Any], feedback: Dict[str, List[Dict[str, Any]]], solver) -> Optional[bool]:
+    """Whether the top KB match answered the question, from outcomes; None when nothing tells
+
+    In order: an explicit use_knowledge_base label, agreement between the
+    match's final answer and the exact local solver, then human feedback on
+    knowledge base answers to the question. The solver only answers
+    questions that match its templates in full, so it is never consulted on
+    a question it would misread. The router's own decision (routed_to_kb in
+    the log) is never a label.
+    """
+    if "use_knowledge_base" in row:
+        return bool(row["use_knowledge_base"])
+    best = row["kb_results"][0]
+    kb_answer = best.get("final_answer") or (best.get("solution") or {}).get("final_answer")
+    local = solver.solve(row["question"])
+    if local is not None and kb_answer:
+        return matches_answer(local["final_answer"], kb_answer)
+    votes = []
+    for entry in feedback.get(ResponseCache.normalize_key(row["question"]), []):
+        if (entry.get("original_solution") or {}).get("source") != "knowledge_base":
+            continue
+        text = (entry.get("human_feedback") or "").lower()
+        if NEGATIVE_FEEDBACK_PATTERN.search(text):
+            votes.append(False)
+        elif POSITIVE_FEEDBACK_PATTERN.search(text):
+            votes.append(True)
+    if votes:
+        return votes.count(True) > votes.count(False)
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local routing model from logged or labeled questions")
+    parser.add_argument("path", help="JSONL with question, optional kb_results and optional use_knowledge_base label")
+    parser.add_argument("--model", default="storage/router_model.json")
+    parser.add_argument("--feedback-db", default=None,
+                        help="Feedback SQLite database whose answers on KB solutions label logged questions")
+    parser.add_argument("--label-with-dspy", action="store_true",
+                        help="Label every row with the DSPy router (needs OPENAI_API_KEY)")
+    args = parser.parse_args()
+
+    from app.agents.dspy_routing_agent import MathRoutingAgent
+    from app.agents.fast_solver import FastPathSolver
+    from app.agents.feedback_store import FeedbackStore
+    from app.knowledge_base.vector_db import MathKnowledgeBase
+
+    feedback: Dict[str, List[Dict[str, Any]]] = {}
+    if args.feedback_db:
+        store = FeedbackStore(args.feedback_db)
+        for entry in store.iter_entries():
+            feedback.setdefault(ResponseCache.normalize_key(entry["question"]), []).append(entry)
+        store.close()
+
+    knowledge_base = None
+    solver = FastPathSolver()
+    labeler = MathRoutingAgent(router=LocalRouter()) if args.label_with_dspy else None
+    samples = []
+    with open(args.path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if "kb_results" not in row:
+                if knowledge_base is None:
+                    knowledge_base = MathKnowledgeBase()
+                row["kb_results"] = knowledge_base.search_similar_questions(row["question"])
+            if labeler is not None and row["kb_results"]:
+                label = labeler.label_with_dspy(row["question"], row["kb_results"])
+                if label is not None:
+                    row["use_knowledge_base"] = label
+            if row["kb_results"] and "use_knowledge_base" not in row:
+                label = label_sample(row, feedback, solver)
+                if label is not None:
+                    row["use_knowledge_base"] = label
+            if "use_knowledge_base" in row:
+                samples.append(row)
+
+    router = LocalRouter.load(args.model)
+    result = router.fit(samples)
+    router.save(args.model)
+    print(f"✅ Trained router on {result['samples']} samples (accuracy {result['accuracy']}) -> {args.model}")
+
+if __name__ == "__main__":
+    main()
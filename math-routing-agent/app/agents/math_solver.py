@@ -1,11 +1,27 @@
 import openai
 import re
-from typing import List, Dict, Any
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, AsyncIterator
 from app.config import Config
+from app.cache.semantic_cache import SemanticSolutionCache
+from app.agents.fast_solver import FastPathSolver
 
 client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+async_client = openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
 
 class MathSolverAgent:
+    def __init__(self, solution_cache: Optional[SemanticSolutionCache] = None, executor: Optional[Executor] = None):
+        if solution_cache is None:
+            solution_cache = SemanticSolutionCache(
+                capacity=Config.SEMANTIC_CACHE_SIZE,
+                threshold=Config.SEMANTIC_CACHE_THRESHOLD
+            )
+        self.solution_cache = solution_cache
+        # Async paths run the cache lookup (encode + similarity matmul) here, off the event loop
+        self.executor = executor
+        self.fast_solver = FastPathSolver()
+    
     def generate_solution_from_kb(self, question: str, kb_solution: Dict) -> Dict[str, Any]:
         """Generate solution from knowledge base"""
         return {
@@ -16,42 +32,131 @@ class MathSolverAgent:
             "similar_question": kb_solution.get('question', '')
         }
     
+    def generate_solution_locally(self, question: str) -> Optional[Dict[str, Any]]:
+        """Solve routine polynomial problems exactly in-process; None if out of scope"""
+        return self.fast_solver.solve(question)
+    
     def generate_solution_from_web(self, question: str, web_context: Dict) -> Dict[str, Any]:
         """Generate solution using web context"""
+        cached_solution = self.solution_cache.lookup(question)
+        if cached_solution is not None:
+            return cached_solution
+        
         try:
-            context = self._prepare_web_context(web_context)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a mathematics professor. Provide clear, educational step-by-step solutions.
-                        Always explain each step and simplify complex concepts for students."""
-                    },
-                    {
-                        "role": "user", 
-                        "content": f"Solve this math problem: {question}\n\nContext from research: {context}"
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=800
-            )
-            
-            solution_text = response.choices[0].message.content
-            steps = self._parse_solution_steps(solution_text)
+            response = client.chat.completions.create(**self._completion_request(question, web_context))
+            return self._build_web_solution(question, response.choices[0].message.content, web_context)
             
-            return {
-                "source": "web_search",
-                "steps": steps,
-                "final_answer": self._extract_final_answer(steps),
-                "confidence": "medium",
-                "sources": web_context.get('sources', [])
-            }
+        except Exception as e:
+            return self._generate_fallback_solution(question)
+    
+    async def generate_solution_from_web_async(self, question: str, web_context: Dict) -> Dict[str, Any]:
+        """Generate solution using web context without blocking the event loop"""
+        cached_solution = await self._lookup_async(question)
+        if cached_solution is not None:
+            return cached_solution
+        
+        try:
+            response = await async_client.chat.completions.create(**self._completion_request(question, web_context))
+            return self._build_web_solution(question, response.choices[0].message.content, web_context)
             
         except Exception as e:
             return self._generate_fallback_solution(question)
     
+    async def stream_solution_from_web(self, question: str, web_context: Dict) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a solution: {"type": "step"} events as completion lines arrive, then one {"type": "solution"}
+
+        The solution event's "completed" flag is False when the upstream
+        stream was cut off and the solution is partial.
+        """
+        cached_solution = await self._lookup_async(question)
+        if cached_solution is not None:
+            for step in cached_solution["steps"]:
+                yield {"type": "step", "step": step}
+            yield {"type": "solution", "solution": cached_solution, "completed": True}
+            return
+        
+        chunks = []
+        pending_line = ""
+        emitted = 0
+        completed = False
+        try:
+            stream = await async_client.chat.completions.create(
+                **self._completion_request(question, web_context),
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                chunks.append(delta)
+                pending_line += delta
+                # Emit every complete line as soon as it arrives
+                while "\n" in pending_line:
+                    line, pending_line = pending_line.split("\n", 1)
+                    step = self._parse_step_line(line)
+                    if step is not None:
+                        emitted += 1
+                        yield {"type": "step", "step": step}
+            step = self._parse_step_line(pending_line)
+            if step is not None:
+                emitted += 1
+                yield {"type": "step", "step": step}
+            completed = True
+            
+        except Exception as e:
+            if emitted == 0:
+                solution = self._generate_fallback_solution(question)
+                for step in solution["steps"]:
+                    yield {"type": "step", "step": step}
+                yield {"type": "solution", "solution": solution, "completed": False}
+                return
+        
+        # A stream cut off midway keeps the steps already sent but is not cached
+        solution = self._build_web_solution(question, "".join(chunks), web_context, cache=completed)
+        if emitted == 0:
+            for step in solution["steps"]:
+                yield {"type": "step", "step": step}
+        yield {"type": "solution", "solution": solution, "completed": completed}
+    
+    async def _lookup_async(self, question: str) -> Optional[Dict[str, Any]]:
+        """Semantic cache lookup in the executor"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.solution_cache.lookup, question)
+    
+    def _completion_request(self, question: str, web_context: Dict) -> Dict[str, Any]:
+        """Chat completion arguments shared by the sync and async paths"""
+        context = self._prepare_web_context(web_context)
+        return {
+            "model": "gpt-3.5-turbo",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": """You are a mathematics professor. Provide clear, educational step-by-step solutions.
+                        Always explain each step and simplify complex concepts for students."""
+                },
+                {
+                    "role": "user", 
+                    "content": f"Solve this math problem: {question}\n\nContext from research: {context}"
+                }
+            ],
+            "temperature": 0.3,
+            "max_tokens": 800
+        }
+    
+    def _build_web_solution(self, question: str, solution_text: str, web_context: Dict, cache: bool = True) -> Dict[str, Any]:
+        """Turn completion text into a solution and cache it"""
+        steps = self._parse_solution_steps(solution_text)
+        
+        solution = {
+            "source": "web_search",
+            "steps": steps,
+            "final_answer": self._extract_final_answer(steps),
+            "confidence": "medium",
+            "sources": web_context.get('sources', [])
+        }
+        if cache:
+            self.solution_cache.store(question, solution)
+        return solution
+    
     def _prepare_web_context(self, web_context: Dict) -> str:
         """Prepare context from web search results"""
         context_parts = []
@@ -70,15 +175,22 @@ class MathSolverAgent:
         lines = solution_text.split('\n')
         
         for line in lines:
-            line = line.strip()
-            if line and not line.startswith('```'):
-                # Clean step markers
-                clean_line = re.sub(r'^(?:\d+[\.\)]|\*|\-)\s*', '', line)
-                if clean_line and len(clean_line) > 10:  # Meaningful content
-                    steps.append(clean_line)
+            step = self._parse_step_line(line)
+            if step is not None:
+                steps.append(step)
         
         return steps if steps else [solution_text]
     
+    def _parse_step_line(self, line: str) -> Optional[str]:
+        """Clean one line of solution text into a step, or None if it is not one"""
+        line = line.strip()
+        if line and not line.startswith('```'):
+            # Clean step markers
+            clean_line = re.sub(r'^(?:\d+[\.\)]|\*|\-)\s*', '', line)
+            if clean_line and len(clean_line) > 10:  # Meaningful content
+                return clean_line
+        return None
+    
     def _extract_final_answer(self, steps: List[str]) -> str:
         """Extract final answer from steps"""
         if not steps:
@@ -0,0 +1,140 @@
+import re
+import time
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional
+from app.knowledge_base.encoder import SimpleEncoder
+
+SUPERSCRIPTS = str.maketrans({**{c: "^" + d for c, d in zip("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")}, "−": "-", "×": "*", "·": "*"})
+FUNCTION_PREFIX_PATTERN = re.compile(r'\b[fgy]\s*\(\s*x\s*\)\s*=|\by\s*=')
+# Expression tokens in order: numbers, functions, single-letter variables, operators and brackets
+EXPRESSION_TOKEN_PATTERN = re.compile(
+    r'\d+(?:\.\d+)?|sin|cos|tan|log|ln|sqrt|exp|√|π|(?<![a-z])[a-z](?![a-z])|[+\-/^=<>()]'
+)
+OPERATIONS = {
+    'derivative': re.compile(r'derivative|differentiat|d/dx'),
+    'integral': re.compile(r'integra|∫|antiderivative'),
+    'limit': re.compile(r'limit|\blim\b'),
+    'solve': re.compile(r'solve|roots?\b|zeros?\b'),
+    'area': re.compile(r'area'),
+    'volume': re.compile(r'volume'),
+    'perimeter': re.compile(r'perimeter|circumference')
+}
+
+def question_operations(text: str) -> tuple:
+    """Operations a question asks for (derivative, integral, solve, ...)"""
+    text = text.lower()
+    return tuple(name for name, pattern in OPERATIONS.items() if pattern.search(text))
+
+def normalized_expression(text: str) -> tuple:
+    """The question's math as an ordered token sequence, insensitive to wording, spacing and notation
+
+    "3x²" and "3 x^2" give the same tokens; "x^3 - 2x" and "2x^3 - x" do not.
+    Leading "f(x) =" / "y =" names and "d/dx" / "dx" markers are dropped.
+    """
+    text = text.lower().translate(SUPERSCRIPTS)
+    text = FUNCTION_PREFIX_PATTERN.sub(" ", text)
+    text = re.sub(r'\bd/dx\b|\bdx\b', " ", text)
+    # Single-letter words that are English, not variables
+    text = re.sub(r'\ba\b|\bi\b', " ", text)
+    return tuple(EXPRESSION_TOKEN_PATTERN.findall(text))
+
+def math_signature(text: str) -> tuple:
+    """Operations and ordered normalized expression of a question, insensitive to wording and notation"""
+    return question_operations(text), normalized_expression(text)
+
+class SemanticSolutionCache:
+    """Bounded similarity cache of LLM/web generated solutions
+
+    Vectors live in one preallocated float32 matrix so a lookup is a single
+    matrix-vector product. A hit requires cosine similarity above the
+    threshold and, by default, the same math signature (operations and the
+    ordered normalized expression) as the stored question, since SimpleEncoder
+    features alone ignore the operands and their order.
+    """
+    def __init__(self, encoder: Optional[SimpleEncoder] = None, capacity: int = 10000,
+                 threshold: float = 0.75, require_signature_match: bool = True):
+        self.encoder = encoder or SimpleEncoder()
+        self.capacity = capacity
+        self.threshold = threshold
+        self.require_signature_match = require_signature_match
+        self._vectors = np.zeros((capacity, self.encoder.vector_size), dtype=np.float32)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the best cached solution with provenance, or None"""
+        if self.capacity <= 0:
+            return None
+        query_vector = self.encoder.encode_batch([question])[0]
+        signature = math_signature(question)
+        with self._lock:
+            if self._size == 0:
+                self.misses += 1
+                return None
+            scores = self._vectors[:self._size] @ query_vector
+            for slot in np.argsort(-scores)[:5]:
+                score = float(scores[slot])
+                if score < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if self.require_signature_match and entry["signature"] != signature:
+                    continue
+                self._last_used[slot] = time.monotonic()
+                entry["hits"] += 1
+                self.hits += 1
+                return {
+                    **entry["solution"],
+                    "source": "semantic_cache",
+                    "provenance": {
+                        "cached_question": entry["question"],
+                        "original_source": entry["source"],
+                        "cached_at": entry["cached_at"],
+                        "similarity_score": score,
+                        "hits": entry["hits"]
+                    }
+                }
+            self.misses += 1
+            return None
+
+    def store(self, question: str, solution: Dict[str, Any]):
+        """Cache a successful solution, evicting the least recently used entry when full"""
+        if self.capacity <= 0:
+            return
+        vector = self.encoder.encode_batch([question])[0]
+        entry = {
+            "question": question,
+            "solution": solution,
+            "source": solution.get("source", "unknown"),
+            "signature": math_signature(question),
+            "cached_at": time.time(),
+            "hits": 0
+        }
+        with self._lock:
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._last_used[slot] = time.monotonic()
+            self._entries[slot] = entry
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for health/metrics endpoints"""
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
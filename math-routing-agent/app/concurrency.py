@@ -0,0 +1,97 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict
+
+class ServicePool:
+    """Runs blocking calls off the event loop with a per-service concurrency limit
+
+    All blocking work shares one bounded thread pool; each downstream service
+    (openai, dspy, knowledge_base, ...) gets its own semaphore so a slow
+    service cannot take every worker thread.
+    """
+    def __init__(self, max_workers: int, limits: Dict[str, int], default_limit: int = 8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="service-pool")
+        self.limits = dict(limits)
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def limit(self, service: str) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent calls to a service (usable with async with)"""
+        semaphore = self._semaphores.get(service)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(service, self.default_limit))
+            self._semaphores[service] = semaphore
+        return semaphore
+
+    async def run(self, service: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the pool under the service's limit
+
+        The limit is held until the worker thread finishes, not until the
+        caller stops waiting: a cancelled caller cannot cancel a call that is
+        already running, so its slot is released when the call returns.
+        """
+        semaphore = self.limit(service)
+        await semaphore.acquire()
+        self.in_flight[service] = self.in_flight.get(service, 0) + 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(service)
+            raise
+        future.add_done_callback(lambda _: self._release_threadsafe(loop, service))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, service: str):
+        self.in_flight[service] -= 1
+        self.limit(service).release()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop, service: str):
+        try:
+            loop.call_soon_threadsafe(self._release, service)
+        except RuntimeError:
+            # The loop is closed (shutdown): nothing is left to admit
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            service: {"limit": self.limits.get(service, self.default_limit), "in_flight": self.in_flight.get(service, 0)}
+            for service in sorted(set(self.limits) | set(self.in_flight))
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one shared computation
+
+    The first caller starts the work as a task; concurrent callers with the
+    same key await that task instead of starting their own. Callers await it
+    through asyncio.shield so one disconnecting client cannot cancel the
+    result the others are waiting for.
+    """
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once per key among concurrent callers and share its result"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
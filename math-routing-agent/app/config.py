@@ -6,4 +6,42 @@ load_dotenv()
 class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-    QDRANT_URL = os.getenv("QDRANT_URL", "localhost")
\ No newline at end of file
+    QDRANT_URL = os.getenv("QDRANT_URL", "localhost")
+    KB_SNAPSHOT_DIR = os.getenv("KB_SNAPSHOT_DIR", "storage/kb_snapshot")
+    KB_BANK_SNAPSHOT_DIR = os.getenv("KB_BANK_SNAPSHOT_DIR", "")
+    KB_VECTOR_STORAGE = os.getenv("KB_VECTOR_STORAGE", "qdrant")
+    KB_RESCORE_FACTOR = int(os.getenv("KB_RESCORE_FACTOR", "4"))
+    KB_HNSW_M = int(os.getenv("KB_HNSW_M", "16"))
+    KB_HNSW_EF_CONSTRUCTION = int(os.getenv("KB_HNSW_EF_CONSTRUCTION", "200"))
+    KB_HNSW_EF_SEARCH = int(os.getenv("KB_HNSW_EF_SEARCH", "64"))
+    KB_INDEX_CACHE = os.getenv("KB_INDEX_CACHE", "true").lower() == "true"
+    KB_PARTITIONED = os.getenv("KB_PARTITIONED", "false").lower() == "true"
+    KB_ROUTE_CONFIDENCE = float(os.getenv("KB_ROUTE_CONFIDENCE", "0.6"))
+    KB_PARTITION_WORKERS = int(os.getenv("KB_PARTITION_WORKERS", "0"))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+    RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "10000"))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.75"))
+    SERVICE_POOL_WORKERS = int(os.getenv("SERVICE_POOL_WORKERS", "128"))
+    OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "64"))
+    KB_CONCURRENCY = int(os.getenv("KB_CONCURRENCY", "16"))
+    WEB_SEARCH_CONCURRENCY = int(os.getenv("WEB_SEARCH_CONCURRENCY", "32"))
+    SEARCH_API_URL = os.getenv("SEARCH_API_URL", "https://api.tavily.com")
+    SEARCH_CONNECT_TIMEOUT = float(os.getenv("SEARCH_CONNECT_TIMEOUT", "1.0"))
+    SEARCH_READ_TIMEOUT = float(os.getenv("SEARCH_READ_TIMEOUT", "4.0"))
+    SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "6.0"))
+    SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "2"))
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+    SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600"))
+    SEARCH_NEGATIVE_TTL_SECONDS = float(os.getenv("SEARCH_NEGATIVE_TTL_SECONDS", "30"))
+    SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "true").lower() == "true"
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "100"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+    FEEDBACK_CONCURRENCY = int(os.getenv("FEEDBACK_CONCURRENCY", "4"))
+    ROUTER_MODEL_PATH = os.getenv("ROUTER_MODEL_PATH", "storage/router_model.json")
+    ROUTER_LOG_PATH = os.getenv("ROUTER_LOG_PATH", "")
+    ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "4096"))
+    FEEDBACK_DB_PATH = os.getenv("FEEDBACK_DB_PATH", "storage/feedback.db")
+    PROMOTED_QUESTIONS_PATH = os.getenv("PROMOTED_QUESTIONS_PATH", "storage/promoted_questions.jsonl")
+    PROMOTION_MIN_AGREEMENT = int(os.getenv("PROMOTION_MIN_AGREEMENT", "2"))
\ No newline at end of file
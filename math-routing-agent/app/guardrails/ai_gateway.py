@@ -1,5 +1,42 @@
 import re
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Optional
+
+# Precompiled guardrail patterns; named groups identify which rule fired for the hit counters
+MATH_PATTERN = re.compile(
+    r'(?P<number>\d)'
+    r'|(?P<operator>[+\-*/^=])'
+    r'|(?P<function>sin|cos|tan|log|ln|sqrt)'
+    r'|(?P<operation>equation|solve|calculate|derivative|integral)'
+    r'|(?P<subject>algebra|geometry|calculus|trigonometry|probability)'
+    r'|(?P<shape>area|volume|angle|triangle|circle|function)',
+    re.IGNORECASE
+)
+
+# SSN, credit card and phone numbers share a \b\d{3} prefix, so one scan covers all three
+PRIVACY_DIGITS_PATTERN = re.compile(
+    r'\b\d{3}(?:(?P<ssn>-\d{2}-\d{4}\b)|(?P<credit_card>\d{13}\b)|(?P<phone>\d{7}\b))'
+)
+# Only scanned when the text contains '@'
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+MARKUP_PATTERN = re.compile(r'<script.*?</script>|<[^>]+>', re.DOTALL)
+SPECIAL_CHAR_PATTERN = re.compile(r'[<>"\'&;]')
+
+# Substring checks on one lowercased copy beat a regex alternation here
+EDUCATIONAL_INDICATORS = (
+    'step', 'solution', 'explanation', 'therefore',
+    'calculate', 'formula', 'method', 'approach'
+)
+
+def find_private_data(text: str) -> Optional[str]:
+    """Name of the first privacy rule matching text, or None"""
+    match = PRIVACY_DIGITS_PATTERN.search(text)
+    if match is not None:
+        return match.lastgroup
+    if '@' in text and EMAIL_PATTERN.search(text) is not None:
+        return "email"
+    return None
 
 class InputGuardrail:
     """Enhanced input validation with privacy protection"""
@@ -7,36 +44,16 @@ class InputGuardrail:
     @staticmethod
     def validate_mathematical_content(query: str) -> bool:
         """Ensure query is math-related and safe"""
-        # Mathematical patterns
-        math_patterns = [
-            r'\d+', r'[+\-*/^=]', r'sin|cos|tan|log|ln|sqrt',
-            r'equation|solve|calculate|derivative|integral',
-            r'algebra|geometry|calculus|trigonometry|probability',
-            r'area|volume|angle|triangle|circle|function'
-        ]
-        
-        # Privacy protection - block personal data patterns
-        privacy_patterns = [
-            r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
-            r'\b\d{16}\b',  # Credit card
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # Email
-            r'\b\d{10}\b'  # Phone numbers
-        ]
-        
-        has_math = any(re.search(pattern, query.lower()) for pattern in math_patterns)
-        has_private = any(re.search(pattern, query) for pattern in privacy_patterns)
-        
-        return has_math and not has_private
+        return MATH_PATTERN.search(query) is not None and find_private_data(query) is None
     
     @staticmethod
     def sanitize_input(query: str) -> str:
         """Sanitize and remove potentially harmful content"""
-        # Remove scripts and HTML
-        sanitized = re.sub(r'<script.*?</script>', '', query, flags=re.DOTALL)
-        sanitized = re.sub(r'<[^>]+>', '', sanitized)
-        # Remove special characters but keep math symbols
-        sanitized = re.sub(r'[<>"\'&;]', '', sanitized)
-        return sanitized.strip()
+        # Nothing to strip in the common case
+        if SPECIAL_CHAR_PATTERN.search(query) is None:
+            return query.strip()
+        # Remove scripts and HTML, then special characters but keep math symbols
+        return SPECIAL_CHAR_PATTERN.sub('', MARKUP_PATTERN.sub('', query)).strip()
 
 class OutputGuardrail:
     """Enhanced output validation for educational content"""
@@ -44,15 +61,14 @@ class OutputGuardrail:
     @staticmethod
     def validate_educational_content(response: str) -> bool:
         """Ensure response contains proper educational explanation"""
-        educational_indicators = [
-            'step', 'solution', 'explanation', 'therefore',
-            'calculate', 'formula', 'method', 'approach'
-        ]
-        
         response_lower = response.lower()
-        educational_score = sum(1 for indicator in educational_indicators if indicator in response_lower)
-        
-        return educational_score >= 2
+        educational_score = 0
+        for indicator in EDUCATIONAL_INDICATORS:
+            if indicator in response_lower:
+                educational_score += 1
+                if educational_score >= 2:
+                    return True
+        return False
     
     @staticmethod
     def format_step_by_step(steps: List[str], final_answer: str) -> str:
@@ -67,25 +83,89 @@ class OutputGuardrail:
         
         return formatted
 
-class AIGateway:
+class GuardrailEngine:
+    """Input guardrails with per-rule hit counters and a batch API"""
+    ERROR_MESSAGE = "Query must be mathematical and educational in nature"
+    
     def __init__(self):
-        self.input_guardrail = InputGuardrail()
-        self.output_guardrail = OutputGuardrail()
+        self.rule_hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
     
-    def process_input(self, user_query: str) -> Dict[str, Any]:
-        """Process input through privacy and content guardrails"""
-        sanitized_query = self.input_guardrail.sanitize_input(user_query)
-        is_valid = self.input_guardrail.validate_mathematical_content(sanitized_query)
+    def _check(self, query: str, hits: Dict[str, int]) -> Dict[str, Any]:
+        sanitized_query = InputGuardrail.sanitize_input(query)
+        privacy_rule = find_private_data(sanitized_query)
+        math_match = MATH_PATTERN.search(sanitized_query)
+        
+        if privacy_rule is not None:
+            rule = f"privacy.{privacy_rule}"
+        elif math_match is not None:
+            rule = f"math.{math_match.lastgroup}"
+        else:
+            rule = "rejected.not_math"
+        hits[rule] = hits.get(rule, 0) + 1
         
+        is_valid = math_match is not None and privacy_rule is None
         return {
             "sanitized_query": sanitized_query,
             "is_valid": is_valid,
-            "error_message": None if is_valid else "Query must be mathematical and educational in nature"
+            "error_message": None if is_valid else self.ERROR_MESSAGE
         }
     
+    def _record(self, hits: Dict[str, int]):
+        with self._lock:
+            for rule, count in hits.items():
+                self.rule_hits[rule] = self.rule_hits.get(rule, 0) + count
+    
+    def validate(self, query: str) -> Dict[str, Any]:
+        """Sanitize and validate one query"""
+        hits: Dict[str, int] = {}
+        result = self._check(query, hits)
+        self._record(hits)
+        return result
+    
+    def validate_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Sanitize and validate many queries, in order"""
+        hits: Dict[str, int] = {}
+        results = [self._check(query, hits) for query in queries]
+        self._record(hits)
+        return results
+    
+    def validate_output(self, response: str) -> bool:
+        is_valid = OutputGuardrail.validate_educational_content(response)
+        self._record({"output.educational" if is_valid else "output.rejected": 1})
+        return is_valid
+    
+    def validate_step(self, step: str) -> bool:
+        """Check one streamed solution step before it is sent"""
+        is_valid = bool(step.strip()) and find_private_data(step) is None
+        self._record({"output.step" if is_valid else "output.step_rejected": 1})
+        return is_valid
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self.rule_hits.items()))
+
+class AIGateway:
+    def __init__(self, engine: Optional[GuardrailEngine] = None):
+        self.input_guardrail = InputGuardrail()
+        self.output_guardrail = OutputGuardrail()
+        self.engine = engine or GuardrailEngine()
+    
+    def process_input(self, user_query: str) -> Dict[str, Any]:
+        """Process input through privacy and content guardrails"""
+        return self.engine.validate(user_query)
+    
+    def process_input_batch(self, user_queries: List[str]) -> List[Dict[str, Any]]:
+        """Process many inputs through privacy and content guardrails"""
+        return self.engine.validate_batch(user_queries)
+    
+    def process_output_step(self, step: str) -> bool:
+        """Validate one streamed step through the output guardrails"""
+        return self.engine.validate_step(step)
+    
     def process_output(self, solution: str, steps: List[str]) -> Dict[str, Any]:
         """Process output through educational content guardrails"""
-        is_valid = self.output_guardrail.validate_educational_content(solution)
+        is_valid = self.engine.validate_output(solution)
         
         if is_valid:
             formatted_solution = self.output_guardrail.format_step_by_step(steps, solution)
@@ -97,4 +177,4 @@ class AIGateway:
             return {
                 "formatted_solution": "I apologize, but I couldn't generate a proper educational solution. Please try again with a different mathematical question.",
                 "is_valid": False
-            }
\ No newline at end of file
+            }
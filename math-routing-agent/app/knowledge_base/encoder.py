@@ -0,0 +1,106 @@
+import re
+import numpy as np
+from typing import List
+
+class SimpleEncoder:
+    """Vector encoder for mathematical content"""
+    # Bump whenever the feature layout changes so stale snapshots are rebuilt
+    VERSION = "1"
+    MATH_SYMBOLS = ['+', '-', '*', '/', '=', '^', '√', 'π', 'θ', 'α', 'β']
+    MATH_TOPICS = {
+        'algebra': ['solve', 'equation', 'variable', 'polynomial', 'quadratic'],
+        'calculus': ['derivative', 'integral', 'limit', 'differentiate', 'integrate'],
+        'geometry': ['area', 'volume', 'angle', 'triangle', 'circle', 'radius'],
+        'trigonometry': ['sin', 'cos', 'tan', 'angle', 'triangle']
+    }
+    SYMBOL_OFFSET = 0
+    TOPIC_OFFSET = 50
+    WORD_OFFSET = 100
+    MAX_WORDS = 100
+
+    def __init__(self):
+        self.vector_size = 384
+        # Symbol lookup table over sorted code points
+        codepoints = np.array([ord(s) for s in self.MATH_SYMBOLS], dtype=np.uint32)
+        self._symbol_order = np.argsort(codepoints)
+        self._symbol_codepoints = codepoints[self._symbol_order]
+        # Keyword -> topic incidence matrix (a keyword may belong to several topics)
+        self._keywords = sorted({kw for kws in self.MATH_TOPICS.values() for kw in kws})
+        self._keyword_patterns = [re.compile(re.escape(kw)) for kw in self._keywords]
+        self._keyword_topics = np.zeros((len(self._keywords), len(self.MATH_TOPICS)), dtype=np.float32)
+        for t, keywords in enumerate(self.MATH_TOPICS.values()):
+            for kw in keywords:
+                self._keyword_topics[self._keywords.index(kw), t] = 1.0
+    
+    def encode(self, text: str) -> List[float]:
+        """Encode text to vector using mathematical features"""
+        return self.encode_batch([text])[0].tolist()
+    
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode a batch of texts into a (len(texts), vector_size) float32 matrix"""
+        n = len(texts)
+        if n == 1:
+            return self._encode_one(texts[0] or "")
+        vectors = np.zeros((n, self.vector_size), dtype=np.float32)
+        if n == 0:
+            return vectors
+        texts = [text or "" for text in texts]
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n)
+        
+        # Mathematical symbol features: one pass over all code points of the batch
+        # surrogatepass keeps a lone surrogate as one code point, matching len()
+        codepoints = np.frombuffer("".join(texts).encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+        if codepoints.size:
+            doc_ids = np.repeat(np.arange(n), lengths)
+            slot = np.searchsorted(self._symbol_codepoints, codepoints)
+            slot = np.minimum(slot, len(self._symbol_codepoints) - 1)
+            hit = self._symbol_codepoints[slot] == codepoints
+            symbol_ids = self._symbol_order[slot[hit]]
+            counts = np.bincount(
+                doc_ids[hit] * len(self.MATH_SYMBOLS) + symbol_ids,
+                minlength=n * len(self.MATH_SYMBOLS)
+            ).reshape(n, len(self.MATH_SYMBOLS))
+            vectors[:, self.SYMBOL_OFFSET:self.SYMBOL_OFFSET + len(self.MATH_SYMBOLS)] = (
+                counts / np.maximum(lengths, 1)[:, None]
+            )
+        
+        # Mathematical topic features: scan the joined lowercase batch once per keyword
+        lowered = [t.lower() for t in texts]
+        joined = "\n".join(lowered)
+        starts = np.cumsum([0] + [len(t) + 1 for t in lowered[:-1]])
+        present = np.zeros((n, len(self._keywords)), dtype=np.float32)
+        for k, pattern in enumerate(self._keyword_patterns):
+            positions = [m.start() for m in pattern.finditer(joined)]
+            if positions:
+                present[np.searchsorted(starts, positions, side="right") - 1, k] = 1.0
+        vectors[:, self.TOPIC_OFFSET:self.TOPIC_OFFSET + len(self.MATH_TOPICS)] = present @ self._keyword_topics
+        
+        # Word frequency features
+        word_counts = np.fromiter((len(t.split()) for t in lowered), dtype=np.int64, count=n)
+        vectors[:, self.WORD_OFFSET:self.WORD_OFFSET + self.MAX_WORDS] = (
+            np.arange(self.MAX_WORDS) < np.minimum(word_counts, self.MAX_WORDS)[:, None]
+        )
+        
+        # Normalize
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        
+        return vectors
+    
+    def _encode_one(self, text: str) -> np.ndarray:
+        """encode_batch for a single text: plain string scans beat the vectorized setup at this size"""
+        vectors = np.zeros((1, self.vector_size), dtype=np.float32)
+        if text:
+            length = len(text)
+            vectors[0, self.SYMBOL_OFFSET:self.SYMBOL_OFFSET + len(self.MATH_SYMBOLS)] = [
+                text.count(symbol) / length for symbol in self.MATH_SYMBOLS
+            ]
+            lowered = text.lower()
+            vectors[0, self.TOPIC_OFFSET:self.TOPIC_OFFSET + len(self.MATH_TOPICS)] = [
+                sum(1 for keyword in keywords if keyword in lowered) for keywords in self.MATH_TOPICS.values()
+            ]
+            vectors[0, self.WORD_OFFSET:self.WORD_OFFSET + min(len(lowered.split()), self.MAX_WORDS)] = 1.0
+            # Same normalization as the batch path, so both give bit-identical vectors
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
@@ -0,0 +1,192 @@
+import os
+import bisect
+import hashlib
+import threading
+import numpy as np
+from typing import Any, Dict, List, Tuple
+from app.knowledge_base.index import VectorIndex
+from app.knowledge_base.quantized import normalize_rows
+
+class HNSWIndex(VectorIndex):
+    """Approximate cosine search over an HNSW graph (hnswlib)
+
+    m is the number of graph links per node and ef_construction the
+    candidate list size while inserting; both are fixed once built and
+    trade build time and memory for recall. ef_search is the candidate list
+    size per query (raised to top_k when smaller) and can change at any time.
+    Inserts are incremental: the graph grows in place and an existing id is
+    overwritten.
+
+    SimpleEncoder maps many questions to the same vector, and a graph full
+    of identical nodes cannot be navigated (a new point behind dozens of
+    equidistant copies is never reached). Each distinct vector is therefore
+    one graph node ("slot") and ids map onto slots; a hit expands to the
+    slot's ids, lowest first.
+    """
+    storage = "hnsw"
+    GRAPH_FILE = "hnsw.bin"
+    SLOTS_FILE = "slots.npz"
+    cache_builds = True
+
+    def __init__(self, dim: int, m: int = 16, ef_construction: int = 200, ef_search: int = 64,
+                 num_threads: int = -1, seed: int = 100):
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("KB_VECTOR_STORAGE=hnsw needs the hnswlib package (pip install hnswlib)") from e
+        self._hnswlib = hnswlib
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.num_threads = num_threads
+        self.seed = seed
+        self.count = 0
+        self._index = self._new_index(1024)
+        self._ef = None
+        # id -> slot (-1 for unused ids), slot -> sorted ids, vector digest -> live slot
+        self._slot_of_id = np.zeros(0, dtype=np.int64)
+        self._members: List[List[int]] = []
+        self._slot_digests: List[bytes] = []
+        self._slot_of_digest: Dict[bytes, int] = {}
+        self._live_slots = 0
+        self._lock = threading.RLock()
+
+    def _new_index(self, capacity: int):
+        index = self._hnswlib.Index(space="cosine", dim=self.dim)
+        index.init_index(max_elements=capacity, M=self.m, ef_construction=self.ef_construction, random_seed=self.seed)
+        return index
+
+    def _set_ef(self, ef: int):
+        if ef != self._ef:
+            self._index.set_ef(ef)
+            self._ef = ef
+
+    def _reserve(self, size: int):
+        capacity = len(self._slot_of_id)
+        if size <= capacity:
+            return
+        slot_of_id = np.full(max(size, capacity * 2, 1024), -1, dtype=np.int64)
+        slot_of_id[:capacity] = self._slot_of_id
+        self._slot_of_id = slot_of_id
+
+    def _release(self, point_id: int):
+        """Detach an id from its slot; a slot left without ids leaves the graph"""
+        slot = int(self._slot_of_id[point_id])
+        if slot < 0:
+            return
+        members = self._members[slot]
+        members.pop(bisect.bisect_left(members, point_id))
+        if not members:
+            self._index.mark_deleted(slot)
+            del self._slot_of_digest[self._slot_digests[slot]]
+            self._live_slots -= 1
+
+    def set(self, start_id: int, vectors: np.ndarray, keep_originals: bool = True):
+        """Insert (or overwrite) vectors at ids start_id..; only new distinct vectors become graph nodes"""
+        if not len(vectors):
+            return
+        vectors = normalize_rows(vectors)
+        with self._lock:
+            end = start_id + len(vectors)
+            self._reserve(end)
+            new_rows, new_slots = [], []
+            for row, vector in enumerate(vectors):
+                point_id = start_id + row
+                digest = hashlib.blake2b(vector.tobytes(), digest_size=16).digest()
+                slot = self._slot_of_digest.get(digest)
+                if slot is not None and slot == self._slot_of_id[point_id]:
+                    continue
+                self._release(point_id)
+                if slot is None:
+                    slot = len(self._members)
+                    self._members.append([])
+                    self._slot_digests.append(digest)
+                    self._slot_of_digest[digest] = slot
+                    self._live_slots += 1
+                    new_rows.append(row)
+                    new_slots.append(slot)
+                bisect.insort(self._members[slot], point_id)
+                self._slot_of_id[point_id] = slot
+            if new_rows:
+                capacity = self._index.get_max_elements()
+                if len(self._members) > capacity:
+                    self._index.resize_index(max(len(self._members), capacity * 2))
+                self._index.add_items(vectors[new_rows], np.array(new_slots), num_threads=self.num_threads)
+            self.count = max(self.count, end)
+
+    def search(self, query_vectors: np.ndarray, top_k: int) -> List[List[Tuple[int, float]]]:
+        """Approximate top-k (id, cosine score) per query, best first"""
+        queries = normalize_rows(np.atleast_2d(query_vectors))
+        with self._lock:
+            if self._live_slots == 0 or top_k <= 0:
+                return [[] for _ in queries]
+            # Every slot holds at least one id, so top_k slots always cover top_k ids
+            k = min(top_k, self._live_slots)
+            self._set_ef(max(self.ef_search, k))
+            try:
+                slots, distances = self._index.knn_query(queries, k=k, num_threads=1 if len(queries) == 1 else -1)
+            except RuntimeError:
+                # The graph walk found fewer than k nodes: widen it to the whole graph
+                self._set_ef(len(self._members))
+                slots, distances = self._index.knn_query(queries, k=k)
+            results = []
+            for row_slots, row_distances in zip(slots, distances):
+                hits = []
+                for slot, distance in zip(row_slots, row_distances):
+                    score = float(1.0 - distance)
+                    hits.extend((point_id, score) for point_id in self._members[slot][:top_k - len(hits)])
+                    if len(hits) >= top_k:
+                        break
+                results.append(hits)
+            return results
+
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            slots = self._slot_of_id[ids]
+            vectors = np.zeros((len(ids), self.dim), dtype=np.float32)
+            live = slots >= 0
+            if live.any():
+                vectors[live] = np.asarray(self._index.get_items(slots[live]), dtype=np.float32)
+            return vectors
+
+    def memory_bytes(self) -> int:
+        """Serialized graph size (which mirrors its in-memory layout) plus the id/slot maps"""
+        with self._lock:
+            return int(self._index.index_file_size()) + self._slot_of_id.nbytes + 8 * self.count
+
+    def params(self) -> Dict[str, Any]:
+        return {"m": self.m, "ef_construction": self.ef_construction}
+
+    def query_params(self) -> Dict[str, Any]:
+        return {"ef_search": self.ef_search}
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["distinct_vectors"] = self._live_slots
+        return stats
+
+    def _save_files(self, directory: str):
+        self._index.save_index(os.path.join(directory, self.GRAPH_FILE))
+        digests = np.frombuffer(b"".join(self._slot_digests), dtype=np.uint8).reshape(-1, 16)
+        np.savez(os.path.join(directory, self.SLOTS_FILE), slot_of_id=self._slot_of_id[:self.count], digests=digests)
+
+    def _load_files(self, directory: str, meta: Dict[str, Any]):
+        with np.load(os.path.join(directory, self.SLOTS_FILE)) as slots:
+            slot_of_id = slots["slot_of_id"]
+            digests = [bytes(digest) for digest in slots["digests"]]
+        index = self._hnswlib.Index(space="cosine", dim=self.dim)
+        index.load_index(os.path.join(directory, self.GRAPH_FILE), max_elements=max(len(digests), 1024))
+        ids = np.flatnonzero(slot_of_id >= 0)
+        ids = ids[np.argsort(slot_of_id[ids], kind="stable")]
+        bounds = np.searchsorted(slot_of_id[ids], np.arange(len(digests) + 1))
+        members = [ids[bounds[slot]:bounds[slot + 1]].tolist() for slot in range(len(digests))]
+        self._index = index
+        self._ef = None
+        self._slot_of_id = slot_of_id
+        self._members = members
+        self._slot_digests = digests
+        self._slot_of_digest = {digest: slot for slot, digest in enumerate(digests) if members[slot]}
+        self._live_slots = len(self._slot_of_digest)
+        self.count = meta["count"]
@@ -0,0 +1,116 @@
+import os
+import json
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+class VectorIndex(ABC):
+    """Search structure behind MathKnowledgeBase: integer ids to vectors, top-k cosine search
+
+    Backends write vectors at explicit ids (incremental inserts and
+    overwrites), answer batched top-k queries with (id, cosine score) pairs
+    best first, and persist to a directory: index.json holds the backend
+    name, its parameters and caller metadata next to backend-specific files.
+    Backends guard their state with an RLock in self._lock.
+    """
+    storage = ""
+    META_FILE = "index.json"
+    # Rows per insert when streaming a snapshot in
+    chunk_size = 16384
+    # Building from vectors is slow enough to keep the built index next to a snapshot
+    cache_builds = False
+
+    @abstractmethod
+    def set(self, start_id: int, vectors: np.ndarray, keep_originals: bool = True):
+        """Write vectors at ids start_id.., growing the index past its end"""
+
+    @abstractmethod
+    def search(self, query_vectors: np.ndarray, top_k: int) -> List[List[Tuple[int, float]]]:
+        """Top-k (id, cosine score) per query, best first"""
+
+    @abstractmethod
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        """Normalized vectors stored at ids (zeros for unused ids), to rebuild an index from its rows"""
+
+    @abstractmethod
+    def memory_bytes(self) -> int:
+        """Resident bytes of the search structure"""
+
+    def params(self) -> Dict[str, Any]:
+        """Build parameters a persisted index must match to be reused"""
+        return {}
+
+    def query_params(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self):
+        """Release resources held outside this process"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "storage": self.storage,
+            "points": self.count,
+            **self.params(),
+            **self.query_params(),
+            "memory_bytes": self.memory_bytes()
+        }
+
+    @abstractmethod
+    def _save_files(self, directory: str):
+        """Write the backend-specific files of save()"""
+
+    @abstractmethod
+    def _load_files(self, directory: str, meta: Dict[str, Any]):
+        """Replace the contents from the files written by _save_files()"""
+
+    def save(self, directory: str, meta: Optional[Dict[str, Any]] = None):
+        """Write the index; index.json goes last so a partial save is never loaded"""
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, self.META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        with self._lock:
+            self._save_files(directory)
+            header = {"storage": self.storage, "params": self.params(), "count": self.count, **(meta or {})}
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @classmethod
+    def read_meta(cls, directory: str) -> Optional[Dict[str, Any]]:
+        """index.json of a saved index, or None if missing/corrupt"""
+        try:
+            with open(os.path.join(directory, cls.META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, directory: str) -> Optional[Dict[str, Any]]:
+        """Replace the contents with a saved index built with the same backend and parameters
+
+        Returns the saved metadata, or None when there is nothing compatible to load.
+        """
+        meta = self.read_meta(directory)
+        if not meta or meta.get("storage") != self.storage or meta.get("params") != self.params():
+            return None
+        with self._lock:
+            self._load_files(directory, meta)
+        return meta
+
+def create_index(storage: str, options: Dict[str, Any]) -> VectorIndex:
+    """Index backend by storage name: float32 (exact scan), int8, sparse or hnsw
+
+    options holds rescore_factor (int8) and m / ef_construction / ef_search
+    (hnsw). The backends subclass VectorIndex, so they are imported here.
+    """
+    from app.knowledge_base.encoder import SimpleEncoder
+    from app.knowledge_base.quantized import QuantizedVectorStore
+    from app.knowledge_base.sparse_index import SparseFeatureIndex
+    from app.knowledge_base.hnsw_index import HNSWIndex
+    encoder = SimpleEncoder()
+    if storage == "sparse":
+        return SparseFeatureIndex(encoder)
+    if storage == "hnsw":
+        return HNSWIndex(encoder.vector_size, m=options.get("m", 16), ef_construction=options.get("ef_construction", 200),
+                         ef_search=options.get("ef_search", 64))
+    return QuantizedVectorStore(encoder.vector_size, storage, rescore_factor=options.get("rescore_factor", 4))
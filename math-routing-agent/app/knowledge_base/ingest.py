@@ -0,0 +1,273 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import argparse
+from typing import Iterator, List, Dict, Any, Optional
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.snapshot import KBSnapshot, KBSnapshotWriter
+from app.guardrails.ai_gateway import GuardrailEngine
+
+def _text(value: Any, field: str) -> str:
+    """A string field; numbers are accepted as their text, anything else is malformed"""
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string, got {type(value).__name__}")
+    return value
+
+def _steps(value: Any) -> List[str]:
+    """Solution steps: a list of strings, or one string taken as a single step"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if not isinstance(value, list):
+        raise ValueError(f"steps must be a list of strings, got {type(value).__name__}")
+    return [_text(step, "step") for step in value]
+
+def _topic(value: Any) -> str:
+    if value is None:
+        return "general"
+    if not isinstance(value, str):
+        raise ValueError(f"topic must be a string, got {type(value).__name__}")
+    return value.strip().lower() or "general"
+
+def normalize_row(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert a raw question-bank row into the knowledge base payload shape
+
+    Returns None for a row without a question; raises ValueError for a
+    malformed row (not an object, or fields of the wrong type).
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"Row must be an object, got {type(row).__name__}")
+    question = _text(row.get("question"), "question").strip()
+    if not question:
+        return None
+
+    solution = row.get("solution")
+    if isinstance(solution, str):
+        try:
+            solution = json.loads(solution)
+        except ValueError:
+            solution = None
+    if not isinstance(solution, dict):
+        steps = row.get("steps")
+        if isinstance(steps, str):
+            # Flat rows (CSV) separate steps with "|"
+            steps = [step.strip() for step in steps.split("|") if step.strip()]
+        solution = {"steps": steps, "final_answer": row.get("final_answer")}
+
+    return {
+        "question": question,
+        "solution": {
+            "steps": _steps(solution.get("steps")),
+            "final_answer": _text(solution.get("final_answer"), "final_answer")
+        },
+        "topic": _topic(row.get("topic"))
+    }
+
+def iter_question_rows(path: str) -> Iterator[Optional[Dict[str, Any]]]:
+    """Stream normalized rows from a JSONL or CSV question bank
+
+    Yields None for rows that cannot be used (malformed JSON or fields) so
+    callers can keep an exact row count for checkpointing.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    yield normalize_row(row)
+                except ValueError:
+                    yield None
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield normalize_row(json.loads(line))
+                except ValueError:
+                    yield None
+
+class BulkIngester:
+    """Streaming, checkpointed ingestion of large question banks
+
+    Rows are read through a generator, encoded in fixed-size batches and
+    written chunk by chunk to a MathKnowledgeBase and/or a snapshot, so
+    memory stays bounded by batch_size regardless of input size. On resume,
+    rows committed before the checkpoint are re-added to a knowledge base
+    that does not hold them (the KB lives in memory; the snapshot is on disk).
+    """
+    def __init__(self, knowledge_base=None, snapshot_dir: Optional[str] = None, batch_size: int = 1024,
+                 checkpoint_path: Optional[str] = None, progress_every: int = 100000, validate: bool = False):
+        if knowledge_base is None and snapshot_dir is None:
+            raise ValueError("BulkIngester needs a knowledge base or a snapshot directory")
+        self.knowledge_base = knowledge_base
+        self.snapshot_dir = snapshot_dir
+        self.encoder = knowledge_base.encoder if knowledge_base else SimpleEncoder()
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.progress_every = progress_every
+        # Optionally drop rows that fail the input guardrails (non-math or private data)
+        self.guardrails = GuardrailEngine() if validate else None
+
+    def _load_checkpoint(self, source: str) -> Dict[str, Any]:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("source") == source:
+                return checkpoint
+        return {"source": source, "rows_done": 0, "ingested": 0, "skipped": 0, "payload_bytes": 0, "start_id": None}
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def ingest(self, path: str) -> Dict[str, Any]:
+        """Ingest a JSONL/CSV question bank, resuming from the checkpoint if present"""
+        source = os.path.abspath(path)
+        checkpoint = self._load_checkpoint(source)
+        if checkpoint["start_id"] is None:
+            checkpoint["start_id"] = self.knowledge_base.next_id if self.knowledge_base else 0
+        resume_from = checkpoint["rows_done"]
+        replay = bool(self.knowledge_base and resume_from
+                      and self.knowledge_base.next_id < checkpoint["start_id"] + checkpoint["ingested"])
+        if replay:
+            # A fresh KB: committed rows are re-added first, under ids following its current points
+            checkpoint["start_id"] = self.knowledge_base.next_id
+        if resume_from:
+            print(f"Resuming {path} from row {resume_from}" + (" (replaying committed rows into the KB)" if replay else ""))
+
+        writer = None
+        if self.snapshot_dir:
+            writer = KBSnapshotWriter(self.snapshot_dir, self.encoder.VERSION, self.encoder.vector_size,
+                                      resume_rows=checkpoint["ingested"],
+                                      resume_payload_bytes=checkpoint["payload_bytes"])
+
+        digest = hashlib.sha256()
+        batch: List[Dict[str, Any]] = []
+        committed: List[Dict[str, Any]] = []
+        replayed = 0
+        rows_seen = 0
+        start = time.perf_counter()
+        last_report = resume_from
+
+        def accepted(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            if not self.guardrails:
+                return items
+            results = self.guardrails.validate_batch([item["question"] for item in items])
+            return [item for item, result in zip(items, results) if result["is_valid"]]
+
+        def flush_committed():
+            # Rows ingested before the restart feed the hash, and the KB if it lost them
+            nonlocal replayed
+            items = accepted(committed)
+            for item in items:
+                KBSnapshot.update_hash(digest, item)
+            if replay and items:
+                vectors = self.encoder.encode_batch([item["question"] for item in items])
+                self.knowledge_base.upsert_vectors(vectors, items, start_id=checkpoint["start_id"] + replayed,
+                                                   batch_size=self.batch_size)
+                replayed += len(items)
+            committed.clear()
+
+        def flush_batch():
+            valid = accepted(batch)
+            checkpoint["skipped"] += len(batch) - len(valid)
+            batch[:] = valid
+            # The snapshot hash covers exactly the rows it holds
+            for item in batch:
+                KBSnapshot.update_hash(digest, item)
+            vectors = self.encoder.encode_batch([item["question"] for item in batch])
+            if self.knowledge_base:
+                self.knowledge_base.upsert_vectors(vectors, batch, start_id=checkpoint["start_id"] + checkpoint["ingested"],
+                                                   batch_size=self.batch_size)
+            if writer:
+                writer.append(vectors, batch)
+                writer.flush()
+                checkpoint["payload_bytes"] = writer.payload_bytes
+            checkpoint["ingested"] += len(batch)
+            checkpoint["rows_done"] = rows_seen
+            self._save_checkpoint(checkpoint)
+            batch.clear()
+
+        try:
+            for item in iter_question_rows(path):
+                rows_seen += 1
+                if rows_seen <= resume_from:
+                    if item is not None:
+                        committed.append(item)
+                        if len(committed) >= self.batch_size:
+                            flush_committed()
+                    if rows_seen == resume_from:
+                        flush_committed()
+                    continue
+                if item is None:
+                    checkpoint["skipped"] += 1
+                    continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    flush_batch()
+                    if rows_seen - last_report >= self.progress_every:
+                        elapsed = time.perf_counter() - start
+                        print(f"📥 {rows_seen} rows processed ({(rows_seen - resume_from) / elapsed:,.0f} rows/sec)")
+                        last_report = rows_seen
+            if committed:
+                flush_committed()
+            if batch:
+                flush_batch()
+            checkpoint["rows_done"] = rows_seen
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+
+        if writer:
+            writer.close(digest.hexdigest())
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        elapsed = time.perf_counter() - start
+        processed = rows_seen - resume_from
+        stats = {
+            "source": path,
+            "rows": rows_seen,
+            "ingested": checkpoint["ingested"],
+            "skipped": checkpoint["skipped"],
+            "resumed_from_row": resume_from,
+            "replayed": replayed,
+            "seconds": elapsed,
+            "rows_per_sec": processed / elapsed if elapsed > 0 else 0.0
+        }
+        print(f"✅ Ingested {stats['ingested']} questions from {path} ({stats['rows_per_sec']:,.0f} rows/sec)")
+        return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a JSONL/CSV question bank into a knowledge base snapshot")
+    parser.add_argument("path", help="Question bank (.jsonl or .csv)")
+    parser.add_argument("--snapshot-dir", required=True, help="Output snapshot directory (load via KB_BANK_SNAPSHOT_DIR)")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <snapshot-dir>/ingest.checkpoint)")
+    parser.add_argument("--progress-every", type=int, default=100000)
+    parser.add_argument("--validate", action="store_true", help="Skip rows rejected by the input guardrails")
+    args = parser.parse_args()
+
+    ingester = BulkIngester(
+        snapshot_dir=args.snapshot_dir,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint or os.path.join(args.snapshot_dir, "ingest.checkpoint"),
+        progress_every=args.progress_every,
+        validate=args.validate
+    )
+    ingester.ingest(args.path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import os
+import threading
+import multiprocessing
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.index import VectorIndex, create_index
+from app.knowledge_base.quantized import normalize_rows
+
+def _set_rows(index: VectorIndex, local_ids: np.ndarray, vectors: np.ndarray):
+    """Write vectors at scattered local ids, one set() per run of consecutive ids"""
+    order = np.argsort(local_ids, kind="stable")
+    local_ids, vectors = local_ids[order], vectors[order]
+    breaks = np.flatnonzero(np.diff(local_ids) != 1) + 1
+    for run_ids, run_vectors in zip(np.split(local_ids, breaks), np.split(vectors, breaks)):
+        index.set(int(run_ids[0]), run_vectors)
+
+def _rebuilt(index: VectorIndex, storage: str, options: Dict[str, Any], live: np.ndarray) -> VectorIndex:
+    """A fresh index holding index's rows at local ids live, renumbered from 0"""
+    fresh = create_index(storage, options)
+    for start in range(0, len(live), fresh.chunk_size):
+        fresh.set(start, index.get(live[start:start + fresh.chunk_size]))
+    return fresh
+
+def _serve_partitions(conn, storage: str, options: Dict[str, Any]):
+    """Worker process loop: run (partition key, method, args) calls against the partitions it owns"""
+    indexes: Dict[str, VectorIndex] = {}
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        name, method, args = message
+        try:
+            if method == "discard":
+                conn.send((True, indexes.pop(name, None) is not None))
+                continue
+            if name not in indexes:
+                indexes[name] = create_index(storage, options)
+            if method == "set_rows":
+                conn.send((True, _set_rows(indexes[name], *args)))
+            elif method == "compact":
+                indexes[name] = _rebuilt(indexes[name], storage, options, *args)
+                conn.send((True, None))
+            else:
+                conn.send((True, getattr(indexes[name], method)(*args)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+    conn.close()
+
+class PartitionWorker:
+    """A worker process holding some of the partitions; one call in flight at a time"""
+    def __init__(self, context, storage: str, options: Dict[str, Any]):
+        self._conn, child = context.Pipe()
+        self.process = context.Process(target=_serve_partitions, args=(child, storage, options), daemon=True)
+        self.process.start()
+        child.close()
+
+    def submit(self, name: str, method: str, *args):
+        self._conn.send((name, method, args))
+
+    def result(self) -> Any:
+        ok, value = self._conn.recv()
+        if not ok:
+            raise RuntimeError(f"Partition worker failed: {value}")
+        return value
+
+    def call(self, name: str, method: str, *args) -> Any:
+        self.submit(name, method, *args)
+        return self.result()
+
+    def close(self):
+        try:
+            self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        self._conn.close()
+
+class PartitionedIndex(VectorIndex):
+    """Per-topic sub-indexes with queries routed by their SimpleEncoder topic features
+
+    A point goes to the partition of its strongest topic feature (ties to
+    the first topic), or to "general" when it has none. A query searches
+    the partition of its strongest topic when that topic holds at least
+    route_confidence of its topic mass, the two strongest when together
+    they do, and every partition otherwise (no topic words, or spread over
+    three or more topics). Routed searches are approximate: a neighbour
+    stored under another topic is missed.
+
+    With workers > 0 the partitions live in that many worker processes
+    (round-robin) and a query's partitions are searched in parallel.
+    Partitions hold copies of their rows, so keep_originals is ignored.
+
+    A point that moves to another partition leaves a dead row behind, which
+    searches over-fetch to skip. Once a partition's dead rows exceed
+    compact_min_dead and compact_ratio of its live rows, it is rebuilt from
+    its live rows.
+    """
+    GENERAL = "general"
+    MAPS_FILE = "partitions.npz"
+
+    def __init__(self, encoder: SimpleEncoder, storage: str, options: Optional[Dict[str, Any]] = None,
+                 route_confidence: float = 0.6, workers: int = 0, compact_ratio: float = 0.25,
+                 compact_min_dead: int = 1024):
+        self.backend = storage
+        self.storage = f"partitioned-{storage}"
+        self.options = dict(options or {})
+        self.route_confidence = route_confidence
+        self.compact_ratio = compact_ratio
+        self.compact_min_dead = compact_min_dead
+        self.compactions = 0
+        self.dim = encoder.vector_size
+        self.topic_offset = encoder.TOPIC_OFFSET
+        self.names = list(encoder.MATH_TOPICS) + [self.GENERAL]
+        self.count = 0
+        # Global id -> (partition, local id); partition -1 marks an unused id
+        self._partition_of = np.zeros(0, dtype=np.int8)
+        self._local_id = np.zeros(0, dtype=np.int64)
+        # Per partition: local id -> global id (-1 once the point moved to another partition)
+        self._global_ids = [np.zeros(0, dtype=np.int64) for _ in self.names]
+        self._sizes = [0] * len(self.names)
+        self._dead = [0] * len(self.names)
+        self._routed = {"single": 0, "pair": 0, "global": 0}
+        # Bumped by load(), which fills a fresh set of partitions before switching to it
+        self._generation = 0
+        self._lock = threading.RLock()
+
+        probe = create_index(storage, self.options)
+        self.cache_builds = probe.cache_builds
+        self._workers: List[PartitionWorker] = []
+        if workers > 0:
+            context = multiprocessing.get_context("spawn")
+            self._workers = [PartitionWorker(context, storage, self.options) for _ in range(min(workers, len(self.names)))]
+            self._local: List[Optional[VectorIndex]] = [None] * len(self.names)
+        else:
+            self._local = [probe] + [create_index(storage, self.options) for _ in self.names[1:]]
+
+    def _worker(self, partition: int) -> PartitionWorker:
+        return self._workers[partition % len(self._workers)]
+
+    def _key(self, partition: int, generation: Optional[int] = None) -> str:
+        return f"{self.names[partition]}:{self._generation if generation is None else generation}"
+
+    def _call(self, partition: int, method: str, *args) -> Any:
+        if self._workers:
+            return self._worker(partition).call(self._key(partition), method, *args)
+        if method == "set_rows":
+            return _set_rows(self._local[partition], *args)
+        if method == "compact":
+            self._local[partition] = _rebuilt(self._local[partition], self.backend, self.options, *args)
+            return None
+        return getattr(self._local[partition], method)(*args)
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Partition of each vector: its strongest topic, or general without topic features"""
+        topics = vectors[:, self.topic_offset:self.topic_offset + len(self.names) - 1]
+        return np.where(topics.max(axis=1) > 0, topics.argmax(axis=1), len(self.names) - 1)
+
+    def route(self, query: np.ndarray) -> List[int]:
+        """Partitions to search for one query"""
+        topics = query[self.topic_offset:self.topic_offset + len(self.names) - 1]
+        total = float(topics.sum())
+        if total > 0:
+            order = np.argsort(-topics, kind="stable")
+            if topics[order[0]] >= self.route_confidence * total:
+                self._routed["single"] += 1
+                return [int(order[0])]
+            if topics[order[0]] + topics[order[1]] >= self.route_confidence * total:
+                self._routed["pair"] += 1
+                return [int(order[0]), int(order[1])]
+        self._routed["global"] += 1
+        return list(range(len(self.names)))
+
+    def _reserve(self, size: int):
+        capacity = len(self._partition_of)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        partition_of = np.full(capacity, -1, dtype=np.int8)
+        partition_of[:self.count] = self._partition_of[:self.count]
+        local_id = np.zeros(capacity, dtype=np.int64)
+        local_id[:self.count] = self._local_id[:self.count]
+        self._partition_of, self._local_id = partition_of, local_id
+
+    def _append_global_ids(self, partition: int, ids: np.ndarray):
+        size = self._sizes[partition] + len(ids)
+        global_ids = self._global_ids[partition]
+        if size > len(global_ids):
+            grown = np.full(max(size, len(global_ids) * 2, 1024), -1, dtype=np.int64)
+            grown[:len(global_ids)] = global_ids
+            self._global_ids[partition] = global_ids = grown
+        global_ids[self._sizes[partition]:size] = ids
+        self._sizes[partition] = size
+
+    def set(self, start_id: int, vectors: np.ndarray, keep_originals: bool = True):
+        """Write vectors at ids start_id.. into their topic partitions"""
+        if not len(vectors):
+            return
+        vectors = normalize_rows(vectors)
+        partitions = self.assign(vectors)
+        ids = np.arange(start_id, start_id + len(vectors))
+        with self._lock:
+            self._reserve(ids[-1] + 1)
+            previous = self._partition_of[ids]
+            for partition in np.unique(partitions):
+                rows = np.flatnonzero(partitions == partition)
+                stays = previous[rows] == partition
+                # Overwrites within the same partition keep their local ids: one call for all of them
+                if stays.any():
+                    self._call(partition, "set_rows", self._local_id[ids[rows[stays]]], vectors[rows[stays]])
+                moved = rows[~stays]
+                if not len(moved):
+                    continue
+                for old_partition in np.unique(previous[moved]):
+                    if old_partition >= 0:
+                        stale = self._local_id[ids[moved[previous[moved] == old_partition]]]
+                        self._global_ids[old_partition][stale] = -1
+                        self._dead[old_partition] += len(stale)
+                start = self._sizes[partition]
+                self._call(partition, "set", start, vectors[moved])
+                self._append_global_ids(partition, ids[moved])
+                self._partition_of[ids[moved]] = partition
+                self._local_id[ids[moved]] = start + np.arange(len(moved))
+            self.count = max(self.count, int(ids[-1]) + 1)
+            for partition in np.unique(previous[previous >= 0]):
+                live = self._sizes[partition] - self._dead[partition]
+                if self._dead[partition] > max(self.compact_min_dead, self.compact_ratio * live):
+                    self._compact(int(partition))
+
+    def _compact(self, partition: int):
+        """Rebuild a partition from its live rows so searches stop over-fetching past dead ones"""
+        global_ids = self._global_ids[partition][:self._sizes[partition]]
+        live = np.flatnonzero(global_ids >= 0)
+        self._call(partition, "compact", live)
+        kept = global_ids[live]
+        self._global_ids[partition] = kept.copy()
+        self._local_id[kept] = np.arange(len(kept))
+        self._sizes[partition] = len(kept)
+        self._dead[partition] = 0
+        self.compactions += 1
+
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.zeros((len(ids), self.dim), dtype=np.float32)
+        with self._lock:
+            partitions = np.full(len(ids), -1)
+            known = ids < self.count
+            partitions[known] = self._partition_of[ids[known]]
+            for partition in np.unique(partitions[partitions >= 0]):
+                rows = partitions == partition
+                vectors[rows] = self._call(int(partition), "get", self._local_id[ids[rows]])
+        return vectors
+
+    def search(self, query_vectors: np.ndarray, top_k: int) -> List[List[Tuple[int, float]]]:
+        """Top-k (id, cosine score) per query over its routed partitions, best first"""
+        queries = normalize_rows(np.atleast_2d(query_vectors))
+        with self._lock:
+            if self.count == 0 or top_k <= 0:
+                return [[] for _ in queries]
+            # Batch the queries per partition so each sub-index is searched once
+            routed: Dict[int, List[int]] = {}
+            for i, query in enumerate(queries):
+                for partition in self.route(query):
+                    if self._sizes[partition] > self._dead[partition]:
+                        routed.setdefault(partition, []).append(i)
+
+            found: Dict[int, List[List[Tuple[int, float]]]] = {}
+            if self._workers:
+                # One round per worker: send a search to every worker, then collect, so workers run in parallel
+                pending = dict(routed)
+                while pending:
+                    batch = {}
+                    for partition in list(pending):
+                        worker = self._worker(partition)
+                        if worker not in batch.values():
+                            worker.submit(self._key(partition), "search", queries[pending[partition]],
+                                          top_k + self._dead[partition])
+                            batch[partition] = worker
+                            del pending[partition]
+                    for partition, worker in batch.items():
+                        found[partition] = worker.result()
+            else:
+                for partition, rows in routed.items():
+                    found[partition] = self._local[partition].search(queries[rows], top_k + self._dead[partition])
+
+            merged: List[List[Tuple[int, float]]] = [[] for _ in queries]
+            for partition, rows in routed.items():
+                global_ids = self._global_ids[partition]
+                for i, hits in zip(rows, found[partition]):
+                    merged[i].extend((int(global_ids[local]), score) for local, score in hits if global_ids[local] >= 0)
+        return [sorted(hits, key=lambda hit: (-hit[1], hit[0]))[:top_k] for hits in merged]
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            resident = self._partition_of[:self.count].nbytes + self._local_id[:self.count].nbytes
+            resident += sum(global_ids.nbytes for global_ids in self._global_ids)
+            return resident + sum(self._call(partition, "memory_bytes") for partition in range(len(self.names)))
+
+    def params(self) -> Dict[str, Any]:
+        return {"partitions": self.names, "backend": self._call(0, "params")}
+
+    def query_params(self) -> Dict[str, Any]:
+        return {"route_confidence": self.route_confidence, "workers": len(self._workers)}
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            stats["partition_points"] = {
+                name: self._sizes[partition] - self._dead[partition] for partition, name in enumerate(self.names)
+            }
+            stats["partition_dead"] = {name: self._dead[partition] for partition, name in enumerate(self.names)}
+            stats["compactions"] = self.compactions
+            stats["routed_queries"] = dict(self._routed)
+        return stats
+
+    def _save_files(self, directory: str):
+        np.savez(os.path.join(directory, self.MAPS_FILE), partition_of=self._partition_of[:self.count],
+                 local_id=self._local_id[:self.count], dead=np.array(self._dead),
+                 **{f"global_ids_{partition}": self._global_ids[partition][:self._sizes[partition]]
+                    for partition in range(len(self.names))})
+        for partition, name in enumerate(self.names):
+            self._call(partition, "save", os.path.join(directory, name))
+
+    def _load_files(self, directory: str, meta: Dict[str, Any]):
+        with np.load(os.path.join(directory, self.MAPS_FILE)) as maps:
+            partition_of = maps["partition_of"]
+            local_id = maps["local_id"]
+            dead = [int(dead) for dead in maps["dead"]]
+            global_ids = [maps[f"global_ids_{partition}"] for partition in range(len(self.names))]
+        # Load into a fresh generation so a failure part-way leaves the current partitions intact
+        generation = self._generation + 1
+        loaded = []
+        try:
+            for partition, name in enumerate(self.names):
+                path = os.path.join(directory, name)
+                if self._workers:
+                    partition_meta = self._worker(partition).call(self._key(partition, generation), "load", path)
+                else:
+                    loaded.append(create_index(self.backend, self.options))
+                    partition_meta = loaded[-1].load(path)
+                if not partition_meta:
+                    raise ValueError(f"Partition {name} missing from {directory} or built with other parameters")
+        except Exception:
+            self._discard(generation)
+            raise
+        self._discard(self._generation)
+        self._generation = generation
+        if not self._workers:
+            self._local = loaded
+        self._partition_of, self._local_id, self._dead, self._global_ids = partition_of, local_id, dead, global_ids
+        self._sizes = [len(ids) for ids in global_ids]
+        self.count = len(partition_of)
+
+    def _discard(self, generation: int):
+        """Drop a generation's partitions from the workers"""
+        if not self._workers:
+            return
+        for partition in range(len(self.names)):
+            self._worker(partition).call(self._key(partition, generation), "discard")
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
@@ -0,0 +1,192 @@
+import os
+import json
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.guardrails.ai_gateway import AIGateway, MATH_PATTERN, find_private_data
+from app.agents.fast_solver import answer_key, matches_answer
+
+class FeedbackPromoter:
+    """Background promotion of feedback-improved solutions into the knowledge base
+
+    A submission must pass the gateway's input guardrails (question) and
+    privacy check (solution), parse into at least two steps with a
+    mathematical final answer, and agree with the exact local solver when
+    that can solve the question; a question the solver cannot check needs
+    min_agreement submissions with the same final answer (votes are kept
+    for the max_pending_questions most recent such questions). Accepted
+    solutions are queued and a worker thread adds them to MathKnowledgeBase
+    in small batches, skipping questions already present, so future
+    traffic for them becomes a KB hit instead of a web/LLM call. Promoted
+    items are appended to a JSONL log and replayed on startup.
+    """
+    def __init__(self, knowledge_base, math_solver, gateway: Optional[AIGateway] = None,
+                 log_path: Optional[str] = None, min_agreement: int = 2, batch_size: int = 64,
+                 max_pending_questions: int = 10000):
+        self.knowledge_base = knowledge_base
+        self.math_solver = math_solver
+        self.gateway = gateway or AIGateway()
+        self.log_path = log_path
+        self.min_agreement = min_agreement
+        self.batch_size = batch_size
+        self.max_pending_questions = max_pending_questions
+        self.submitted = 0
+        self.rejected = 0
+        self.awaiting_agreement = 0
+        self.promoted = 0
+        self.duplicates = 0
+        self.errors = 0
+        # Unverifiable questions, least recently voted first: question key -> final answer key -> agreeing submissions
+        self._votes: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.replayed = self._replay()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._worker_loop, name="feedback-promoter", daemon=True)
+        self._worker.start()
+
+    def _replay(self) -> int:
+        """Re-add the promotions logged by earlier runs"""
+        if not self.log_path or not os.path.exists(self.log_path):
+            return 0
+        items = []
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    continue
+        replayed = self.knowledge_base.add_questions(items) if items else 0
+        if replayed:
+            print(f"✅ Replayed {replayed} promoted questions into the knowledge base")
+        return replayed
+
+    def _persist(self, items: List[Dict[str, Any]]):
+        if not self.log_path or not items:
+            return
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    def check(self, question: str, improved_solution: str) -> Optional[str]:
+        """Reason to reject a submission, "awaiting_agreement" if it needs more votes, or None to promote"""
+        validation = self.gateway.process_input(question)
+        if not validation["is_valid"]:
+            return "question rejected by input guardrails"
+        return self._check_solution(validation["sanitized_query"], improved_solution)
+
+    def _check_solution(self, sanitized_query: str, improved_solution: str) -> Optional[str]:
+        """check() for a question that already passed the input guardrails"""
+        if find_private_data(improved_solution) is not None:
+            return "solution contains private data"
+        steps = self.math_solver._parse_solution_steps(improved_solution)
+        final_answer = self.math_solver._extract_final_answer(steps)
+        if len(steps) < 2 or MATH_PATTERN.search(final_answer) is None:
+            return "solution has no worked steps or mathematical answer"
+        local = self.math_solver.generate_solution_locally(sanitized_query)
+        if local is not None:
+            if not matches_answer(local["final_answer"], final_answer):
+                return "final answer disagrees with the exact solver"
+            return None
+        question_key = " ".join(sanitized_query.split()).lower()
+        with self._lock:
+            votes = self._votes.setdefault(question_key, {})
+            self._votes.move_to_end(question_key)
+            answer = answer_key(final_answer)
+            votes[answer] = votes.get(answer, 0) + 1
+            if votes[answer] < self.min_agreement:
+                while len(self._votes) > self.max_pending_questions:
+                    self._votes.popitem(last=False)
+                return "awaiting_agreement"
+            del self._votes[question_key]
+        return None
+
+    def submit(self, question: str, improved_solution: str) -> bool:
+        """Check an improved solution and queue it for promotion (never blocks on the KB); True if queued"""
+        validation = self.gateway.process_input(question)
+        if validation["is_valid"]:
+            reason = self._check_solution(validation["sanitized_query"], improved_solution)
+        else:
+            reason = "question rejected by input guardrails"
+        with self._lock:
+            self.submitted += 1
+            if reason == "awaiting_agreement":
+                self.awaiting_agreement += 1
+            elif reason is not None:
+                self.rejected += 1
+        if reason is not None:
+            return False
+        self._queue.put((validation["sanitized_query"], improved_solution))
+        return True
+
+    def _infer_topic(self, question: str) -> str:
+        encoder = self.knowledge_base.encoder
+        vector = encoder.encode_batch([question])[0]
+        topic_scores = vector[encoder.TOPIC_OFFSET:encoder.TOPIC_OFFSET + len(encoder.MATH_TOPICS)]
+        if not topic_scores.any():
+            return "general"
+        return list(encoder.MATH_TOPICS)[int(topic_scores.argmax())]
+
+    def _to_item(self, question: str, improved_solution: str) -> Dict[str, Any]:
+        steps = self.math_solver._parse_solution_steps(improved_solution)
+        return {
+            "question": question,
+            "solution": {
+                "steps": steps,
+                "final_answer": self.math_solver._extract_final_answer(steps)
+            },
+            "topic": self._infer_topic(question),
+            "source": "feedback",
+            "promoted_at": datetime.now().isoformat()
+        }
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            try:
+                fresh = [(q, s) for q, s in batch if not self.knowledge_base.has_question(q)]
+                items = [self._to_item(q, s) for q, s in fresh]
+                added = self.knowledge_base.add_questions(items)
+                with self._lock:
+                    self.duplicates += len(batch) - added
+                    self.promoted += added
+                self._persist(items)
+            except Exception as e:
+                with self._lock:
+                    self.errors += len(batch)
+                print(f"Error promoting feedback to knowledge base: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "awaiting_agreement": self.awaiting_agreement,
+                "promoted": self.promoted,
+                "replayed": self.replayed,
+                "duplicates": self.duplicates,
+                "errors": self.errors,
+                "pending": self._queue.qsize(),
+                "pending_votes": len(self._votes)
+            }
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
@@ -0,0 +1,261 @@
+import os
+import json
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from app.knowledge_base.index import VectorIndex
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric int8 scalar quantization with one scale per vector: v ≈ codes * scale"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, dtype=np.float32)
+    safe = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / safe[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows for cosine scoring; zero rows stay zero"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+class PayloadStore:
+    """Point payloads kept outside the search structure, loaded only for returned hits
+
+    Payloads added at runtime stay in memory; payloads of a snapshot stay in
+    its payloads.jsonl and are read by byte offset when a hit is returned.
+    """
+    def __init__(self):
+        self._payloads: Dict[int, Dict[str, Any]] = {}
+        # (first id, jsonl path, per-line byte offsets)
+        self._files: List[Tuple[int, str, np.ndarray]] = []
+        self._lock = threading.Lock()
+
+    def put(self, start_id: int, payloads: List[Dict[str, Any]]):
+        with self._lock:
+            for i, payload in enumerate(payloads):
+                self._payloads[start_id + i] = payload
+
+    def attach_jsonl(self, start_id: int, path: str, offsets: np.ndarray):
+        """Serve ids start_id.. from a JSONL file without loading it"""
+        with self._lock:
+            self._files.append((start_id, path, offsets))
+
+    def get(self, point_id: int) -> Optional[Dict[str, Any]]:
+        payload = self._payloads.get(point_id)
+        if payload is not None:
+            return payload
+        for start_id, path, offsets in reversed(self._files):
+            if start_id <= point_id < start_id + len(offsets):
+                with open(path, 'rb') as f:
+                    f.seek(int(offsets[point_id - start_id]))
+                    return json.loads(f.readline())
+        return None
+
+    def memory_bytes(self) -> int:
+        return sum(offsets.nbytes for _, _, offsets in self._files)
+
+class QuantizedVectorStore(VectorIndex):
+    """Cosine search over compact vectors with full-precision rescoring of the top candidates
+
+    storage="float32" keeps normalized float32 rows and scores them exactly.
+    storage="int8" keeps one int8 code per dimension plus a float32 scale per
+    vector (~4x smaller); the top top_k * rescore_factor candidates by
+    quantized score are then rescored against the full-precision rows.
+    Those rows are only read for the candidates, so rows backed by a
+    snapshot memory map stay on disk.
+
+    Each id's rescoring row lives either in one resident array (rows are
+    slots, reused when an id is overwritten) or in a referenced segment;
+    a segment is dropped once every id in it has been overwritten.
+    """
+    # _origin value of ids without a rescoring row
+    NO_ORIGIN = np.iinfo(np.int64).min
+    STORAGE_TYPES = ("float32", "int8")
+    CODES_FILE = "codes.npy"
+    SCALES_FILE = "scales.npy"
+    ORIGINALS_FILE = "originals.f32"
+
+    def __init__(self, dim: int, storage: str = "int8", rescore_factor: int = 4, chunk_size: int = 16384):
+        if storage not in self.STORAGE_TYPES:
+            raise ValueError(f"Unknown vector storage {storage!r}, expected one of {self.STORAGE_TYPES}")
+        self.dim = dim
+        self.storage = storage
+        self.rescore_factor = rescore_factor
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._codes = np.zeros((0, dim), dtype=np.int8 if storage == "int8" else np.float32)
+        self._scales = np.zeros(0, dtype=np.float32)
+        # Full-precision rows for rescoring. Per id: slot >= 0 in _resident, or -(key + 1) of a referenced segment
+        self._origin = np.zeros(0, dtype=np.int64)
+        self._resident = np.zeros((0, dim), dtype=np.float32)
+        self._resident_count = 0
+        self._free_slots: List[int] = []
+        # Segment key -> [first id, rows, ids still served by it]
+        self._segments: Dict[int, list] = {}
+        self._next_segment = 0
+        self._lock = threading.RLock()
+
+    def _reserve(self, size: int):
+        capacity = len(self._codes)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        codes = np.zeros((capacity, self.dim), dtype=self._codes.dtype)
+        codes[:self.count] = self._codes[:self.count]
+        scales = np.zeros(capacity, dtype=np.float32)
+        scales[:self.count] = self._scales[:self.count]
+        self._codes, self._scales = codes, scales
+        if self.storage == "int8":
+            origin = np.full(capacity, self.NO_ORIGIN, dtype=np.int64)
+            origin[:self.count] = self._origin[:self.count]
+            self._origin = origin
+
+    def _allocate_slots(self, size: int) -> np.ndarray:
+        """Resident slots for size new rows, reusing freed ones first"""
+        reused = [self._free_slots.pop() for _ in range(min(size, len(self._free_slots)))]
+        fresh = size - len(reused)
+        end = self._resident_count + fresh
+        if end > len(self._resident):
+            resident = np.zeros((max(end, len(self._resident) * 2, 1024), self.dim), dtype=np.float32)
+            resident[:self._resident_count] = self._resident[:self._resident_count]
+            self._resident = resident
+        slots = np.concatenate([np.array(reused, dtype=np.int64), np.arange(self._resident_count, end)])
+        self._resident_count = end
+        return slots
+
+    def _release_segments(self, origin: np.ndarray):
+        """Stop serving ids from their referenced segments, dropping segments left unused"""
+        keys, counts = np.unique(-(origin[(origin < 0) & (origin != self.NO_ORIGIN)] + 1), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            segment = self._segments[key]
+            segment[2] -= count
+            if segment[2] <= 0:
+                del self._segments[key]
+
+    def set(self, start_id: int, vectors: np.ndarray, keep_originals: bool = True):
+        """Write vectors at ids start_id..; rows past the end grow the store
+
+        With keep_originals=False the caller's array (e.g. a snapshot memory
+        map) is referenced for rescoring instead of copied.
+        """
+        if not len(vectors):
+            return
+        normalized = normalize_rows(vectors)
+        with self._lock:
+            end = start_id + len(normalized)
+            self._reserve(end)
+            if self.storage == "int8":
+                codes, scales = quantize_int8(normalized)
+                self._codes[start_id:end] = codes
+                self._scales[start_id:end] = scales
+                previous = self._origin[start_id:end].copy()
+                self._release_segments(previous)
+                owned = previous >= 0
+                if keep_originals:
+                    # Overwritten resident rows are rewritten in their slot
+                    slots = previous.copy()
+                    slots[~owned] = self._allocate_slots(int((~owned).sum()))
+                    self._resident[slots] = normalized
+                    self._origin[start_id:end] = slots
+                else:
+                    self._free_slots.extend(previous[owned].tolist())
+                    key = self._next_segment
+                    self._next_segment += 1
+                    self._segments[key] = [start_id, vectors, len(vectors)]
+                    self._origin[start_id:end] = -(key + 1)
+            else:
+                self._codes[start_id:end] = normalized
+                self._scales[start_id:end] = 1.0
+            self.count = max(self.count, end)
+
+    def _original_rows(self, ids: np.ndarray) -> np.ndarray:
+        """Normalized full-precision rows for ids"""
+        rows = np.zeros((len(ids), self.dim), dtype=np.float32)
+        origin = self._origin[ids]
+        resident = origin >= 0
+        rows[resident] = self._resident[origin[resident]]
+        referenced = ~resident & (origin != self.NO_ORIGIN)
+        for key in np.unique(-(origin[referenced] + 1)).tolist():
+            start_id, segment, _ = self._segments[key]
+            mask = origin == -(key + 1)
+            rows[mask] = np.asarray(segment[ids[mask] - start_id], dtype=np.float32)
+        return normalize_rows(rows)
+
+    def _approximate_scores(self, queries: np.ndarray, start: int, end: int) -> np.ndarray:
+        block = self._codes[start:end]
+        if self.storage == "int8":
+            return (queries @ block.astype(np.float32).T) * self._scales[start:end]
+        return queries @ block.T
+
+    def search(self, query_vectors: np.ndarray, top_k: int) -> List[List[Tuple[int, float]]]:
+        """Top-k (id, cosine score) per query, best first"""
+        queries = normalize_rows(np.atleast_2d(query_vectors))
+        with self._lock:
+            count = self.count
+            if count == 0 or top_k <= 0:
+                return [[] for _ in queries]
+            candidates = min(count, top_k * self.rescore_factor if self.storage == "int8" else top_k)
+
+            best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+            best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+            for start in range(0, count, self.chunk_size):
+                end = min(start + self.chunk_size, count)
+                scores = np.concatenate([best_scores, self._approximate_scores(queries, start, end)], axis=1)
+                ids = np.concatenate([best_ids, np.broadcast_to(np.arange(start, end), (len(queries), end - start))], axis=1)
+                if scores.shape[1] > candidates:
+                    keep = np.argpartition(-scores, candidates - 1, axis=1)[:, :candidates]
+                    scores = np.take_along_axis(scores, keep, axis=1)
+                    ids = np.take_along_axis(ids, keep, axis=1)
+                best_scores, best_ids = scores, ids
+
+            results = []
+            for query, ids, scores in zip(queries, best_ids, best_scores):
+                if self.storage == "int8":
+                    scores = self._original_rows(ids) @ query
+                order = np.argsort(-scores, kind="stable")[:top_k]
+                results.append([(int(ids[i]), float(scores[i])) for i in order])
+            return results
+
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            if self.storage == "int8":
+                return self._original_rows(ids)
+            return self._codes[ids].astype(np.float32)
+
+    def memory_bytes(self) -> int:
+        """Resident bytes of the search structure (referenced, e.g. memory-mapped, originals excluded)"""
+        resident = self._codes[:self.count].nbytes + self._scales[:self.count].nbytes
+        if self.storage == "int8":
+            resident += self._origin[:self.count].nbytes + self._resident[:self._resident_count].nbytes
+        return resident
+
+    def query_params(self) -> Dict[str, Any]:
+        return {"rescore_factor": self.rescore_factor}
+
+    def _save_files(self, directory: str):
+        np.save(os.path.join(directory, self.CODES_FILE), self._codes[:self.count])
+        np.save(os.path.join(directory, self.SCALES_FILE), self._scales[:self.count])
+        if self.storage == "int8":
+            with open(os.path.join(directory, self.ORIGINALS_FILE), 'wb') as f:
+                for start in range(0, self.count, self.chunk_size):
+                    self._original_rows(np.arange(start, min(start + self.chunk_size, self.count))).tofile(f)
+
+    def _load_files(self, directory: str, meta: Dict[str, Any]):
+        """Load codes into memory; int8 rescoring rows stay memory-mapped"""
+        self._codes = np.load(os.path.join(directory, self.CODES_FILE))
+        self._scales = np.load(os.path.join(directory, self.SCALES_FILE))
+        self.count = len(self._codes)
+        self._origin = np.full(self.count, self.NO_ORIGIN, dtype=np.int64)
+        self._resident = np.zeros((0, self.dim), dtype=np.float32)
+        self._resident_count = 0
+        self._free_slots = []
+        self._segments = {}
+        self._next_segment = 0
+        if self.storage == "int8" and self.count:
+            originals = np.memmap(os.path.join(directory, self.ORIGINALS_FILE), dtype=np.float32, mode='r',
+                                  shape=(self.count, self.dim))
+            self._segments[0] = [0, originals, self.count]
+            self._next_segment = 1
+            self._origin[:] = -1
@@ -0,0 +1,218 @@
+import os
+import json
+import hashlib
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+class KBSnapshot:
+    """On-disk knowledge base snapshot: version header, mmap-able float32 vectors and a payload sidecar
+
+    Layout of a snapshot directory:
+        header.json     format/encoder versions, dataset hash, shape
+        vectors.f32     row-major float32 matrix of shape (count, dim)
+        payloads.jsonl  one JSON payload per line, in vector order
+    """
+    HEADER_FILE = "header.json"
+    VECTORS_FILE = "vectors.f32"
+    PAYLOADS_FILE = "payloads.jsonl"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.header_path = os.path.join(directory, self.HEADER_FILE)
+        self.vectors_path = os.path.join(directory, self.VECTORS_FILE)
+        self.payloads_path = os.path.join(directory, self.PAYLOADS_FILE)
+
+    @staticmethod
+    def dataset_hash(items: List[Dict[str, Any]]) -> str:
+        """Stable content hash of a dataset"""
+        digest = hashlib.sha256()
+        for item in items:
+            KBSnapshot.update_hash(digest, item)
+        return digest.hexdigest()
+
+    @staticmethod
+    def update_hash(digest, item: Dict[str, Any]):
+        """Feed one dataset item into a running dataset hash"""
+        digest.update(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+
+    def read_header(self) -> Optional[Dict[str, Any]]:
+        """Read the snapshot header, or None if missing/corrupt"""
+        try:
+            with open(self.header_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_current(self, dataset_hash: str, encoder_version: str, dim: int) -> bool:
+        """Check the snapshot matches the dataset, encoder version and vector size"""
+        header = self.read_header()
+        if not header:
+            return False
+        if (header.get("format_version") != SNAPSHOT_FORMAT_VERSION
+                or header.get("encoder_version") != encoder_version
+                or header.get("dataset_hash") != dataset_hash
+                or header.get("dim") != dim):
+            return False
+        expected_bytes = header["count"] * header["dim"] * np.dtype(np.float32).itemsize
+        return os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) == expected_bytes
+
+    def save(self, vectors: np.ndarray, payloads: List[Dict[str, Any]], dataset_hash: str, encoder_version: str):
+        """Write the snapshot; the header is written last so a partial write is never considered current"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(vectors) != len(payloads):
+            raise ValueError("vectors and payloads must have the same length")
+        os.makedirs(self.directory, exist_ok=True)
+
+        if os.path.exists(self.header_path):
+            os.remove(self.header_path)
+
+        tmp_vectors = self.vectors_path + ".tmp"
+        vectors.tofile(tmp_vectors)
+        os.replace(tmp_vectors, self.vectors_path)
+
+        tmp_payloads = self.payloads_path + ".tmp"
+        with open(tmp_payloads, 'w', encoding='utf-8') as f:
+            for payload in payloads:
+                f.write(json.dumps(payload, ensure_ascii=False))
+                f.write("\n")
+        os.replace(tmp_payloads, self.payloads_path)
+
+        header = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "encoder_version": encoder_version,
+            "dataset_hash": dataset_hash,
+            "count": int(vectors.shape[0]),
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "dtype": "float32"
+        }
+        tmp_header = self.header_path + ".tmp"
+        with open(tmp_header, 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+        os.replace(tmp_header, self.header_path)
+
+    def load(self) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """Open the vectors as a read-only memory map and read the payload sidecar"""
+        header = self.read_header()
+        if not header:
+            raise FileNotFoundError(f"No snapshot header in {self.directory}")
+        if header["count"] == 0:
+            vectors = np.zeros((0, header["dim"]), dtype=np.float32)
+        else:
+            vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                shape=(header["count"], header["dim"]))
+        with open(self.payloads_path, 'r', encoding='utf-8') as f:
+            payloads = [json.loads(line) for line in f if line.strip()]
+        if len(payloads) != header["count"]:
+            raise ValueError(f"Snapshot payload count mismatch in {self.directory}")
+        return vectors, payloads
+
+    def load_vectors(self) -> np.ndarray:
+        """Open only the vectors, as a read-only memory map"""
+        header = self.read_header()
+        if not header:
+            raise FileNotFoundError(f"No snapshot header in {self.directory}")
+        if header["count"] == 0:
+            return np.zeros((0, header["dim"]), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(header["count"], header["dim"]))
+
+    def iter_payload_offsets(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Stream (byte offset, payload) for each payload line, for lazy payload lookup"""
+        with open(self.payloads_path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    yield offset, json.loads(line)
+                offset += len(line)
+
+    def iter_chunks(self, batch_size: int = 1024) -> Iterator[Tuple[np.ndarray, List[Dict[str, Any]]]]:
+        """Stream (vectors, payloads) chunks without materializing all payloads"""
+        header = self.read_header()
+        if not header:
+            raise FileNotFoundError(f"No snapshot header in {self.directory}")
+        if header["count"] == 0:
+            return
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                            shape=(header["count"], header["dim"]))
+        offset = 0
+        payloads = []
+        with open(self.payloads_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                payloads.append(json.loads(line))
+                if len(payloads) == batch_size:
+                    yield vectors[offset:offset + batch_size], payloads
+                    offset += batch_size
+                    payloads = []
+        if payloads:
+            yield vectors[offset:offset + len(payloads)], payloads
+
+class KBSnapshotWriter:
+    """Append-only snapshot writer for streaming ingestion
+
+    Vectors and payloads are appended chunk by chunk; the header is only
+    written by close(), so an interrupted ingest never looks current.
+    """
+    def __init__(self, directory: str, encoder_version: str, dim: int,
+                 resume_rows: int = 0, resume_payload_bytes: int = 0):
+        self.snapshot = KBSnapshot(directory)
+        self.encoder_version = encoder_version
+        self.dim = dim
+        self.rows = resume_rows
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.snapshot.header_path):
+            os.remove(self.snapshot.header_path)
+
+        # Drop anything written after the last checkpoint
+        self._vectors = self._open_at(self.snapshot.vectors_path, resume_rows * dim * np.dtype(np.float32).itemsize)
+        self._payloads = self._open_at(self.snapshot.payloads_path, resume_payload_bytes)
+
+    @staticmethod
+    def _open_at(path: str, size: int):
+        f = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        f.truncate(size)
+        f.seek(size)
+        return f
+
+    @property
+    def payload_bytes(self) -> int:
+        return self._payloads.tell()
+
+    def append(self, vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        """Append one chunk of vectors and their payloads"""
+        np.ascontiguousarray(vectors, dtype=np.float32).tofile(self._vectors)
+        self._payloads.write("".join(json.dumps(p, ensure_ascii=False) + "\n" for p in payloads).encode("utf-8"))
+        self.rows += len(payloads)
+
+    def flush(self):
+        """Flush buffered chunks so a checkpoint can reference them"""
+        self._vectors.flush()
+        self._payloads.flush()
+        os.fsync(self._vectors.fileno())
+        os.fsync(self._payloads.fileno())
+
+    def close(self, dataset_hash: str):
+        """Finish the snapshot by writing its header"""
+        self.flush()
+        self._vectors.close()
+        self._payloads.close()
+        header = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "encoder_version": self.encoder_version,
+            "dataset_hash": dataset_hash,
+            "count": self.rows,
+            "dim": self.dim,
+            "dtype": "float32"
+        }
+        tmp_header = self.snapshot.header_path + ".tmp"
+        with open(tmp_header, 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+        os.replace(tmp_header, self.snapshot.header_path)
+
+    def abort(self):
+        """Close files without writing a header"""
+        self._vectors.close()
+        self._payloads.close()
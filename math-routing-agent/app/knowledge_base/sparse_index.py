@@ -0,0 +1,252 @@
+import os
+import threading
+import numpy as np
+from typing import Any, Dict, List, Tuple
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.index import VectorIndex
+from app.knowledge_base.quantized import normalize_rows
+
+class SparseFeatureIndex(VectorIndex):
+    """Exact cosine search over SimpleEncoder vectors through an inverted index
+
+    A SimpleEncoder vector has a few symbol and topic features plus a word
+    block that is a constant-valued prefix (one slot per word). A point is
+    therefore stored as its symbol/topic values, its word count and its word
+    value, and a query scores as
+
+        Σ q_f·d_f over shared symbol/topic features + min(wq, wd)·q_w·d_w
+
+    Points sharing a symbol/topic feature with the query are found through
+    that feature's posting list and scored exactly. Every other point only
+    has the word term, which is largest for the highest word value within
+    each word count, so per word count a few points from a list sorted by
+    word value complete the exact top-k without touching the rest.
+    """
+    storage = "sparse"
+    ARRAYS_FILE = "sparse.npz"
+    # Merge posting lists only while they are shorter than count / DENSE_SCAN_RATIO
+    DENSE_SCAN_RATIO = 4
+
+    def __init__(self, encoder: SimpleEncoder):
+        self.dim = encoder.vector_size
+        self.word_offset = encoder.WORD_OFFSET
+        self.max_words = encoder.MAX_WORDS
+        # Slots outside the word block that can be non-zero
+        self.feature_dims = np.array(
+            list(range(encoder.SYMBOL_OFFSET, encoder.SYMBOL_OFFSET + len(encoder.MATH_SYMBOLS)))
+            + list(range(encoder.TOPIC_OFFSET, encoder.TOPIC_OFFSET + len(encoder.MATH_TOPICS)))
+        )
+        self.count = 0
+        self.chunk_size = 65536
+        self._features = np.zeros((0, len(self.feature_dims)), dtype=np.float32)
+        self._word_counts = np.zeros(0, dtype=np.int16)
+        self._word_values = np.zeros(0, dtype=np.float32)
+        self._postings: List[np.ndarray] = [np.zeros(0, dtype=np.int64) for _ in self.feature_dims]
+        self._word_groups: List[np.ndarray] = [np.zeros(0, dtype=np.int64) for _ in range(self.max_words + 1)]
+        # Writes since the last search: touched ids, features and word counts (or a full rebuild)
+        self._dirty_ids: List[np.ndarray] = []
+        self._dirty_features = set()
+        self._dirty_groups = set()
+        self._rebuild_all = False
+        self._indexed_count = 0
+        self._lock = threading.RLock()
+
+    def _split(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Symbol/topic values, word counts and word values; rejects vectors of another layout"""
+        vectors = normalize_rows(vectors)
+        words = vectors[:, self.word_offset:self.word_offset + self.max_words]
+        word_counts = np.count_nonzero(words, axis=1)
+        word_values = words[:, 0]
+        features = vectors[:, self.feature_dims]
+        if not np.array_equal(self._join(features, word_counts, word_values), vectors):
+            raise ValueError("SparseFeatureIndex only indexes SimpleEncoder vectors")
+        return features, word_counts.astype(np.int16), word_values
+
+    def _join(self, features: np.ndarray, word_counts: np.ndarray, word_values: np.ndarray) -> np.ndarray:
+        """Full vectors from their symbol/topic values, word counts and word values"""
+        vectors = np.zeros((len(features), self.dim), dtype=np.float32)
+        vectors[:, self.feature_dims] = features
+        vectors[:, self.word_offset:self.word_offset + self.max_words] = (
+            (np.arange(self.max_words) < word_counts[:, None]) * word_values[:, None]
+        )
+        return vectors
+
+    def _reserve(self, size: int):
+        capacity = len(self._word_counts)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        features = np.zeros((capacity, len(self.feature_dims)), dtype=np.float32)
+        features[:self.count] = self._features[:self.count]
+        word_counts = np.zeros(capacity, dtype=np.int16)
+        word_counts[:self.count] = self._word_counts[:self.count]
+        word_values = np.zeros(capacity, dtype=np.float32)
+        word_values[:self.count] = self._word_values[:self.count]
+        self._features, self._word_counts, self._word_values = features, word_counts, word_values
+
+    def set(self, start_id: int, vectors: np.ndarray, keep_originals: bool = True):
+        """Write vectors at ids start_id..; the touched postings are updated on the next search"""
+        if not len(vectors):
+            return
+        features, word_counts, word_values = self._split(vectors)
+        with self._lock:
+            end = start_id + len(features)
+            self._reserve(end)
+            # Overwritten rows leave the postings and word groups they were in
+            overwritten = slice(start_id, min(end, self.count))
+            old_features = self._features[overwritten]
+            self._dirty_features.update(np.flatnonzero(old_features.any(axis=0)).tolist())
+            self._dirty_groups.update(np.unique(self._word_counts[overwritten]).tolist())
+            self._dirty_features.update(np.flatnonzero(features.any(axis=0)).tolist())
+            self._dirty_groups.update(np.unique(word_counts).tolist())
+            self._dirty_ids.append(np.arange(start_id, end))
+            self._features[start_id:end] = features
+            self._word_counts[start_id:end] = word_counts
+            self._word_values[start_id:end] = word_values
+            self.count = max(self.count, end)
+
+    def _refresh(self):
+        """Bring the postings and word groups touched by set() up to date"""
+        if self._rebuild_all:
+            self._rebuild()
+            return
+        if not self._dirty_ids:
+            return
+        ids = np.unique(np.concatenate(self._dirty_ids))
+        # Ids past the last refresh are in no list yet; only overwrites need removing
+        overwritten = ids[ids < self._indexed_count]
+        for j in self._dirty_features:
+            postings = self._postings[j]
+            if len(overwritten):
+                postings = postings[~np.isin(postings, overwritten)]
+            added = ids[self._features[ids, j] != 0]
+            self._postings[j] = np.union1d(postings, added) if len(overwritten) else np.concatenate([postings, added])
+        for group in self._dirty_groups:
+            members = self._word_groups[group]
+            if len(overwritten):
+                members = members[~np.isin(members, overwritten)]
+            added = ids[self._word_counts[ids] == group]
+            added = added[np.lexsort((added, -self._word_values[added]))]
+            if len(overwritten):
+                members = np.concatenate([members, added])
+                self._word_groups[group] = members[np.lexsort((members, -self._word_values[members]))]
+            else:
+                # New ids are above every member, so they go after members of equal word value
+                positions = np.searchsorted(-self._word_values[members], -self._word_values[added], side="right")
+                self._word_groups[group] = np.insert(members, positions, added)
+        self._clear_dirty()
+
+    def _clear_dirty(self):
+        self._indexed_count = self.count
+        self._dirty_ids = []
+        self._dirty_features = set()
+        self._dirty_groups = set()
+        self._rebuild_all = False
+
+    def _rebuild(self):
+        """Posting lists per symbol/topic feature and word-count groups sorted by word value"""
+        features = self._features[:self.count]
+        self._postings = [np.flatnonzero(features[:, j]) for j in range(features.shape[1])]
+        word_counts = self._word_counts[:self.count]
+        by_value = np.argsort(-self._word_values[:self.count], kind="stable")
+        groups = word_counts[by_value]
+        order = np.argsort(groups, kind="stable")
+        bounds = np.searchsorted(groups[order], np.arange(self.max_words + 2))
+        self._word_groups = [by_value[order[bounds[g]:bounds[g + 1]]] for g in range(self.max_words + 1)]
+        self._clear_dirty()
+
+    def search(self, query_vectors: np.ndarray, top_k: int) -> List[List[Tuple[int, float]]]:
+        """Exact top-k (id, cosine score) per query, best first, ties by lower id"""
+        queries = np.atleast_2d(query_vectors)
+        with self._lock:
+            self._refresh()
+            if self.count == 0 or top_k <= 0:
+                return [[] for _ in queries]
+            features, word_counts, word_values = self._split(queries)
+            return [
+                self._search_one(query_features, int(word_count), float(word_value), top_k)
+                for query_features, word_count, word_value in zip(features, word_counts, word_values)
+            ]
+
+    def _search_one(self, query_features: np.ndarray, query_words: int, query_value: float,
+                    top_k: int) -> List[Tuple[int, float]]:
+        # Points sharing a symbol/topic feature: exact scores from the postings
+        active = np.flatnonzero(query_features)
+        postings = sum(len(self._postings[j]) for j in active)
+        if postings * self.DENSE_SCAN_RATIO > self.count:
+            # Common features cover most points: a scan of the few feature columns beats merging postings
+            feature_scores = self._features[:self.count, active] @ query_features[active]
+            is_candidate = feature_scores > 0
+            candidates = np.flatnonzero(is_candidate)
+            scores = feature_scores[candidates]
+            outside = lambda ids: ids[~is_candidate[ids]]
+        else:
+            if len(active):
+                candidates = np.unique(np.concatenate([self._postings[j] for j in active]))
+            else:
+                candidates = np.zeros(0, dtype=np.int64)
+            scores = self._features[candidates][:, active] @ query_features[active]
+
+            def outside(ids):
+                if not len(candidates):
+                    return ids
+                position = np.minimum(np.searchsorted(candidates, ids), len(candidates) - 1)
+                return ids[candidates[position] != ids]
+        scores = (scores + np.minimum(query_words, self._word_counts[candidates])
+                  * query_value * self._word_values[candidates]).astype(np.float32)
+        kth = -np.partition(-scores, top_k - 1)[top_k - 1] if len(scores) >= top_k else -np.inf
+
+        # Everyone else scores only the word term: per word count, the highest word values,
+        # skipping counts whose best possible score cannot reach the current k-th score
+        ids = [candidates]
+        all_scores = [scores]
+        for group, members in enumerate(self._word_groups):
+            if not len(members):
+                continue
+            factor = min(query_words, group) * query_value
+            if factor * self._word_values[members[0]] < kth:
+                continue
+            window = top_k
+            while True:
+                head = outside(members[:window])
+                if len(head) >= top_k or window >= len(members):
+                    break
+                window *= 2
+            head = head[:top_k]
+            ids.append(head)
+            all_scores.append((factor * self._word_values[head]).astype(np.float32))
+
+        ids = np.concatenate(ids)
+        all_scores = np.concatenate(all_scores)
+        order = np.lexsort((ids, -all_scores))[:top_k]
+        return [(int(ids[i]), float(all_scores[i])) for i in order]
+
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            return self._join(self._features[ids], self._word_counts[ids], self._word_values[ids])
+
+    def memory_bytes(self) -> int:
+        resident = self._features[:self.count].nbytes + self._word_counts[:self.count].nbytes
+        resident += self._word_values[:self.count].nbytes
+        resident += sum(postings.nbytes for postings in self._postings)
+        resident += sum(group.nbytes for group in self._word_groups)
+        return resident
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["postings"] = int(sum(len(postings) for postings in self._postings))
+        return stats
+
+    def _save_files(self, directory: str):
+        np.savez(os.path.join(directory, self.ARRAYS_FILE), features=self._features[:self.count],
+                 word_counts=self._word_counts[:self.count], word_values=self._word_values[:self.count])
+
+    def _load_files(self, directory: str, meta: Dict[str, Any]):
+        with np.load(os.path.join(directory, self.ARRAYS_FILE)) as arrays:
+            self._features = arrays["features"]
+            self._word_counts = arrays["word_counts"]
+            self._word_values = arrays["word_values"]
+        self.count = len(self._word_counts)
+        self._clear_dirty()
+        self._rebuild_all = True
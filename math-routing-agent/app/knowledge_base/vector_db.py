@@ -1,73 +1,70 @@
+import os
 import json
+import threading
 import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List, Dict, Any
-
-class SimpleEncoder:
-    """Vector encoder for mathematical content"""
-    def __init__(self):
-        self.vector_size = 384
-    
-    def encode(self, text: str) -> List[float]:
-        """Encode text to vector using mathematical features"""
-        vector = [0.0] * self.vector_size
-        if not text:
-            return vector
-            
-        text_lower = text.lower()
-        
-        # Mathematical symbol features
-        math_symbols = ['+', '-', '*', '/', '=', '^', '√', 'π', 'θ', 'α', 'β']
-        for i, symbol in enumerate(math_symbols):
-            if i < len(vector):
-                vector[i] = text.count(symbol) / len(text)
-        
-        # Mathematical topic features
-        math_topics = {
-            'algebra': ['solve', 'equation', 'variable', 'polynomial', 'quadratic'],
-            'calculus': ['derivative', 'integral', 'limit', 'differentiate', 'integrate'],
-            'geometry': ['area', 'volume', 'angle', 'triangle', 'circle', 'radius'],
-            'trigonometry': ['sin', 'cos', 'tan', 'angle', 'triangle']
-        }
-        
-        idx = 50
-        for topic, keywords in math_topics.items():
-            if idx < len(vector):
-                vector[idx] = sum(1 for keyword in keywords if keyword in text_lower)
-                idx += 1
-        
-        # Word frequency features
-        words = text_lower.split()
-        for i, word in enumerate(words[:100]):
-            if 100 + i < len(vector):
-                vector[100 + i] = 1.0
-        
-        # Normalize
-        norm = np.linalg.norm(vector)
-        if norm > 0:
-            vector = [v / norm for v in vector]
-        
-        return vector
+from qdrant_client.models import Distance, VectorParams, PointStruct, SearchRequest
+from typing import List, Dict, Any, Optional, Tuple
+from app.config import Config
+from app.knowledge_base.snapshot import KBSnapshot
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.index import VectorIndex, create_index
+from app.knowledge_base.quantized import PayloadStore
+from app.knowledge_base.partitioned import PartitionedIndex
 
 class MathKnowledgeBase:
-    def __init__(self, collection_name="math_questions"):
-        self.client = QdrantClient(":memory:")
+    def __init__(self, collection_name="math_questions", snapshot_dir: Optional[str] = Config.KB_SNAPSHOT_DIR,
+                 vector_storage: str = Config.KB_VECTOR_STORAGE):
         self.encoder = SimpleEncoder()
+        self.vector_storage = vector_storage
+        if vector_storage == "qdrant":
+            self.client = QdrantClient(":memory:")
+            self.vector_store = None
+            self.payload_store = None
+        else:
+            # In-process vector index, payloads kept outside the search structure
+            self.client = None
+            self.vector_store = self.create_vector_index(vector_storage)
+            self.payload_store = PayloadStore()
         self.collection_name = collection_name
+        self.snapshot_dir = snapshot_dir
+        self.next_id = 0
+        # Seed dataset identity, the part of a cached index that precedes a snapshot
+        self.seed_hash = None
+        self.seed_points = 0
+        self.question_keys = set()
+        # Local Qdrant is not safe for concurrent upsert + search
+        self._lock = threading.RLock()
         self.setup_collection()
         self.load_initial_data()
+        if Config.KB_BANK_SNAPSHOT_DIR:
+            self.load_snapshot(Config.KB_BANK_SNAPSHOT_DIR)
+    
+    def create_vector_index(self, vector_storage: str) -> VectorIndex:
+        """Index backend for KB_VECTOR_STORAGE (float32, int8, sparse or hnsw), per topic with KB_PARTITIONED"""
+        options = {
+            "rescore_factor": Config.KB_RESCORE_FACTOR,
+            "m": Config.KB_HNSW_M,
+            "ef_construction": Config.KB_HNSW_EF_CONSTRUCTION,
+            "ef_search": Config.KB_HNSW_EF_SEARCH
+        }
+        if Config.KB_PARTITIONED:
+            return PartitionedIndex(self.encoder, vector_storage, options, route_confidence=Config.KB_ROUTE_CONFIDENCE,
+                                    workers=Config.KB_PARTITION_WORKERS)
+        return create_index(vector_storage, options)
     
     def setup_collection(self):
         """Initialize Qdrant vector database"""
+        if self.client is None:
+            return
         self.client.recreate_collection(
             collection_name=self.collection_name,
             vectors_config=VectorParams(size=self.encoder.vector_size, distance=Distance.COSINE)
         )
     
-    def load_initial_data(self):
-        """Load comprehensive math dataset"""
-        math_dataset = {
+    def get_initial_dataset(self) -> Dict[str, Any]:
+        """Comprehensive seed math dataset"""
+        return {
             "questions": [
                 {
                     "question": "Solve the quadratic equation: x² - 5x + 6 = 0",
@@ -113,37 +110,237 @@ class MathKnowledgeBase:
             ]
         }
         
-        points = []
-        for i, item in enumerate(math_dataset['questions']):
-            vector = self.encoder.encode(item['question'])
-            point = PointStruct(
-                id=i,
-                vector=vector,
-                payload=item
-            )
-            points.append(point)
+    def load_initial_data(self):
+        """Load comprehensive math dataset, from the snapshot when it is current"""
+        items = self.get_initial_dataset()['questions']
+        dataset_hash = KBSnapshot.dataset_hash(items)
+        self.seed_hash = dataset_hash
+        self.seed_points = len(items)
+        snapshot = KBSnapshot(self.snapshot_dir) if self.snapshot_dir else None
+        
+        if snapshot and snapshot.is_current(dataset_hash, self.encoder.VERSION, self.encoder.vector_size):
+            try:
+                vectors, payloads = snapshot.load()
+                self.upsert_vectors(vectors, payloads)
+                print(f"✅ Loaded {len(payloads)} math questions from snapshot {self.snapshot_dir}")
+                return
+            except (OSError, ValueError) as e:
+                print(f"Snapshot unreadable, rebuilding: {e}")
+        
+        vectors = self.encoder.encode_batch([item['question'] for item in items])
+        self.upsert_vectors(vectors, items)
+        
+        if snapshot:
+            try:
+                snapshot.save(vectors, items, dataset_hash, self.encoder.VERSION)
+            except OSError as e:
+                print(f"Error saving knowledge base snapshot: {e}")
+        
+        print(f"✅ Loaded {len(items)} math questions into vector database")
+    
+    def upsert_vectors(self, vectors: np.ndarray, payloads: List[Dict[str, Any]], start_id: int = 0, batch_size: int = 1024):
+        """Upsert pre-encoded vectors with their payloads in fixed-size chunks"""
+        for offset in range(0, len(payloads), batch_size):
+            chunk = np.asarray(vectors[offset:offset + batch_size], dtype=np.float32)
+            chunk_payloads = payloads[offset:offset + batch_size]
+            if self.vector_store is not None:
+                with self._lock:
+                    self.vector_store.set(start_id + offset, chunk)
+                    self.payload_store.put(start_id + offset, chunk_payloads)
+                    self.question_keys.update(self.question_key(payload["question"]) for payload in chunk_payloads)
+                continue
+            points = [
+                PointStruct(id=start_id + offset + i, vector=vector.tolist(), payload=payload)
+                for i, (vector, payload) in enumerate(zip(chunk, chunk_payloads))
+            ]
+            with self._lock:
+                self.client.upsert(collection_name=self.collection_name, points=points)
+                self.question_keys.update(self.question_key(payload["question"]) for payload in chunk_payloads)
+        self.next_id = max(self.next_id, start_id + len(payloads))
+    
+    @staticmethod
+    def question_key(question: str) -> int:
+        """Dedup key for a question: hash of its whitespace/case-normalized text"""
+        return hash(" ".join(question.split()).lower())
+    
+    def has_question(self, question: str) -> bool:
+        return self.question_key(question) in self.question_keys
+    
+    def add_questions(self, items: List[Dict[str, Any]]) -> int:
+        """Incrementally add new questions, skipping ones already in the collection"""
+        with self._lock:
+            seen = set()
+            new_items = []
+            for item in items:
+                key = self.question_key(item["question"])
+                if key not in self.question_keys and key not in seen:
+                    seen.add(key)
+                    new_items.append(item)
+            if not new_items:
+                return 0
+            vectors = self.encoder.encode_batch([item["question"] for item in new_items])
+            self.upsert_vectors(vectors, new_items, start_id=self.next_id)
+        return len(new_items)
+    
+    def load_snapshot(self, directory: str, batch_size: int = 1024) -> int:
+        """Append a snapshot (e.g. an ingested question bank) after the existing points"""
+        snapshot = KBSnapshot(directory)
+        header = snapshot.read_header()
+        if not header:
+            print(f"No knowledge base snapshot found in {directory}")
+            return 0
+        if header.get("encoder_version") != self.encoder.VERSION or header.get("dim") != self.encoder.vector_size:
+            print(f"Skipping snapshot {directory}: built with a different encoder")
+            return 0
+        
+        if self.vector_store is not None:
+            return self._attach_snapshot(snapshot)
         
-        self.client.upsert(collection_name=self.collection_name, points=points)
-        print(f"✅ Loaded {len(points)} math questions into vector database")
+        loaded = 0
+        for vectors, payloads in snapshot.iter_chunks(batch_size):
+            self.upsert_vectors(vectors, payloads, start_id=self.next_id, batch_size=batch_size)
+            loaded += len(payloads)
+        print(f"✅ Loaded {loaded} math questions from snapshot {directory}")
+        return loaded
+    
+    def _attach_snapshot(self, snapshot: KBSnapshot) -> int:
+        """Index a snapshot's vectors and serve its payloads (and int8 rescoring rows) from disk"""
+        start_id = self.next_id
+        offsets = []
+        keys = set()
+        for offset, payload in snapshot.iter_payload_offsets():
+            offsets.append(offset)
+            keys.add(self.question_key(payload["question"]))
+        vectors = snapshot.load_vectors()
+        if len(offsets) != len(vectors):
+            print(f"Skipping snapshot {snapshot.directory}: payload count mismatch")
+            return 0
+        
+        with self._lock:
+            if not self._load_cached_index(snapshot, start_id, len(offsets)):
+                chunk_size = self.vector_store.chunk_size
+                for offset in range(0, len(vectors), chunk_size):
+                    self.vector_store.set(start_id + offset, vectors[offset:offset + chunk_size], keep_originals=False)
+                self._save_cached_index(snapshot, start_id)
+            self.payload_store.attach_jsonl(start_id, snapshot.payloads_path, np.array(offsets, dtype=np.int64))
+            self.question_keys.update(keys)
+            self.next_id = start_id + len(offsets)
+        print(f"✅ Loaded {len(offsets)} math questions from snapshot {snapshot.directory} ({self.vector_store.storage} vectors)")
+        return len(offsets)
+    
+    def _index_cache_meta(self, snapshot: KBSnapshot, start_id: int) -> Optional[Dict[str, Any]]:
+        """What a cached index next to the snapshot must have been built from, or None when not cacheable"""
+        if not (Config.KB_INDEX_CACHE and self.vector_store.cache_builds) or start_id != self.seed_points:
+            return None
+        return {
+            "encoder_version": self.encoder.VERSION,
+            "seed_hash": self.seed_hash,
+            "snapshot_hash": snapshot.read_header().get("dataset_hash"),
+            "start_id": start_id
+        }
+    
+    def _index_cache_dir(self, snapshot: KBSnapshot) -> str:
+        return os.path.join(snapshot.directory, f"index-{self.vector_store.storage}")
+    
+    def _load_cached_index(self, snapshot: KBSnapshot, start_id: int, count: int) -> bool:
+        """Reuse an index built earlier from the same seed data and snapshot instead of rebuilding it"""
+        expected = self._index_cache_meta(snapshot, start_id)
+        if expected is None:
+            return False
+        cache_dir = self._index_cache_dir(snapshot)
+        meta = VectorIndex.read_meta(cache_dir)
+        if not meta or meta.get("count") != start_id + count or any(meta.get(k) != v for k, v in expected.items()):
+            return False
+        try:
+            if not self.vector_store.load(cache_dir):
+                return False
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"Cached index unreadable, rebuilding: {e}")
+            return False
+        print(f"✅ Loaded cached {self.vector_store.storage} index from {cache_dir}")
+        return True
+    
+    def _save_cached_index(self, snapshot: KBSnapshot, start_id: int):
+        meta = self._index_cache_meta(snapshot, start_id)
+        if meta is None:
+            return
+        try:
+            self.vector_store.save(self._index_cache_dir(snapshot), meta)
+        except (OSError, RuntimeError) as e:
+            print(f"Error saving index cache: {e}")
     
     def search_similar_questions(self, query: str, threshold: float = 0.6, top_k: int = 3):
         """Search for similar questions using vector similarity"""
-        query_vector = self.encoder.encode(query)
+        if self.vector_store is not None:
+            return self._search_compact(self.encoder.encode_batch([query]), threshold, top_k)[0]
         
-        search_result = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            limit=top_k
-        )
+        query_vector = self.encoder.encode_batch([query])[0].tolist()
         
+        with self._lock:
+            search_result = self.client.search(
+                collection_name=self.collection_name,
+                query_vector=query_vector,
+                limit=top_k
+            )
+        
+        return self._format_results(search_result, threshold)
+    
+    def search_similar_questions_batch(self, queries: List[str], threshold: float = 0.6, top_k: int = 3):
+        """Search many queries with one batched encode and one multi-query search, results in order"""
+        if not queries:
+            return []
+        query_vectors = self.encoder.encode_batch(queries)
+        if self.vector_store is not None:
+            return self._search_compact(query_vectors, threshold, top_k)
+        
+        requests = [
+            SearchRequest(vector=vector.tolist(), limit=top_k, with_payload=True)
+            for vector in query_vectors
+        ]
+        
+        with self._lock:
+            search_results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=requests
+            )
+        
+        return [self._format_results(search_result, threshold) for search_result in search_results]
+    
+    def _search_compact(self, query_vectors: np.ndarray, threshold: float, top_k: int) -> List[List[Dict[str, Any]]]:
+        """Search the compact store; payloads are only fetched for hits above the threshold"""
+        results = []
+        for hits in self.vector_store.search(query_vectors, top_k):
+            matches = [(score, self.payload_store.get(point_id)) for point_id, score in hits if score >= threshold]
+            results.append(self._format_hits([(score, payload) for score, payload in matches if payload is not None]))
+        return results
+    
+    def index_stats(self) -> Dict[str, Any]:
+        if self.vector_store is None:
+            return {"storage": "qdrant", "points": self.next_id}
+        stats = self.vector_store.stats()
+        stats["payload_index_bytes"] = self.payload_store.memory_bytes()
+        return stats
+    
+    def close(self):
+        """Stop partition worker processes, if any"""
+        if self.vector_store is not None:
+            self.vector_store.close()
+    
+    @staticmethod
+    def _format_results(search_result, threshold: float) -> List[Dict[str, Any]]:
+        return MathKnowledgeBase._format_hits(
+            [(result.score, result.payload) for result in search_result if result.score >= threshold]
+        )
+    
+    @staticmethod
+    def _format_hits(hits: List[Tuple[float, Dict[str, Any]]]) -> List[Dict[str, Any]]:
         results = []
-        for result in search_result:
-            if result.score >= threshold:
-                results.append({
-                    "question": result.payload["question"],
-                    "solution": result.payload["solution"],
-                    "similarity_score": float(result.score),
-                    "topic": result.payload["topic"]
-                })
+        for score, payload in hits:
+            results.append({
+                "question": payload["question"],
+                "solution": payload["solution"],
+                "similarity_score": float(score),
+                "topic": payload["topic"]
+            })
         
         return results
\ No newline at end of file
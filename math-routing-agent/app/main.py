@@ -1,14 +1,31 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from app.models.schemas import MathQuestion, FeedbackRequest
-from app.guardrails.ai_gateway import AIGateway
-from app.knowledge_base.vector_db import MathKnowledgeBase
-from app.mcp.web_search import MCPSearch
-from app.agents.dspy_routing_agent import MathRoutingAgent
-from app.agents.math_solver import MathSolverAgent
-from app.agents.feedback_agent import HumanFeedbackAgent
+from app.startup import StartupReport, LazyComponent
+
+# Heavy modules (Qdrant, DSPy, OpenAI) are imported by the lazy components below, not here
+startup_report = StartupReport()
+with startup_report.measure_import("fastapi"):
+    from fastapi import FastAPI, HTTPException
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
+with startup_report.measure_import("uvicorn"):
+    import uvicorn
+with startup_report.measure_import("app.models.schemas"):
+    from app.models.schemas import MathQuestion, MathQuestionBatch, FeedbackRequest
+with startup_report.measure_import("app.guardrails.ai_gateway"):
+    from app.guardrails.ai_gateway import AIGateway
+with startup_report.measure_import("app.cache.response_cache"):
+    from app.cache.response_cache import ResponseCache
+with startup_report.measure_import("app.concurrency"):
+    from app.concurrency import ServicePool, SingleFlight
+with startup_report.measure_import("app.metrics"):
+    from app.metrics import RollingCounter, MetricsRegistry, StageTimer, ServerTimingMiddleware, SCORE_BUCKETS
+with startup_report.measure_import("app.speculation"):
+    from app.speculation import SpeculationPolicy
+from app.agents.dspy_setup import get_dspy
 from app.config import Config
-import uvicorn
+from typing import AsyncIterator, List, Optional
+import asyncio
+import json
+import time
 
 app = FastAPI(title="Math Routing Agent API", version="1.0.0")
 
@@ -19,13 +36,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize all components
+# Prometheus metrics; stage timings also go out per request as a Server-Timing header
+metrics_registry = MetricsRegistry()
+stage_timer = StageTimer(metrics_registry.histogram(
+    "math_agent_stage_seconds", "Time spent per pipeline stage", ["stage"]
+))
+solutions_total = metrics_registry.counter(
+    "math_agent_solutions_total", "Answers served, by solution source", ["source"]
+)
+kb_top_score = metrics_registry.histogram(
+    "math_agent_kb_top_similarity", "Similarity score of the best KB match per search", buckets=SCORE_BUCKETS
+)
+kb_no_match_total = metrics_registry.counter(
+    "math_agent_kb_no_match_total", "KB searches with no match above the similarity threshold"
+)
+app.add_middleware(
+    ServerTimingMiddleware,
+    timer=stage_timer,
+    request_histogram=metrics_registry.histogram(
+        "math_agent_request_seconds", "HTTP request latency by route", ["route"]
+    )
+)
+
+# Blocking clients (Qdrant, DSPy, web search, feedback storage) run here, never on the event loop
+service_pool = ServicePool(
+    max_workers=Config.SERVICE_POOL_WORKERS,
+    limits={
+        "openai": Config.OPENAI_CONCURRENCY,
+        "knowledge_base": Config.KB_CONCURRENCY,
+        "web_search": Config.WEB_SEARCH_CONCURRENCY,
+        "feedback": Config.FEEDBACK_CONCURRENCY
+    }
+)
+
+# Initialize all components; heavy ones are built on first use or by the warm-up task
 ai_gateway = AIGateway()
-knowledge_base = MathKnowledgeBase()
-web_searcher = MCPSearch(api_key=Config.TAVILY_API_KEY)
-routing_agent = MathRoutingAgent()
-math_solver = MathSolverAgent()
-feedback_agent = HumanFeedbackAgent()
+knowledge_base = LazyComponent("knowledge_base", "app.knowledge_base.vector_db:MathKnowledgeBase", startup_report)
+web_searcher = LazyComponent("web_searcher", "app.mcp.web_search:MCPSearch", startup_report, api_key=Config.TAVILY_API_KEY)
+routing_agent = LazyComponent("routing_agent", "app.agents.dspy_routing_agent:MathRoutingAgent", startup_report)
+math_solver = LazyComponent("math_solver", "app.agents.math_solver:MathSolverAgent", startup_report,
+                            executor=service_pool.executor)
+feedback_promoter = LazyComponent(
+    "feedback_promoter", "app.knowledge_base.promotion:FeedbackPromoter", startup_report,
+    knowledge_base, math_solver, gateway=ai_gateway, log_path=Config.PROMOTED_QUESTIONS_PATH,
+    min_agreement=Config.PROMOTION_MIN_AGREEMENT
+)
+feedback_agent = LazyComponent(
+    "feedback_agent", "app.agents.feedback_agent:HumanFeedbackAgent", startup_report,
+    promoter=feedback_promoter
+)
+lazy_components = [knowledge_base, web_searcher, routing_agent, math_solver, feedback_promoter, feedback_agent]
+# The promoter replays earlier promotions into the knowledge base, so it is ready before the KB serves
+solve_components = (knowledge_base, web_searcher, routing_agent, math_solver, feedback_promoter)
+solution_sources = RollingCounter()
+response_cache = ResponseCache(
+    max_size=Config.RESPONSE_CACHE_SIZE,
+    ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS
+)
+solve_flight = SingleFlight()
+speculation = SpeculationPolicy(knowledge_base)
+warmup_task: Optional[asyncio.Task] = None
+
+async def _ensure_initialized(*components: LazyComponent):
+    """Build components that are not ready yet in worker threads, never on the event loop"""
+    pending = [component for component in components if not component.initialized]
+    if pending:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(service_pool.executor, component.get) for component in pending))
+
+async def _warm_up():
+    """Background warm-up: initialize every lazy component, then print the startup report"""
+    started = time.perf_counter()
+    for component in lazy_components:
+        await _ensure_initialized(component)
+    # DSPy is only used for feedback processing; load it after the components are ready
+    with startup_report.measure_import("dspy"):
+        await asyncio.get_running_loop().run_in_executor(service_pool.executor, get_dspy)
+    report = startup_report.report()
+    print(f"✅ Warm-up complete in {time.perf_counter() - started:.2f}s")
+    for name, ms in sorted(report["imports_ms"].items(), key=lambda item: -item[1]):
+        print(f"   import {name}: {ms:.1f} ms")
+    for name, ms in report["components_ms"].items():
+        print(f"   init {name}: {ms:.1f} ms")
+
+@app.on_event("startup")
+async def start_warm_up():
+    global warmup_task
+    if Config.WARMUP_ON_STARTUP:
+        warmup_task = asyncio.ensure_future(_warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_components():
+    service_pool.shutdown()
+    if web_searcher.initialized:
+        web_searcher.close()
+    if knowledge_base.initialized:
+        knowledge_base.close()
+    if routing_agent.initialized:
+        routing_agent.router.close()
 
 @app.get("/")
 async def root():
@@ -33,88 +141,375 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: never initializes components, reports stats only for the ready ones"""
     return {
         "status": "healthy", 
         "service": "Math Agent",
         "components": {
-            "knowledge_base": "active",
-            "web_search": "active", 
-            "routing": "active",
-            "feedback_system": "active"
-        }
+            component.name: "active" if component.initialized else "pending"
+            for component in lazy_components
+        },
+        "response_cache": response_cache.stats(),
+        "semantic_cache": math_solver.solution_cache.stats() if math_solver.initialized else None,
+        "service_pool": service_pool.stats(),
+        "coalescing": solve_flight.stats(),
+        "web_search": web_searcher.stats() if web_searcher.initialized else None,
+        "router": routing_agent.router.stats() if routing_agent.initialized else None,
+        "speculation": speculation.stats(),
+        "guardrails": ai_gateway.engine.stats()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until warm-up has initialized every component"""
+    pending = [component.name for component in lazy_components if not component.initialized]
+    ready = not pending or not Config.WARMUP_ON_STARTUP
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "pending": pending}
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics in the text exposition format"""
+    return Response(content=metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
+@app.get("/startup-report")
+async def get_startup_report():
+    """Time spent per import and per component initialization"""
+    return startup_report.report()
+
 @app.post("/solve-math")
 async def solve_math_problem(math_question: MathQuestion):
     """Main endpoint implementing Agentic RAG architecture"""
     try:
         # Step 1: AI Gateway - Input Guardrails
-        input_validation = ai_gateway.process_input(math_question.question)
+        with stage_timer.stage("gateway"):
+            input_validation = ai_gateway.process_input(math_question.question)
         if not input_validation["is_valid"]:
             raise HTTPException(status_code=400, detail=input_validation["error_message"])
         
-        # Step 2: Knowledge Base Search (RAG)
-        kb_results = knowledge_base.search_similar_questions(input_validation["sanitized_query"])
+        # Repeat questions are served from the response cache without touching the pipeline
+        cached_response = response_cache.get(input_validation["sanitized_query"])
+        if cached_response is not None:
+            solutions_total.inc("response_cache")
+            return {**cached_response, "question": math_question.question, "cache_hit": True}
         
-        # Step 3: Intelligent Routing
-        routing_decision = routing_agent.route_question(
-            input_validation["sanitized_query"], 
-            kb_results
+        # Identical questions already in flight share one pipeline run
+        sanitized_query = input_validation["sanitized_query"]
+        response_data = await solve_flight.do(
+            ResponseCache.normalize_key(sanitized_query),
+            lambda: _solve_pipeline(sanitized_query)
         )
         
-        solution_data = None
+        return {**response_data, "question": math_question.question}
         
-        # Step 4: Route to appropriate solver
-        if routing_decision["use_knowledge_base"] and kb_results:
-            # Use Knowledge Base solution (RAG)
-            best_match = kb_results[0]
-            solution_data = math_solver.generate_solution_from_kb(
-                input_validation["sanitized_query"],
-                best_match["solution"]
-            )
-            solution_data["similar_question"] = best_match["question"]
-            solution_data["similarity_score"] = best_match["similarity_score"]
-            
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/solve-math/batch")
+async def solve_math_batch(batch: MathQuestionBatch):
+    """Solve many questions at once; per-item errors do not fail the batch"""
+    if len(batch.questions) > Config.BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {Config.BATCH_MAX_SIZE} questions")
+    
+    # Step 1: Input guardrails over the whole batch
+    with stage_timer.stage("gateway"):
+        validations = ai_gateway.process_input_batch(batch.questions)
+    results: List[Optional[dict]] = [None] * len(batch.questions)
+    pending = []
+    for index, (question, validation) in enumerate(zip(batch.questions, validations)):
+        if not validation["is_valid"]:
+            results[index] = {"question": question, "error": validation["error_message"], "status_code": 400}
+            continue
+        cached_response = response_cache.get(validation["sanitized_query"])
+        if cached_response is not None:
+            solutions_total.inc("response_cache")
+            results[index] = {**cached_response, "question": question, "cache_hit": True}
         else:
-            # Use Web Search with MCP
-            web_results = web_searcher.search_math_solution(input_validation["sanitized_query"])
-            
-            if web_results["success"] and web_results["has_mathematical_content"]:
-                solution_data = math_solver.generate_solution_from_web(
-                    input_validation["sanitized_query"],
-                    web_results
-                )
-            else:
-                # Fallback to direct AI solution
-                solution_data = math_solver.generate_solution_from_web(
-                    input_validation["sanitized_query"],
-                    {}
+            pending.append(index)
+    
+    # Step 2: One batched encode and multi-query KB search for every cache miss
+    await _ensure_initialized(*solve_components)
+    try:
+        with stage_timer.stage("kb_search"):
+            kb_batch = await service_pool.run(
+                "knowledge_base",
+                knowledge_base.search_similar_questions_batch,
+                [validations[index]["sanitized_query"] for index in pending]
+            ) if pending else []
+        for kb_results in kb_batch:
+            _observe_kb_results(kb_results)
+    except Exception as e:
+        # Each item searches on its own instead, so only the questions whose search fails get an error
+        print(f"Error in batched KB search, searching per question: {e}")
+        kb_batch = [None] * len(pending)
+    
+    # Steps 3-5 per item, with bounded parallelism for the web/LLM path
+    semaphore = asyncio.Semaphore(Config.BATCH_CONCURRENCY)
+    
+    async def solve_item(index: int, kb_results: Optional[list]):
+        sanitized_query = validations[index]["sanitized_query"]
+        async with semaphore:
+            try:
+                response_data = await solve_flight.do(
+                    ResponseCache.normalize_key(sanitized_query),
+                    lambda: _solve_pipeline(sanitized_query, kb_results)
                 )
+                results[index] = {**response_data, "question": batch.questions[index]}
+            except Exception as e:
+                results[index] = {
+                    "question": batch.questions[index],
+                    "error": f"Internal server error: {str(e)}",
+                    "status_code": 500
+                }
+    
+    await asyncio.gather(*(solve_item(index, kb_results) for index, kb_results in zip(pending, kb_batch)))
+    
+    failed = sum(1 for result in results if "error" in result)
+    return {
+        "results": results,
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed
+    }
+
+@app.post("/solve-math/stream")
+async def solve_math_stream(math_question: MathQuestion):
+    """Server-Sent Events variant of /solve-math: a step event per solution step, then a final event"""
+    with stage_timer.stage("gateway"):
+        input_validation = ai_gateway.process_input(math_question.question)
+    if not input_validation["is_valid"]:
+        raise HTTPException(status_code=400, detail=input_validation["error_message"])
+    
+    return StreamingResponse(
+        _stream_solution(math_question.question, input_validation["sanitized_query"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_solution(question: str, sanitized_query: str) -> AsyncIterator[str]:
+    """SSE events for one question; LLM steps are sent as soon as their line completes"""
+    try:
+        cached_response = response_cache.get(sanitized_query)
+        if cached_response is not None:
+            solutions_total.inc("response_cache")
+            index = 0
+            for step in cached_response["solution"].get("steps", []):
+                if ai_gateway.process_output_step(step):
+                    index += 1
+                    yield _sse("step", {"index": index, "step": step})
+            yield _sse("final", {**cached_response, "question": question, "cache_hit": True})
+            return
+        
+        kb_results, routing_decision, solution_data, web_context = await _route_and_search(sanitized_query)
+        index = 0
+        completed = True
+        if solution_data is None:
+            async for event in _buffered_llm_events(sanitized_query, web_context):
+                if event["type"] == "solution":
+                    solution_data = event["solution"]
+                    completed = event.get("completed", True)
+                elif ai_gateway.process_output_step(event["step"]):
+                    index += 1
+                    yield _sse("step", {"index": index, "step": event["step"]})
+        else:
+            for step in solution_data.get("steps", []):
+                if ai_gateway.process_output_step(step):
+                    index += 1
+                    yield _sse("step", {"index": index, "step": step})
+        
+        # A stream cut off midway is answered but never cached
+        response_data = _finish_response(sanitized_query, kb_results, routing_decision, solution_data,
+                                         cache=completed)
+        yield _sse("final", {**response_data, "question": question})
         
-        # Step 5: AI Gateway - Output Guardrails
+    except Exception as e:
+        yield _sse("error", {"detail": f"Internal server error: {str(e)}"})
+
+async def _buffered_llm_events(sanitized_query: str, web_context: dict) -> AsyncIterator[dict]:
+    """LLM stream events, forwarded as they arrive through an in-memory buffer
+    
+    A producer task reads the upstream completion under the openai limit and
+    releases it as soon as the completion ends, however slowly the client
+    reads the events; a client that goes away cancels the producer.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def produce():
+        try:
+            async with service_pool.limit("openai"):
+                with stage_timer.stage("llm"):
+                    async for event in math_solver.stream_solution_from_web(sanitized_query, web_context):
+                        events.put_nowait(event)
+        finally:
+            events.put_nowait(None)
+    
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield event
+        # Re-raise an upstream failure
+        await producer
+    finally:
+        producer.cancel()
+
+async def _solve_pipeline(sanitized_query: str, kb_results: Optional[list] = None) -> dict:
+    """Steps 2-5 of /solve-math for a sanitized query (step 2 is skipped when kb_results is given)"""
+    kb_results, routing_decision, solution_data, web_context = await _route_and_search(sanitized_query, kb_results)
+    
+    if solution_data is None:
+        async with service_pool.limit("openai"):
+            with stage_timer.stage("llm"):
+                solution_data = await math_solver.generate_solution_from_web_async(
+                    sanitized_query,
+                    web_context
+                )
+    
+    return _finish_response(sanitized_query, kb_results, routing_decision, solution_data)
+
+async def _route_and_search(sanitized_query: str, kb_results: Optional[list] = None) -> tuple:
+    """Steps 2-4 up to the LLM: (kb_results, routing_decision, solution or None, web context or None)
+    
+    When a KB miss is likely, web search starts alongside KB search and routing
+    and is cancelled if the knowledge base or the local solver answers.
+    """
+    await _ensure_initialized(*solve_components)
+    web_task = None
+    if Config.SPECULATIVE_SEARCH and kb_results is None and speculation.predict_miss(sanitized_query):
+        web_task = asyncio.ensure_future(_web_context(sanitized_query))
+        web_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        started = time.monotonic()
+    
+    try:
+        kb_results, routing_decision, solution_data = await _route_and_solve_locally(sanitized_query, kb_results)
+    except BaseException:
+        if web_task is not None:
+            web_task.cancel()
+        raise
+    web_needed = solution_data is None
+    
+    if web_task is None:
+        speculation.record(sanitized_query, speculated=False, web_needed=web_needed)
+        web_context = await _web_context(sanitized_query) if web_needed else None
+        return kb_results, routing_decision, solution_data, web_context
+    
+    if not web_needed:
+        # Speculation lost: drop the web search
+        cancelled = not web_task.done()
+        web_task.cancel()
+        speculation.record(sanitized_query, speculated=True, web_needed=False, cancelled=cancelled)
+        return kb_results, routing_decision, solution_data, None
+    
+    speculation.record(sanitized_query, speculated=True, web_needed=True, overlap_seconds=time.monotonic() - started)
+    return kb_results, routing_decision, None, await web_task
+
+async def _route_and_solve_locally(sanitized_query: str, kb_results: Optional[list] = None) -> tuple:
+    """Steps 2-4 without the web/LLM path: (kb_results, routing_decision, solution or None)"""
+    # Step 2: Knowledge Base Search (RAG)
+    if kb_results is None:
+        with stage_timer.stage("kb_search"):
+            kb_results = await service_pool.run(
+                "knowledge_base",
+                knowledge_base.search_similar_questions,
+                sanitized_query
+            )
+        _observe_kb_results(kb_results)
+    
+    # Step 3: Intelligent Routing (local model, microseconds; no need for the pool)
+    with stage_timer.stage("routing"):
+        routing_decision = routing_agent.route_question(sanitized_query, kb_results)
+    
+    solution_data = None
+    
+    # Step 4: Route to appropriate solver
+    # Routine polynomial problems are solved exactly in-process (in the pool: exact arithmetic is CPU-bound),
+    # ahead of any KB match that is not the question itself
+    exact_match = bool(kb_results) and (
+        ResponseCache.normalize_key(kb_results[0]["question"]) == ResponseCache.normalize_key(sanitized_query)
+    )
+    if not exact_match:
+        with stage_timer.stage("local_solver"):
+            solution_data = await service_pool.run(
+                "local_solver",
+                math_solver.generate_solution_locally,
+                sanitized_query
+            )
+    
+    if solution_data is None and routing_decision["use_knowledge_base"] and kb_results:
+        # Use Knowledge Base solution (RAG)
+        best_match = kb_results[0]
+        solution_data = math_solver.generate_solution_from_kb(
+            sanitized_query,
+            best_match["solution"]
+        )
+        solution_data["similar_question"] = best_match["question"]
+        solution_data["similarity_score"] = best_match["similarity_score"]
+    
+    return kb_results, routing_decision, solution_data
+
+def _observe_kb_results(kb_results: list):
+    if kb_results:
+        kb_top_score.observe(kb_results[0]["similarity_score"])
+    else:
+        kb_no_match_total.inc()
+
+async def _web_context(sanitized_query: str) -> dict:
+    """Web Search with MCP; an empty context makes the solver answer directly"""
+    with stage_timer.stage("web_search"):
+        web_results = await service_pool.run(
+            "web_search",
+            web_searcher.search_math_solution,
+            sanitized_query
+        )
+    if web_results["success"] and web_results["has_mathematical_content"]:
+        return web_results
+    # Fallback to direct AI solution
+    return {}
+
+def _finish_response(sanitized_query: str, kb_results: list, routing_decision: dict, solution_data: dict,
+                     cache: bool = True) -> dict:
+    """Step 5 plus bookkeeping: counters, output guardrails and the response cache (unless cache is False)"""
+    solution_sources.increment("requests")
+    solution_sources.increment(solution_data.get("source", "unknown"))
+    solutions_total.inc(solution_data.get("source", "unknown"))
+    
+    # Step 5: AI Gateway - Output Guardrails
+    with stage_timer.stage("output_guardrails"):
         output_validation = ai_gateway.process_output(
             solution_data.get("final_answer", ""),
             solution_data.get("steps", [])
         )
-        
-        response_data = {
-            "question": math_question.question,
-            "solution": solution_data,
-            "routing_decision": routing_decision,
-            "formatted_solution": output_validation["formatted_solution"],
-            "kb_matches_found": len(kb_results),
-            "system_architecture": "Agentic-RAG with MCP"
-        }
-        
-        return response_data
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    response_data = {
+        "question": sanitized_query,
+        "solution": solution_data,
+        "routing_decision": routing_decision,
+        "formatted_solution": output_validation["formatted_solution"],
+        "kb_matches_found": len(kb_results),
+        "system_architecture": "Agentic-RAG with MCP",
+        "cache_hit": False
+    }
+    
+    # Fallback and partial answers are failures, don't pin them in the cache
+    if cache and solution_data.get("source") != "fallback":
+        response_cache.set(sanitized_query, response_data)
+    
+    return response_data
 
 @app.post("/provide-feedback")
 async def provide_feedback(feedback_request: FeedbackRequest):
     """Human-in-the-loop feedback endpoint"""
-    feedback_result = feedback_agent.process_feedback(
+    await _ensure_initialized(feedback_agent)
+    feedback_result = await service_pool.run(
+        "feedback",
+        feedback_agent.process_feedback,
         feedback_request.question,
         feedback_request.original_solution,
         feedback_request.feedback
@@ -123,9 +518,35 @@ async def provide_feedback(feedback_request: FeedbackRequest):
     return feedback_result
 
 @app.get("/feedback-stats")
-async def get_feedback_stats():
-    """Get feedback system statistics"""
-    return feedback_agent.get_feedback_stats()
+async def get_feedback_stats(window: Optional[str] = None):
+    """Get feedback system statistics; ?window=1h|1d|... for a rolling window"""
+    await _ensure_initialized(feedback_agent)
+    try:
+        return feedback_agent.get_feedback_stats(window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/kb-stats")
+async def get_kb_stats():
+    """Knowledge base size, feedback promotion and KB hit rate over time"""
+    def hit_rate(counts):
+        return counts.get("knowledge_base", 0) / counts["requests"] if counts.get("requests") else 0.0
+    
+    await _ensure_initialized(knowledge_base, feedback_promoter)
+    return {
+        "points": knowledge_base.next_id,
+        "index": knowledge_base.index_stats(),
+        "promotion": feedback_promoter.stats(),
+        "kb_hit_rate": {
+            "1h": hit_rate(solution_sources.window(3600)),
+            "24h": hit_rate(solution_sources.window(86400)),
+            "all_time": hit_rate(solution_sources.totals)
+        },
+        "hourly": [
+            {"start": step["start"], "requests": step["counts"].get("requests", 0), "kb_hit_rate": hit_rate(step["counts"])}
+            for step in solution_sources.series(86400, 3600)
+        ]
+    }
 
 @app.get("/system-info")
 async def system_info():
@@ -0,0 +1,103 @@
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class LocalSearchHandler(BaseHTTPRequestHandler):
+    """Answers POST /search like the Tavily API with canned math content"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        if self.path != "/search":
+            self._send(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "invalid JSON"})
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency)
+        if random.random() < self.server.fail_rate:
+            self._send(503, {"error": "simulated failure"})
+            return
+        if random.random() < self.server.empty_rate:
+            self._send(200, {"query": payload.get("query", ""), "answer": None, "results": []})
+            return
+
+        query = payload.get("query", "")
+        results = [
+            {
+                "title": f"Worked example {i + 1}",
+                "url": f"http://localhost/examples/{i + 1}",
+                "content": f"Step 1: Write down {query}. Step 2: Apply the standard formula. Therefore x = {i + 2}.",
+                "score": round(0.9 - 0.1 * i, 2)
+            }
+            for i in range(int(payload.get("max_results", 3)))
+        ]
+        self._send(200, {
+            "query": query,
+            "answer": f"The solution to {query} follows from the standard formula." if payload.get("include_answer") else None,
+            "results": results
+        })
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self._send(404, {"error": "not found"})
+            return
+        self._send(200, {"connections": self.server.connections, "requests": self.server.requests})
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def create_server(host: str = "127.0.0.1", port: int = 8900, latency: float = 0.0,
+                  fail_rate: float = 0.0, empty_rate: float = 0.0) -> ThreadingHTTPServer:
+    """Stand-in search server for offline runs; point SEARCH_API_URL at it"""
+    server = ThreadingHTTPServer((host, port), LocalSearchHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.empty_rate = empty_rate
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the web search API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every search")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of searches answered with 503")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="Fraction of searches answered with no results")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.latency_ms / 1000.0, args.fail_rate, args.empty_rate)
+    print(f"✅ Local search server on http://{args.host}:{args.port} (set SEARCH_API_URL to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
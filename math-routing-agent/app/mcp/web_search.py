@@ -0,0 +1,166 @@
+import re
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional
+from app.config import Config
+from app.cache.response_cache import ResponseCache
+
+MATH_CONTENT_PATTERN = re.compile(
+    r'\d\s*[+\-*/^=]\s*\d|[a-z]\s*[\^²³]|=|∫|√|π'
+    r'|\b(?:equation|derivative|integral|formula|theorem|solve|solution|answer)\b',
+    re.IGNORECASE
+)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class MCPSearch:
+    """Web search client (Tavily-compatible API) for the MCP search step
+
+    One keep-alive requests.Session with a bounded connection pool serves
+    every call. Each call has connect/read timeouts and an overall deadline
+    that also bounds retries (exponential backoff with full jitter).
+    Results are cached per normalized query; empty results only for
+    negative_ttl seconds, so a transient outage or a momentarily empty index
+    does not pin the web path off for the full TTL. Failures are never cached.
+    """
+    def __init__(self, api_key: Optional[str] = None, base_url: str = Config.SEARCH_API_URL,
+                 max_results: int = 3, connect_timeout: float = Config.SEARCH_CONNECT_TIMEOUT,
+                 read_timeout: float = Config.SEARCH_READ_TIMEOUT, deadline: float = Config.SEARCH_DEADLINE_SECONDS,
+                 max_retries: int = Config.SEARCH_MAX_RETRIES, backoff_seconds: float = 0.1,
+                 pool_size: int = Config.WEB_SEARCH_CONCURRENCY,
+                 cache: Optional[ResponseCache] = None,
+                 negative_ttl: float = Config.SEARCH_NEGATIVE_TTL_SECONDS):
+        self.api_key = api_key
+        self.search_url = base_url.rstrip("/") + "/search"
+        self.max_results = max_results
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.negative_ttl = negative_ttl
+        self.cache = cache or ResponseCache(
+            max_size=Config.SEARCH_CACHE_SIZE,
+            ttl_seconds=Config.SEARCH_CACHE_TTL_SECONDS
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_latency = 0.0
+
+    def search_math_solution(self, query: str) -> Dict[str, Any]:
+        """Search the web for a math question; never raises"""
+        cached = self.cache.get(query)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        if not self.api_key and "api.tavily.com" in self.search_url:
+            return self._failure("No search API key configured")
+
+        started = time.monotonic()
+        try:
+            data = self._post({
+                "api_key": self.api_key or "",
+                "query": f"{query} step by step solution",
+                "search_depth": "basic",
+                "include_answer": True,
+                "max_results": self.max_results
+            }, started)
+        except (requests.RequestException, ValueError) as e:
+            with self._lock:
+                self.failures += 1
+            return self._failure(f"Web search failed: {str(e)}")
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.total_latency += time.monotonic() - started
+
+        result = self._to_result(data)
+        self.cache.set(query, result, ttl_seconds=None if result["success"] else self.negative_ttl)
+        return {**result, "cached": False}
+
+    def _post(self, payload: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """POST with per-attempt timeouts, jittered retries and an overall deadline"""
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                raise requests.Timeout(f"search deadline of {self.deadline}s exceeded")
+            try:
+                response = self.session.post(
+                    self.search_url,
+                    json=payload,
+                    timeout=(min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+                )
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    body = response.json()
+                    if not isinstance(body, dict):
+                        raise ValueError(f"search API returned a JSON {type(body).__name__}, expected an object")
+                    return body
+                error: Exception = requests.HTTPError(f"{response.status_code} from search API", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            attempt += 1
+            backoff = random.uniform(0, self.backoff_seconds * (2 ** attempt))
+            if attempt > self.max_retries or time.monotonic() - started + backoff >= self.deadline:
+                raise error
+            with self._lock:
+                self.retries += 1
+            time.sleep(backoff)
+
+    def _to_result(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Search result from an API body; fields of unexpected types are ignored"""
+        answer = data.get("answer")
+        answer = answer if isinstance(answer, str) else ""
+        results = data.get("results")
+        results = [item for item in results if isinstance(item, dict)] if isinstance(results, list) else []
+        sources: List[Dict[str, Any]] = [
+            {
+                "title": str(item.get("title") or ""),
+                "url": str(item.get("url") or ""),
+                "content": str(item.get("content") or ""),
+                "score": item.get("score", 0.0)
+            }
+            for item in results[:self.max_results]
+        ]
+        text = " ".join([answer] + [source["content"] for source in sources])
+        return {
+            "success": bool(answer or sources),
+            "has_mathematical_content": MATH_CONTENT_PATTERN.search(text) is not None,
+            "answer": answer,
+            "sources": sources
+        }
+
+    @staticmethod
+    def _failure(error: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "has_mathematical_content": False,
+            "answer": "",
+            "sources": [],
+            "error": error
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "avg_latency_ms": self.total_latency / self.calls * 1000 if self.calls else 0.0,
+            "cache": self.cache.stats()
+        }
+
+    def close(self):
+        self.session.close()
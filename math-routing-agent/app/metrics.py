@@ -0,0 +1,210 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+class RollingCounter:
+    """Named event counts in fixed-size time buckets, for rates over time"""
+    def __init__(self, bucket_seconds: int = 60, retention_seconds: int = 24 * 3600):
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+        self.totals: Dict[str, int] = {}
+        self._buckets: Dict[int, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    def increment(self, name: str, count: int = 1):
+        bucket = int(time.time()) // self.bucket_seconds
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0) + count
+            counts = self._buckets.get(bucket)
+            if counts is None:
+                counts = self._buckets[bucket] = {}
+                horizon = bucket - self.retention_seconds // self.bucket_seconds
+                for old in [b for b in self._buckets if b < horizon]:
+                    del self._buckets[old]
+            counts[name] = counts.get(name, 0) + count
+    
+    def window(self, seconds: int) -> Dict[str, int]:
+        """Counts over the trailing window"""
+        start = int(time.time() - seconds) // self.bucket_seconds
+        totals: Dict[str, int] = {}
+        with self._lock:
+            for bucket, counts in self._buckets.items():
+                if bucket >= start:
+                    for name, count in counts.items():
+                        totals[name] = totals.get(name, 0) + count
+        return totals
+    
+    def series(self, seconds: int, step_seconds: int) -> List[Dict[str, Any]]:
+        """Counts grouped into step-sized intervals over the trailing window, oldest first"""
+        now = int(time.time())
+        start = now - seconds
+        steps: Dict[int, Dict[str, int]] = {}
+        with self._lock:
+            for bucket, counts in self._buckets.items():
+                bucket_start = bucket * self.bucket_seconds
+                if bucket_start >= start - self.bucket_seconds:
+                    step = bucket_start // step_seconds * step_seconds
+                    totals = steps.setdefault(step, {})
+                    for name, count in counts.items():
+                        totals[name] = totals.get(name, 0) + count
+        return [{"start": step, "counts": steps[step]} for step in sorted(steps)]
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SCORE_BUCKETS = (0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """Prometheus counter with optional labels"""
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.label_names:
+            values[()] = 0
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Prometheus histogram with fixed buckets and optional labels"""
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1], series[2]) for labels, series in sorted(self._series.items())]
+        for label_values, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, label_values)} {repr(float(total))}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, label_values)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds counters and histograms and renders them in the Prometheus text format"""
+    CONTENT_TYPE = "text/plain; version=0.0.4"
+    
+    def __init__(self):
+        self._metrics: List[Any] = []
+    
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+    
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Stage timings of the request being handled; set by ServerTimingMiddleware
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+class StageTimer:
+    """Times pipeline stages into a histogram and into the current request's Server-Timing breakdown"""
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.histogram.observe(elapsed, name)
+            timings = _request_stages.get()
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + elapsed
+    
+    @staticmethod
+    def server_timing(timings: Dict[str, float]) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+class ServerTimingMiddleware:
+    """ASGI middleware: per-request stage breakdown as a Server-Timing header, plus request latency
+
+    Streaming responses send their headers first, so they only carry the
+    stages finished before the stream started.
+    """
+    def __init__(self, app, timer: StageTimer, request_histogram: Histogram):
+        self.app = app
+        self.timer = timer
+        self.request_histogram = request_histogram
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timings: Dict[str, float] = {}
+        token = _request_stages.set(timings)
+        started = time.perf_counter()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings["total"] = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", self.timer.server_timing(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stages.reset(token)
+            route = scope.get("route")
+            self.request_histogram.observe(time.perf_counter() - started, getattr(route, "path", "unmatched"))
@@ -1,10 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class MathQuestion(BaseModel):
     question: str
     user_id: Optional[str] = None
 
+class MathQuestionBatch(BaseModel):
+    questions: List[str]
+    user_id: Optional[str] = None
+
 class FeedbackRequest(BaseModel):
     question: str
     original_solution: Dict[str, Any]
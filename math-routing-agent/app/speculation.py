@@ -0,0 +1,78 @@
+import threading
+from typing import Any, Dict
+from app.knowledge_base.encoder import SimpleEncoder
+
+class SpeculationPolicy:
+    """Predicts likely KB misses so web search can start alongside KB search and routing
+
+    The prediction is a cheap pre-check: questions already in the knowledge
+    base never speculate; otherwise the observed share of requests in the
+    question's topic that still needed the web decides. A topic with fewer
+    than min_samples recorded requests has no estimate yet and does not
+    speculate. Outcomes feed back through record(), which also keeps the
+    speculation hit/waste counters.
+    """
+    def __init__(self, knowledge_base, miss_rate_threshold: float = 0.5, min_samples: int = 20):
+        self.knowledge_base = knowledge_base
+        self.miss_rate_threshold = miss_rate_threshold
+        self.min_samples = min_samples
+        self._topic_counts: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.speculated = 0
+        self.hits = 0
+        self.wasted = 0
+        self.cancelled = 0
+        self.missed = 0
+        self.overlap_seconds = 0.0
+
+    @staticmethod
+    def topic(question: str) -> str:
+        question_lower = question.lower()
+        for topic, keywords in SimpleEncoder.MATH_TOPICS.items():
+            if any(keyword in question_lower for keyword in keywords):
+                return topic
+        return "general"
+
+    def predict_miss(self, question: str) -> bool:
+        """True if the question will probably need the web path"""
+        if self.knowledge_base.has_question(question):
+            return False
+        with self._lock:
+            web_needed, total = self._topic_counts.get(self.topic(question), (0, 0))
+        if total < self.min_samples:
+            return False
+        return web_needed / total >= self.miss_rate_threshold
+
+    def record(self, question: str, speculated: bool, web_needed: bool, cancelled: bool = False,
+               overlap_seconds: float = 0.0):
+        """Record one routed request; overlap_seconds is web search time hidden behind KB + routing"""
+        topic = self.topic(question)
+        with self._lock:
+            counts = self._topic_counts.setdefault(topic, [0, 0])
+            counts[0] += int(web_needed)
+            counts[1] += 1
+            if speculated:
+                self.speculated += 1
+                if web_needed:
+                    self.hits += 1
+                    self.overlap_seconds += overlap_seconds
+                else:
+                    self.wasted += 1
+                    self.cancelled += int(cancelled)
+            elif web_needed:
+                self.missed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "speculated": self.speculated,
+                "hits": self.hits,
+                "wasted": self.wasted,
+                "cancelled_in_flight": self.cancelled,
+                "missed": self.missed,
+                "hit_rate": self.hits / self.speculated if self.speculated else 0.0,
+                "avg_overlap_ms": self.overlap_seconds / self.hits * 1000 if self.hits else 0.0,
+                "topic_web_rate": {
+                    topic: web_needed / total for topic, (web_needed, total) in sorted(self._topic_counts.items())
+                }
+            }
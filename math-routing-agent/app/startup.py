@@ -0,0 +1,82 @@
+import time
+import importlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+class StartupReport:
+    """Wall time spent on module imports and component initialization"""
+    def __init__(self):
+        self.created_at = time.monotonic()
+        self.imports: Dict[str, float] = {}
+        self.components: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure_import(self, name: str) -> Iterator[None]:
+        """Time the imports inside the block (modules already loaded cost nothing)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_import(name, time.perf_counter() - started)
+
+    def record_import(self, name: str, seconds: float):
+        with self._lock:
+            self.imports[name] = self.imports.get(name, 0.0) + seconds
+
+    def record_component(self, name: str, seconds: float):
+        with self._lock:
+            self.components[name] = seconds
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_seconds": time.monotonic() - self.created_at,
+                "imports_ms": {name: seconds * 1000 for name, seconds in self.imports.items()},
+                "components_ms": {name: seconds * 1000 for name, seconds in self.components.items()},
+                "total_import_ms": sum(self.imports.values()) * 1000,
+                "total_component_ms": sum(self.components.values()) * 1000
+            }
+
+class LazyComponent:
+    """Proxy that imports and constructs a component on first attribute access
+
+    target is "module:attribute"; the module import and the constructor call
+    are timed separately in the startup report. Construction happens once,
+    under a lock, so concurrent first uses share one instance.
+    """
+    def __init__(self, name: str, target: str, report: StartupReport, *args, **kwargs):
+        self._name = name
+        self._target = target
+        self._report = report
+        self._args = args
+        self._kwargs = kwargs
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        """The component instance, built on first call"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                module_name, attribute = self._target.split(":")
+                with self._report.measure_import(module_name):
+                    factory = getattr(importlib.import_module(module_name), attribute)
+                started = time.perf_counter()
+                self._instance = factory(*self._args, **self._kwargs)
+                self._report.record_component(self._name, time.perf_counter() - started)
+            return self._instance
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.get(), attribute)
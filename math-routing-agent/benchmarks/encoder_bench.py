@@ -0,0 +1,96 @@
+import time
+import random
+import numpy as np
+from typing import List
+from app.knowledge_base.encoder import SimpleEncoder
+
+def legacy_encode(text: str, vector_size: int = 384) -> List[float]:
+    """Original per-string SimpleEncoder.encode, kept as the reference baseline"""
+    vector = [0.0] * vector_size
+    if not text:
+        return vector
+
+    text_lower = text.lower()
+
+    for i, symbol in enumerate(SimpleEncoder.MATH_SYMBOLS):
+        if i < len(vector):
+            vector[i] = text.count(symbol) / len(text)
+
+    idx = 50
+    for topic, keywords in SimpleEncoder.MATH_TOPICS.items():
+        if idx < len(vector):
+            vector[idx] = sum(1 for keyword in keywords if keyword in text_lower)
+            idx += 1
+
+    words = text_lower.split()
+    for i, word in enumerate(words[:100]):
+        if 100 + i < len(vector):
+            vector[100 + i] = 1.0
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = [v / norm for v in vector]
+
+    return vector
+
+def generate_questions(count: int, seed: int = 42) -> List[str]:
+    """Generate synthetic math questions with a realistic symbol/keyword mix"""
+    rng = random.Random(seed)
+    templates = [
+        "Solve the quadratic equation: {a}x² - {b}x + {c} = 0",
+        "Find the derivative of f(x) = {a}x^3 + {b}x - {c}",
+        "Calculate the area of a circle with radius {a} cm",
+        "Evaluate the integral of ∫({a}x^2 + {b}x + {c}) dx from 0 to {a}",
+        "If sin θ = {a}/{b}, find cos θ and tan θ for the triangle",
+        "Find the limit of ({a}x + {b}) / (x - {c}) as x approaches infinity",
+        "The volume of a sphere is {a}π, what is the radius?",
+    ]
+    return [
+        rng.choice(templates).format(a=rng.randint(1, 99), b=rng.randint(1, 99), c=rng.randint(1, 99))
+        for _ in range(count)
+    ]
+
+def run_encoder_benchmark(count: int = 20000, batch_size: int = 1024, repeats: int = 3):
+    """Compare legacy per-string encoding against SimpleEncoder.encode_batch"""
+    encoder = SimpleEncoder()
+    texts = generate_questions(count)
+
+    print("🧮 SIMPLE ENCODER BENCHMARK")
+    print("=" * 60)
+
+    # Correctness: batch output must match the reference loop
+    sample = texts[:500] + ["", "   ", "√π θ α β + - * / = ^"]
+    expected = np.array([legacy_encode(t) for t in sample], dtype=np.float32)
+    actual = encoder.encode_batch(sample)
+    max_error = float(np.abs(expected - actual).max())
+    print(f"Max abs difference vs legacy: {max_error:.2e}")
+    assert max_error < 1e-6, "encode_batch diverges from legacy encoder"
+
+    def best_of(fn) -> float:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    legacy_time = best_of(lambda: [legacy_encode(t) for t in texts])
+    batch_time = best_of(lambda: [encoder.encode_batch(texts[i:i + batch_size]) for i in range(0, count, batch_size)])
+
+    legacy_rate = count / legacy_time
+    batch_rate = count / batch_time
+
+    print(f"Texts: {count}, batch size: {batch_size}")
+    print(f"Legacy encode:  {legacy_rate:>12,.0f} texts/sec")
+    print(f"encode_batch:   {batch_rate:>12,.0f} texts/sec")
+    print(f"Speedup:        {batch_rate / legacy_rate:>12.1f}x")
+
+    return {
+        "legacy_texts_per_sec": legacy_rate,
+        "batch_texts_per_sec": batch_rate,
+        "speedup": batch_rate / legacy_rate,
+        "max_abs_error": max_error
+    }
+
+if __name__ == "__main__":
+    run_encoder_benchmark()
@@ -0,0 +1,170 @@
+import json
+import time
+import random
+import argparse
+import numpy as np
+from typing import Any, Dict, Iterator, List
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.quantized import QuantizedVectorStore, normalize_rows
+from app.knowledge_base.sparse_index import SparseFeatureIndex
+from app.knowledge_base.hnsw_index import HNSWIndex
+from app.knowledge_base.partitioned import PartitionedIndex
+from benchmarks.encoder_bench import generate_questions
+
+MIXED_VOCABULARY = (
+    "solve find the of a and is what if for with evaluate calculate show prove value equation polynomial quadratic "
+    "variable derivative integral limit integrate differentiate area volume angle triangle circle radius sin cos "
+    "tan x y z = + - * / ^ √ π θ α β"
+).split()
+
+def generate_mixed_questions(count: int, seed: int = 42) -> List[str]:
+    """Random mixes of math words and symbols; unlike the templates they encode to many distinct vectors"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(MIXED_VOCABULARY) for _ in range(rng.randint(4, 40))) for _ in range(count)]
+
+BANKS = {"templates": generate_questions, "mixed": generate_mixed_questions}
+
+def encode_bank(size: int, seed: int = 7, batch_size: int = 10000, bank: str = "templates") -> np.ndarray:
+    """Encoded synthetic question bank of the given size"""
+    encoder = SimpleEncoder()
+    vectors = np.zeros((size, encoder.vector_size), dtype=np.float32)
+    for offset in range(0, size, batch_size):
+        count = min(batch_size, size - offset)
+        vectors[offset:offset + count] = encoder.encode_batch(BANKS[bank](count, seed=seed + offset))
+    return vectors
+
+def exact_kth_scores(vectors: np.ndarray, queries: np.ndarray, top_k: int, chunk_size: int = 50000) -> np.ndarray:
+    """Exact k-th best cosine score per query, the recall baseline"""
+    queries = normalize_rows(queries)
+    best = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        scores = np.concatenate([best, queries @ normalize_rows(vectors[start:start + chunk_size]).T], axis=1)
+        best = -np.partition(-scores, top_k - 1, axis=1)[:, :top_k] if scores.shape[1] > top_k else scores
+    return best.min(axis=1)
+
+def recall_at_k(vectors: np.ndarray, queries: np.ndarray, kth: np.ndarray, actual: List[List[int]],
+                top_k: int) -> float:
+    """Share of returned ids that belong to the exact top-k, averaged over queries
+
+    Membership is decided by exact score (>= the k-th best), so ties between
+    identical vectors do not count as misses.
+    """
+    queries = normalize_rows(queries)
+    found = 0
+    for query, ids, threshold in zip(queries, actual, kth):
+        if ids:
+            found += int(np.sum(normalize_rows(vectors[ids]) @ query >= threshold - 1e-6))
+    return found / (len(queries) * top_k)
+
+def latency_ms(search, queries: np.ndarray) -> Dict[str, float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99))
+    }
+
+STORAGES = ["float32", "int8", "sparse", "hnsw"]
+
+def make_store(storage: str, encoder: SimpleEncoder, hnsw_m: int = 16, ef_construction: int = 200,
+               route_confidence: float = 0.6, partition_workers: int = 0):
+    if storage.startswith("partitioned-"):
+        options = {"m": hnsw_m, "ef_construction": ef_construction}
+        return PartitionedIndex(encoder, storage[len("partitioned-"):], options, route_confidence, partition_workers)
+    if storage == "sparse":
+        return SparseFeatureIndex(encoder)
+    if storage == "hnsw":
+        return HNSWIndex(encoder.vector_size, m=hnsw_m, ef_construction=ef_construction)
+    return QuantizedVectorStore(encoder.vector_size, storage)
+
+def query_settings(store, rescore_factors: List[int], ef_searches: List[int]) -> Iterator[str]:
+    """Apply each query-time setting of the store in turn, yielding its label"""
+    if store.storage == "int8":
+        for factor in rescore_factors:
+            store.rescore_factor = factor
+            yield f"rescore x{factor}"
+    elif store.storage == "hnsw":
+        for ef in ef_searches:
+            store.ef_search = ef
+            yield f"M{store.m} ef{ef}"
+    elif isinstance(store, PartitionedIndex):
+        yield f"routed {store.route_confidence:g}"
+    else:
+        yield "exact"
+
+def run_storage_benchmark(size: int, queries: int = 200, top_k: int = 3, rescore_factors: List[int] = (1, 2, 4, 8),
+                          storages: List[str] = ("float32", "int8", "sparse", "hnsw"), hnsw_m: int = 16,
+                          ef_construction: int = 200, ef_searches: List[int] = (16, 64, 256),
+                          route_confidence: float = 0.6, partition_workers: int = 0,
+                          bank: str = "templates") -> List[Dict[str, Any]]:
+    """Recall@k, latency, build time and memory of each index backend against exact search"""
+    print("🧮 KNOWLEDGE BASE VECTOR STORAGE BENCHMARK")
+    print("=" * 60)
+    encoder = SimpleEncoder()
+    vectors = encode_bank(size, bank=bank)
+    query_vectors = encoder.encode_batch(BANKS[bank](queries, seed=99))
+    kth = exact_kth_scores(vectors, query_vectors, top_k)
+    print(f"Points: {size:,} ({bank} bank), queries: {queries}, k={top_k}")
+    print(f"Plain float32 matrix: {vectors.nbytes / 2**20:,.1f} MiB")
+
+    rows = []
+    for storage in storages:
+        store = make_store(storage, encoder, hnsw_m, ef_construction, route_confidence, partition_workers)
+        started = time.perf_counter()
+        # Reference the originals the way a snapshot memory map would be, in snapshot-sized inserts
+        for offset in range(0, size, store.chunk_size):
+            store.set(offset, vectors[offset:offset + store.chunk_size], keep_originals=False)
+        store.search(query_vectors[:1], top_k)
+        build_seconds = time.perf_counter() - started
+        for setting in query_settings(store, rescore_factors, ef_searches):
+            actual = [[point_id for point_id, _ in hits] for hits in store.search(query_vectors, top_k)]
+            row = {
+                "size": size,
+                "storage": storage,
+                "setting": setting,
+                f"recall@{top_k}": recall_at_k(vectors, query_vectors, kth, actual, top_k),
+                "build_s": build_seconds,
+                "index_mib": store.memory_bytes() / 2**20,
+                **latency_ms(lambda query: store.search(query, top_k), query_vectors)
+            }
+            rows.append(row)
+            print(f"{storage:20} {setting:12} recall@{top_k} {row[f'recall@{top_k}']:.4f}  build {build_seconds:7.1f} s  "
+                  f"index {row['index_mib']:8.1f} MiB  p50 {row['p50_ms']:7.3f} ms  p99 {row['p99_ms']:7.3f} ms")
+        store.close()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall, latency and memory of the knowledge base index backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000],
+                        help="Bank sizes to index (10^7 needs ~15 GiB for the float32 bank alone)")
+    parser.add_argument("--bank", choices=sorted(BANKS), default="templates",
+                        help="templates: the question templates (few distinct vectors); mixed: random math word mixes")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--storages", nargs="+", default=STORAGES,
+                        choices=STORAGES + [f"partitioned-{storage}" for storage in STORAGES],
+                        help="Backends; partitioned-<backend> routes queries to per-topic sub-indexes")
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--route-confidence", type=float, default=0.6)
+    parser.add_argument("--partition-workers", type=int, default=0,
+                        help="Worker processes for partitioned backends (0 = in-process)")
+    parser.add_argument("--output", help="Write the result rows as JSON to this path")
+    args = parser.parse_args()
+    rows = []
+    for size in args.sizes:
+        rows += run_storage_benchmark(size, args.queries, args.top_k, args.rescore_factors, args.storages,
+                                      args.hnsw_m, args.ef_construction, args.ef_search, args.route_confidence,
+                                      args.partition_workers, args.bank)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,216 @@
+import time
+import json
+import random
+import argparse
+import threading
 import requests
+import numpy as np
 import pandas as pd
-from typing import List, Dict
-import json
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 
+# Templates for questions the seed knowledge base does not hold; random
+# coefficients keep them from being answered by the response cache
+MISS_TEMPLATES = [
+    ("Solve the equation: {a}x^2 - {b}x + {c} = 0", "algebra"),
+    ("Solve for x: {a}x + {b} = {c}", "algebra"),
+    ("Find the derivative of f(x) = {a}x^3 + {b}x^2 - {c}x", "calculus"),
+    ("Calculate the integral of ∫({a}x^2 + {b}x + {c}) dx from 0 to 2", "calculus"),
+    ("If sin θ = {a}/{d}, find cos θ and tan θ", "trigonometry"),
+    ("Find the volume of a sphere with radius {a} cm", "geometry"),
+]
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    if not latencies:
+        return {"count": 0}
+    values = np.array(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p90_ms": round(float(np.percentile(values, 90)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2)
+    }
+
+class QuestionMix:
+    """Draws questions so that roughly hit_ratio of them are knowledge base hits"""
+    def __init__(self, kb_questions: List[Dict], hit_ratio: float = 0.5, seed: int = 42):
+        self.kb_questions = kb_questions
+        self.hit_ratio = hit_ratio
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next(self) -> Dict[str, str]:
+        with self._lock:
+            if self.kb_questions and self.rng.random() < self.hit_ratio:
+                item = self.rng.choice(self.kb_questions)
+                return {"question": item["question"], "category": item["category"], "expected": "kb_hit"}
+            template, category = self.rng.choice(MISS_TEMPLATES)
+            a, b, c = (self.rng.randint(2, 99) for _ in range(3))
+            question = template.format(a=a, b=b, c=c, d=a + self.rng.randint(1, 50))
+            return {"question": question, "category": category, "expected": "kb_miss"}
+
+class LoadGenerator:
+    """Concurrent load against /solve-math with a warm-up and a steady-state phase
+
+    With rate > 0 the load is open-loop: request i is due at i / rate seconds
+    and its latency is measured from that due time, so a saturated server
+    shows up as queueing delay instead of a silently lower request rate.
+    With rate == 0 every worker sends back to back (closed loop).
+    Only steady-state requests count towards the latency percentiles.
+    """
+    def __init__(self, agent_url: str, mix: QuestionMix, concurrency: int = 16, rate: float = 0.0,
+                 warmup_seconds: float = 5.0, duration_seconds: float = 30.0, timeout: float = 30.0,
+                 interval_seconds: float = 1.0):
+        self.agent_url = agent_url
+        self.mix = mix
+        self.concurrency = concurrency
+        self.rate = rate
+        self.warmup_seconds = warmup_seconds
+        self.duration_seconds = duration_seconds
+        self.timeout = timeout
+        self.interval_seconds = interval_seconds
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.results: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._next_index = 0
+
+    def _claim(self) -> int:
+        with self._lock:
+            index = self._next_index
+            self._next_index += 1
+            return index
+
+    def _send(self, item: Dict[str, str], due: float, started_at: float) -> Dict[str, Any]:
+        result = {**item, "offset": due - started_at, "status": 0, "source": "error"}
+        try:
+            response = self.session.post(
+                f"{self.agent_url}/solve-math",
+                json={"question": item["question"]},
+                timeout=self.timeout
+            )
+            result["status"] = response.status_code
+            if response.status_code == 200:
+                data = response.json()
+                result["source"] = "response_cache" if data.get("cache_hit") else data["solution"].get("source", "unknown")
+            else:
+                result["error"] = f"HTTP {response.status_code}"
+        except Exception as e:
+            result["error"] = type(e).__name__
+        finished = time.monotonic()
+        result["latency"] = finished - due
+        result["finished"] = finished - started_at
+        return result
+
+    def _worker(self, started_at: float):
+        end = self.warmup_seconds + self.duration_seconds
+        while True:
+            if self.rate > 0:
+                index = self._claim()
+                offset = index / self.rate
+                if offset >= end:
+                    return
+                delay = started_at + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                due = started_at + offset
+            else:
+                due = time.monotonic()
+                if due - started_at >= end:
+                    return
+            result = self._send(self.mix.next(), due, started_at)
+            result["phase"] = "warmup" if result["offset"] < self.warmup_seconds else "steady"
+            with self._lock:
+                self.results.append(result)
+
+    def run(self) -> Dict[str, Any]:
+        started_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for _ in range(self.concurrency):
+                pool.submit(self._worker, started_at)
+        return self.report()
+
+    def _group(self, results: List[Dict[str, Any]], key: str) -> Dict[str, Dict[str, float]]:
+        groups: Dict[str, List[float]] = {}
+        for result in results:
+            groups.setdefault(result[key], []).append(result["latency"])
+        return {name: percentiles(latencies) for name, latencies in sorted(groups.items())}
+
+    def _timeline(self) -> List[Dict[str, Any]]:
+        """Completions and errors per interval, with that interval's p99"""
+        buckets: Dict[int, List[Dict[str, Any]]] = {}
+        for result in self.results:
+            buckets.setdefault(int(result["finished"] // self.interval_seconds), []).append(result)
+        timeline = []
+        for bucket in sorted(buckets):
+            results = buckets[bucket]
+            latencies = [r["latency"] for r in results]
+            timeline.append({
+                "start_s": round(bucket * self.interval_seconds, 3),
+                "completed": len(results),
+                "errors": sum(1 for r in results if r["status"] != 200),
+                "throughput_rps": round(len(results) / self.interval_seconds, 2),
+                "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 2)
+            })
+        return timeline
+
+    def report(self) -> Dict[str, Any]:
+        steady = [r for r in self.results if r["phase"] == "steady"]
+        ok = [r for r in steady if r["status"] == 200]
+        errors: Dict[str, int] = {}
+        for result in steady:
+            if result["status"] != 200:
+                errors[result["error"]] = errors.get(result["error"], 0) + 1
+        return {
+            "config": {
+                "agent_url": self.agent_url,
+                "concurrency": self.concurrency,
+                "rate": self.rate,
+                "warmup_seconds": self.warmup_seconds,
+                "duration_seconds": self.duration_seconds,
+                "hit_ratio": self.mix.hit_ratio
+            },
+            "warmup_requests": len(self.results) - len(steady),
+            "steady": {
+                "requests": len(steady),
+                "errors": errors,
+                "error_rate": round(1 - len(ok) / len(steady), 4) if steady else 0.0,
+                "throughput_rps": round(len(steady) / self.duration_seconds, 2),
+                "latency": percentiles([r["latency"] for r in ok]),
+                "by_source": self._group(ok, "source"),
+                "by_category": self._group(ok, "category"),
+                "by_expected": self._group(ok, "expected")
+            },
+            "timeline": self._timeline()
+        }
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """Print steady-state p50/p99 and throughput changes between two reports"""
+    def line(name: str, old: Dict[str, float], new: Dict[str, float]):
+        cells = []
+        for metric in ("p50_ms", "p99_ms"):
+            if metric in old and metric in new:
+                cells.append(f"{metric} {old[metric]:.1f} → {new[metric]:.1f} ({new[metric] - old[metric]:+.1f})")
+        print(f"{name:28} " + "  ".join(cells))
+
+    old, new = baseline["steady"], current["steady"]
+    print(f"{'throughput_rps':28} {old['throughput_rps']} → {new['throughput_rps']}")
+    line("overall", old["latency"], new["latency"])
+    for group in ("by_source", "by_category", "by_expected"):
+        for name in sorted(set(old[group]) & set(new[group])):
+            line(f"{group[3:]}:{name}", old[group][name], new[group][name])
+
 class JEEBenchmark:
     def __init__(self, math_agent_url: str = "http://localhost:8000"):
         self.agent_url = math_agent_url
-    
+
     def load_jee_questions(self) -> List[Dict]:
         """Sample JEE-level math questions"""
         return [
@@ -19,7 +222,7 @@ class JEEBenchmark:
             },
             {
                 "id": 2,
-                "question": "Solve the equation: 2x^2 - 5x + 2 = 0", 
+                "question": "Solve the equation: 2x^2 - 5x + 2 = 0",
                 "category": "algebra",
                 "difficulty": "easy"
             },
@@ -30,25 +233,66 @@ class JEEBenchmark:
                 "difficulty": "medium"
             }
         ]
-    
+
+    def load_kb_questions(self) -> List[Dict]:
+        """Questions held verbatim in the seed knowledge base"""
+        return [
+            {"question": "Solve the quadratic equation: x² - 5x + 6 = 0", "category": "algebra"},
+            {"question": "Find the derivative of f(x) = 3x² + 2x - 1", "category": "calculus"},
+            {"question": "Calculate the area of a circle with radius 7 cm", "category": "geometry"}
+        ]
+
+    def run_load_test(self, concurrency: int = 16, rate: float = 0.0, warmup_seconds: float = 5.0,
+                      duration_seconds: float = 30.0, hit_ratio: float = 0.5, seed: int = 42,
+                      report_path: Optional[str] = None) -> Dict[str, Any]:
+        """Run a load test and optionally write the JSON report"""
+        mix = QuestionMix(self.load_kb_questions(), hit_ratio=hit_ratio, seed=seed)
+        generator = LoadGenerator(self.agent_url, mix, concurrency=concurrency, rate=rate,
+                                  warmup_seconds=warmup_seconds, duration_seconds=duration_seconds)
+
+        print("🧮 JEE LOAD TEST")
+        print("=" * 60)
+        print(f"Concurrency: {concurrency}, rate: {rate or 'unlimited'} req/s, "
+              f"warm-up: {warmup_seconds}s, steady: {duration_seconds}s, KB hit ratio: {hit_ratio:.0%}")
+
+        report = generator.run()
+        report["generated_at"] = datetime.now().isoformat(timespec="seconds")
+        steady = report["steady"]
+
+        print("\n" + "=" * 60)
+        print("📊 LOAD TEST RESULTS")
+        print(f"Steady requests: {steady['requests']} ({steady['throughput_rps']} req/s), "
+              f"error rate: {steady['error_rate']:.1%}")
+        print(f"Latency: {steady['latency']}")
+        for group in ("by_source", "by_category", "by_expected"):
+            for name, stats in steady[group].items():
+                print(f"  {group[3:]:>8} {name:16} n={stats['count']:<6} "
+                      f"p50={stats['p50_ms']:.1f}ms p90={stats['p90_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+            print(f"✅ Report written to {report_path}")
+        return report
+
     def run_benchmark(self):
         """Run benchmark against JEE questions"""
         questions = self.load_jee_questions()
         results = []
-        
+
         print("🧮 JEE BENCHMARK TEST")
         print("=" * 60)
-        
+
         for question in questions:
             print(f"\nTesting: {question['question']}")
-            
+
             try:
                 response = requests.post(
                     f"{self.agent_url}/solve-math",
                     json={"question": question["question"]},
                     timeout=30
                 )
-                
+
                 if response.status_code == 200:
                     data = response.json()
                     results.append({
@@ -69,7 +313,7 @@ class JEEBenchmark:
                         'error': f"HTTP {response.status_code}"
                     })
                     print(f"❌ FAILED")
-                    
+
             except Exception as e:
                 results.append({
                     'question_id': question['id'],
@@ -77,24 +321,50 @@ class JEEBenchmark:
                     'error': str(e)
                 })
                 print(f"❌ ERROR: {e}")
-        
+
         # Calculate metrics
         successful = [r for r in results if r['success']]
         success_rate = len(successful) / len(results) if results else 0
-        
+
         print("\n" + "=" * 60)
         print("📊 BENCHMARK RESULTS")
         print(f"Total Questions: {len(results)}")
         print(f"Successful: {len(successful)}")
         print(f"Success Rate: {success_rate:.1%}")
-        
+
         if successful:
             sources = pd.Series([r['source'] for r in successful]).value_counts()
             print(f"Sources Used: {sources.to_dict()}")
-        
+
         return pd.DataFrame(results)
 
+def main():
+    parser = argparse.ArgumentParser(description="JEE benchmark and load generator for the math agent")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--sequential", action="store_true", help="Run the three-question correctness check only")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0.0, help="Target requests per second (0 = closed loop)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Warm-up seconds, excluded from the results")
+    parser.add_argument("--duration", type=float, default=30.0, help="Steady-state seconds")
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="Share of questions taken from the knowledge base")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", help="Write the JSON report to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    benchmark = JEEBenchmark(args.url)
+    if args.sequential:
+        results_df = benchmark.run_benchmark()
+        print(f"\nDetailed results saved for {len(results_df)} questions")
+        return
+
+    report = benchmark.run_load_test(args.concurrency, args.rate, args.warmup, args.duration,
+                                     args.hit_ratio, args.seed, args.report)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n📈 COMPARED WITH BASELINE")
+        compare_reports(baseline, report)
+
 if __name__ == "__main__":
-    benchmark = JEEBenchmark()
-    results_df = benchmark.run_benchmark()
-    print(f"\nDetailed results saved for {len(results_df)} questions")
\ No newline at end of file
+    main()
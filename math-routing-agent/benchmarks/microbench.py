@@ -0,0 +1,273 @@
+import os
+import gc
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import tempfile
+import statistics
+import numpy as np
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# The solver module builds OpenAI clients at import; nothing here calls them
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from app.config import Config
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.vector_db import MathKnowledgeBase
+from app.guardrails.ai_gateway import AIGateway
+from app.agents.math_solver import MathSolverAgent
+from app.agents.feedback_agent import HumanFeedbackAgent
+from benchmarks.encoder_bench import generate_questions
+
+DEFAULT_KB_SIZES = [100, 1000, 10000]
+DEFAULT_FEEDBACK_SIZES = [0, 1000, 10000]
+
+SOLUTION_TEXT = """Here is the step-by-step solution:
+```
+1. Identify the coefficients: a = 2, b = -5, c = 2
+2) Compute the discriminant: D = b² - 4ac = 25 - 16 = 9
+* Apply the quadratic formula: x = (5 ± √9) / 4
+- Simplify both roots: x₁ = (5 + 3) / 4 = 2 and x₂ = (5 - 3) / 4 = 1/2
+3. Therefore the answer is x = 2 or x = 1/2
+```"""
+
+def measure(fn: Callable[[], Any], repeats: int = 7, min_sample_seconds: float = 0.05) -> Dict[str, float]:
+    """Per-call timings of fn: calibrated loop count, repeats samples, GC off while timing"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_sample_seconds or number >= 1_000_000:
+            break
+        number *= 2
+    samples = [seconds / number for seconds in timer.repeat(repeat=repeats, number=number)]
+    median = statistics.median(samples)
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [median, median, median]
+    return {
+        "median_us": median * 1e6,
+        "min_us": min(samples) * 1e6,
+        "iqr_us": (quartiles[2] - quartiles[0]) * 1e6,
+        "cv": statistics.pstdev(samples) / statistics.mean(samples) if len(samples) > 1 else 0.0,
+        "loops": number,
+        "repeats": len(samples)
+    }
+
+@contextmanager
+def scratch_directory() -> Iterator[str]:
+    """Run inside an empty temporary directory so relative storage paths stay out of the repo"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="microbench-") as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+def build_knowledge_base(size: int, seed: int = 7) -> MathKnowledgeBase:
+    """Seed knowledge base padded with synthetic questions up to size points"""
+    kb = MathKnowledgeBase(snapshot_dir=None)
+    extra = size - kb.next_id
+    batch_size = 10000
+    for offset in range(0, max(extra, 0), batch_size):
+        questions = generate_questions(min(batch_size, extra - offset), seed=seed + offset)
+        payloads = [
+            {"question": question, "solution": {"steps": [], "final_answer": ""}, "topic": "synthetic"}
+            for question in questions
+        ]
+        kb.upsert_vectors(kb.encoder.encode_batch(questions), payloads, start_id=kb.next_id)
+    return kb
+
+def encoder_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    encoder = SimpleEncoder()
+    questions = generate_questions(1024)
+    return [
+        ("encoder.encode", lambda: encoder.encode(questions[0])),
+        ("encoder.encode_batch[1024]", lambda: encoder.encode_batch(questions))
+    ]
+
+def kb_cases(sizes: List[int], wanted: Callable[[str], bool]) -> Iterator[Tuple[str, Callable[[], Any]]]:
+    queries = generate_questions(64, seed=99)
+    for size in sizes:
+        name = f"kb.search_similar_questions[{size}]"
+        if not wanted(name):
+            continue
+        started = time.perf_counter()
+        kb = build_knowledge_base(size)
+        print(f"  built KB with {kb.next_id:,} points in {time.perf_counter() - started:.1f}s")
+        position = [0]
+
+        def search(kb=kb):
+            position[0] = (position[0] + 1) % len(queries)
+            return kb.search_similar_questions(queries[position[0]])
+
+        yield name, search
+        del kb
+        gc.collect()
+
+def gateway_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    gateway = AIGateway()
+    inputs = [
+        "Solve the quadratic equation: 2x² - 5x + 2 = 0",
+        "Find the derivative of f(x) = x^3 * sin(x)",
+        "What's the weather like today?",
+        "My email is student@example.com, solve x + 2 = 5"
+    ]
+    steps = [
+        "Identify the coefficients: a = 2, b = -5, c = 2",
+        "Compute the discriminant: D = 25 - 16 = 9",
+        "Therefore the answer is x = 2 or x = 1/2"
+    ]
+    return [
+        ("gateway.process_input", lambda: [gateway.process_input(query) for query in inputs]),
+        ("gateway.process_output", lambda: gateway.process_output(steps[-1], steps))
+    ]
+
+def solver_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    solver = MathSolverAgent()
+    steps = solver._parse_solution_steps(SOLUTION_TEXT)
+    return [
+        ("solver._parse_solution_steps", lambda: solver._parse_solution_steps(SOLUTION_TEXT)),
+        ("solver._extract_final_answer", lambda: solver._extract_final_answer(steps))
+    ]
+
+def feedback_cases(sizes: List[int], wanted: Callable[[str], bool]) -> Iterator[Tuple[str, Callable[[], Any]]]:
+    solution = {"steps": ["Apply the power rule"], "final_answer": "f'(x) = 6x + 2"}
+    db_path = Config.FEEDBACK_DB_PATH
+    for size in sizes:
+        name = f"feedback._store_feedback[{size}]"
+        if not wanted(name):
+            continue
+        with scratch_directory():
+            # Prefill through the legacy JSON migration the agent runs on start-up
+            os.makedirs("storage", exist_ok=True)
+            entries = [
+                {
+                    "timestamp": f"2024-01-01T00:00:{i % 60:02d}",
+                    "question": f"Find the derivative of f(x) = {i}x²",
+                    "original_solution": solution,
+                    "human_feedback": "The second step skips the power rule explanation",
+                    "improved_solution": "Explain the power rule first",
+                    "feedback_quality": "medium"
+                }
+                for i in range(size)
+            ]
+            with open("storage/feedback_data.json", "w") as f:
+                json.dump({"feedback_entries": entries}, f)
+            Config.FEEDBACK_DB_PATH = "storage/feedback.db"
+            agent = HumanFeedbackAgent()
+
+            def store(agent=agent):
+                return agent._store_feedback("Find the derivative of 3x²", solution,
+                                             "Please explain why the exponent drops by one", "Improved")
+
+            yield name, store
+            agent.store.close()
+    Config.FEEDBACK_DB_PATH = db_path
+
+def run_suite(kb_sizes: List[int], feedback_sizes: List[int], repeats: int, min_sample_seconds: float,
+              name_filter: Optional[str] = None) -> Dict[str, Any]:
+    """Run every case and return the results keyed by case name"""
+    def wanted(name: str) -> bool:
+        return not name_filter or name_filter in name
+
+    groups = [
+        ("encoder", encoder_cases),
+        ("knowledge base", lambda: kb_cases(kb_sizes, wanted)),
+        ("gateway", gateway_cases),
+        ("solver parsing", solver_cases),
+        ("feedback store", lambda: feedback_cases(feedback_sizes, wanted))
+    ]
+    results: Dict[str, Dict[str, float]] = {}
+    with scratch_directory():
+        for group, make_cases in groups:
+            print(f"\n▶ {group}")
+            for name, fn in make_cases():
+                if not wanted(name):
+                    continue
+                fn()
+                stats = measure(fn, repeats, min_sample_seconds)
+                results[name] = stats
+                print(f"  {name:40} {stats['median_us']:>12,.2f} µs/call  (min {stats['min_us']:,.2f}, "
+                      f"cv {stats['cv']:.1%}, {stats['loops']}×{stats['repeats']})")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "results": results
+    }
+
+def check_regressions(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float,
+                      case_thresholds: Dict[str, float]) -> List[str]:
+    """Names of cases whose median slowed down by more than their allowed ratio"""
+    regressions = []
+    print("\n📈 COMPARED WITH BASELINE")
+    for name, stats in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"  {name:40} (no baseline)")
+            continue
+        change = stats["median_us"] / base["median_us"] - 1
+        allowed = case_thresholds.get(name, max_regression)
+        failed = change > allowed
+        marker = "❌" if failed else "✅"
+        print(f"  {marker} {name:38} {base['median_us']:>12,.2f} → {stats['median_us']:>12,.2f} µs  "
+              f"({change:+.1%}, limit +{allowed:.0%})")
+        if failed:
+            regressions.append(name)
+    return regressions
+
+def parse_thresholds(values: List[str]) -> Dict[str, float]:
+    thresholds = {}
+    for value in values:
+        name, _, ratio = value.rpartition("=")
+        if not name:
+            raise argparse.ArgumentTypeError(f"expected case=ratio, got {value!r}")
+        thresholds[name] = float(ratio)
+    return thresholds
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks for the math agent's CPU-side hot paths")
+    parser.add_argument("--kb-sizes", type=int, nargs="+", default=DEFAULT_KB_SIZES,
+                        help="Knowledge base sizes to search (e.g. 100 1000 10000 100000 1000000)")
+    parser.add_argument("--feedback-sizes", type=int, nargs="+", default=DEFAULT_FEEDBACK_SIZES,
+                        help="Stored feedback history sizes to append against")
+    parser.add_argument("--repeats", type=int, default=7, help="Timed samples per case")
+    parser.add_argument("--min-sample-seconds", type=float, default=0.05, help="Minimum duration of one sample")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    parser.add_argument("--save-baseline", help="Write the results as the new baseline to this path")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed median slowdown vs the baseline as a ratio (0.15 = 15%%)")
+    parser.add_argument("--case-threshold", action="append", default=[], metavar="CASE=RATIO",
+                        help="Per-case allowed slowdown, overriding --max-regression")
+    args = parser.parse_args()
+    case_thresholds = parse_thresholds(args.case_threshold)
+
+    print("🧮 MATH AGENT MICROBENCHMARKS")
+    print("=" * 60)
+    report = run_suite(args.kb_sizes, args.feedback_sizes, args.repeats, args.min_sample_seconds, args.filter)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+        print(f"✅ Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = check_regressions(baseline, report, args.max_regression, case_thresholds)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
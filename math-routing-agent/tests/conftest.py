@@ -0,0 +1,31 @@
+import os
+import random
+import numpy as np
+import pytest
+
+# The solver modules build OpenAI clients at import; tests never call them
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+MIXED_WORDS = (
+    "solve find the of a and is what if for with evaluate calculate value equation polynomial quadratic "
+    "derivative integral limit integrate area volume angle triangle circle radius sin cos tan x y = + - * / ^ √ π"
+).split()
+
+def mixed_questions(count: int, seed: int = 0):
+    """Random math word mixes; they encode to mostly distinct SimpleEncoder vectors"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(MIXED_WORDS) for _ in range(rng.randint(3, 30))) for _ in range(count)]
+
+def brute_force(vectors: np.ndarray, queries: np.ndarray, top_k: int):
+    """Exact top-k cosine scores per query, best first"""
+    def normalize(rows):
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        return rows / np.where(norms > 0, norms, 1.0)
+    scores = normalize(np.atleast_2d(queries)) @ normalize(vectors).T
+    return [np.sort(row)[::-1][:top_k] for row in scores]
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    """Run in an empty directory so relative storage paths stay out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+import app.main as main
+from app.config import Config
+from app.models.schemas import MathQuestionBatch
+
+class FakeKnowledgeBase:
+    initialized = True
+
+    def __init__(self):
+        self.batches = []
+
+    def search_similar_questions_batch(self, queries):
+        self.batches.append(list(queries))
+        return [[{"question": "Solve 2x = 4", "solution": "x = 2", "similarity_score": 0.95}]
+                if "2x = 4" in query else [] for query in queries]
+
+class FailingBatchKnowledgeBase(FakeKnowledgeBase):
+    def search_similar_questions_batch(self, queries):
+        raise RuntimeError("encoder crashed")
+
+    def search_similar_questions(self, query):
+        if "3x = 9" in query:
+            raise RuntimeError("index unavailable")
+        return super().search_similar_questions_batch([query])[0]
+
+class FakeRouter:
+    initialized = True
+
+    def route_question(self, question, kb_results):
+        return {"use_knowledge_base": bool(kb_results)}
+
+class FakeSolver:
+    initialized = True
+
+    def generate_solution_locally(self, question):
+        return None
+
+    def generate_solution_from_kb(self, question, solution):
+        return {"steps": ["Recall the stored solution", "Therefore the formula gives it"], "final_answer": solution,
+                "source": "knowledge_base"}
+
+    async def generate_solution_from_web_async(self, question, web_context):
+        if "explode" in question:
+            raise RuntimeError("completion failed")
+        return {"steps": ["Use the formula", "Therefore"], "final_answer": "done", "source": "web_search"}
+
+class FakeSearch:
+    initialized = True
+
+    def search_math_solution(self, question):
+        return {"success": False}
+
+@pytest.fixture
+def fakes(monkeypatch):
+    kb = FakeKnowledgeBase()
+    monkeypatch.setattr(main, "knowledge_base", kb)
+    monkeypatch.setattr(main, "routing_agent", FakeRouter())
+    monkeypatch.setattr(main, "math_solver", FakeSolver())
+    monkeypatch.setattr(main, "web_searcher", FakeSearch())
+    monkeypatch.setattr(main, "solve_components", ())
+    main.response_cache.clear()
+    yield kb
+    main.response_cache.clear()
+
+def solve(questions):
+    return asyncio.run(main.solve_math_batch(MathQuestionBatch(questions=questions)))
+
+def test_batch_uses_one_kb_search_and_isolates_failures(fakes):
+    questions = ["Solve 2x = 4", "Tell me a joke", "Solve 3x = 9 and explode", "Calculate 7 + 5"]
+    response = solve(questions)
+    assert fakes.batches == [["Solve 2x = 4", "Solve 3x = 9 and explode", "Calculate 7 + 5"]]
+    results = response["results"]
+    assert [result["question"] for result in results] == questions
+    assert results[0]["solution"]["source"] == "knowledge_base"
+    assert results[1]["status_code"] == 400
+    assert results[2]["status_code"] == 500 and "completion failed" in results[2]["error"]
+    assert results[3]["solution"]["source"] == "web_search"
+    assert (response["total"], response["succeeded"], response["failed"]) == (4, 2, 2)
+
+def test_cached_items_skip_the_kb_search(fakes):
+    solve(["Solve 2x = 4"])
+    response = solve(["solve 2x = 4", "Calculate 7 + 5"])
+    assert response["results"][0]["cache_hit"] is True
+    assert fakes.batches[-1] == ["Calculate 7 + 5"]
+
+def test_oversized_batch_is_rejected(fakes, monkeypatch):
+    monkeypatch.setattr(Config, "BATCH_MAX_SIZE", 2)
+    with pytest.raises(HTTPException) as error:
+        solve(["Solve x = 1"] * 3)
+    assert error.value.status_code == 400
+    assert fakes.batches == []
+
+def test_failed_batch_search_falls_back_to_per_item_searches(fakes, monkeypatch):
+    monkeypatch.setattr(main, "knowledge_base", FailingBatchKnowledgeBase())
+    response = solve(["Solve 2x = 4", "Solve 3x = 9", "Calculate 7 + 5"])
+    results = response["results"]
+    assert results[0]["solution"]["source"] == "knowledge_base"
+    assert results[1]["status_code"] == 500 and "index unavailable" in results[1]["error"]
+    assert results[2]["solution"]["source"] == "web_search"
+    assert (response["succeeded"], response["failed"]) == (2, 1)
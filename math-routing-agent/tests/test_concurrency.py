@@ -0,0 +1,154 @@
+import time
+import asyncio
+import threading
+from app.concurrency import ServicePool, SingleFlight
+from app.speculation import SpeculationPolicy
+
+def test_cancelled_call_holds_its_slot_until_the_thread_finishes():
+    async def scenario():
+        pool = ServicePool(max_workers=4, limits={"web_search": 1})
+        started, release = threading.Event(), threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        task = asyncio.ensure_future(pool.run("web_search", blocking))
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # The thread is still running: the slot stays taken
+        assert pool.in_flight["web_search"] == 1
+        assert pool.limit("web_search").locked()
+        waiting = asyncio.ensure_future(pool.run("web_search", lambda: "next"))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+
+        release.set()
+        assert await asyncio.wait_for(waiting, 5) == "next"
+        assert pool.in_flight["web_search"] == 0
+        assert not pool.limit("web_search").locked()
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+def test_failing_call_releases_its_slot():
+    async def scenario():
+        pool = ServicePool(max_workers=2, limits={"knowledge_base": 1})
+        for _ in range(3):
+            try:
+                await pool.run("knowledge_base", lambda: 1 / 0)
+            except ZeroDivisionError:
+                pass
+        assert pool.in_flight["knowledge_base"] == 0
+        assert await pool.run("knowledge_base", lambda: 42) == 42
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+def test_blocking_calls_do_not_stall_the_event_loop():
+    async def scenario():
+        pool = ServicePool(max_workers=4, limits={"openai": 4})
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.ensure_future(ticker())
+        results = await asyncio.gather(*(pool.run("openai", time.sleep, 0.1) for _ in range(4)))
+        ticking.cancel()
+        assert results == [None] * 4
+        assert ticks >= 5
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+def test_service_limit_bounds_concurrent_calls():
+    async def scenario():
+        pool = ServicePool(max_workers=8, limits={"dspy": 2})
+        lock = threading.Lock()
+        running, peak = 0, 0
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        await asyncio.gather(*(pool.run("dspy", work) for _ in range(6)))
+        assert peak == 2
+        assert pool.stats()["dspy"] == {"limit": 2, "in_flight": 0}
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+def test_single_flight_coalesces_concurrent_callers():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def solve():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return {"answer": "x = 2"}
+
+        results = await asyncio.gather(*(flight.do("solve 2x = 4", solve) for _ in range(10)))
+        assert calls == 1
+        assert all(result == {"answer": "x = 2"} for result in results)
+        assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 9}
+        # Once finished, the next call computes again
+        await flight.do("solve 2x = 4", solve)
+        assert calls == 2
+
+    asyncio.run(scenario())
+
+def test_single_flight_survives_a_cancelled_caller():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def solve():
+            await asyncio.sleep(0.05)
+            return "shared"
+
+        first = asyncio.ensure_future(flight.do("key", solve))
+        second = asyncio.ensure_future(flight.do("key", solve))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "shared"
+
+    asyncio.run(scenario())
+
+def test_single_flight_shares_errors_and_forgets_the_key():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+class EmptyKnowledgeBase:
+    def has_question(self, question):
+        return False
+
+def test_speculation_waits_for_an_estimate():
+    policy = SpeculationPolicy(EmptyKnowledgeBase(), min_samples=5)
+    question = "Find the integral of x^2"
+    assert not policy.predict_miss(question)
+    for _ in range(5):
+        policy.record(question, speculated=False, web_needed=True)
+    assert policy.predict_miss(question)
@@ -0,0 +1,18 @@
+import numpy as np
+from app.knowledge_base.encoder import SimpleEncoder
+from tests.conftest import mixed_questions
+
+EDGE_CASES = ["", "   ", "x\ud800 + 1 = 2", "√π θ α β", "İNTEGRAL of ÄREA", "solve " * 150]
+
+def test_single_text_matches_the_batch_path():
+    encoder = SimpleEncoder()
+    texts = mixed_questions(500) + EDGE_CASES
+    batch = encoder.encode_batch(texts + ["padding keeps the batch path"])[:-1]
+    singles = np.array([encoder.encode(text) for text in texts], dtype=np.float32)
+    np.testing.assert_allclose(singles, batch, rtol=0, atol=1e-8)
+
+def test_lone_surrogate_is_one_character():
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(["x\ud800=", "ab="])
+    np.testing.assert_array_equal(vectors[0], vectors[1])
+    assert encoder.encode("\ud800") == [0.0] * 100 + [1.0] + [0.0] * 283
@@ -0,0 +1,53 @@
+import time
+import pytest
+from app.agents.fast_solver import FastPathSolver
+
+@pytest.mark.parametrize("question, answer", [
+    ("Solve 2x + 3 = 7", "x = 2"),
+    ("Solve x^2 - 5x + 6 = 0", "x = 2, 3"),
+    ("Find the derivative of 3x^2 + 2x - 1", "f'(x) = 6x + 2"),
+    ("What is the derivative of f(x) = x³ - 4x?", "f'(x) = 3x² - 4"),
+    ("Differentiate y = x^2 + 3x", "f'(x) = 2x + 3"),
+    ("Integrate x^2 from 0 to 3", "9"),
+    ("Find the integral of 4x^3 dx", "x⁴ + C"),
+    ("Solve for x: 3x - 4 = 2x + 1", "x = 5"),
+    ("Find the roots of x^2 - 4", "x = -2, 2"),
+    ("∫(2x + 1) dx from -1 to 1", "2"),
+    ("d/dx (x^4 - x)", "f'(x) = 4x³ - 1"),
+])
+def test_in_scope(question, answer):
+    solution = FastPathSolver().solve(question)
+    assert solution["source"] == "local_solver"
+    assert solution["final_answer"] == answer
+
+@pytest.mark.parametrize("question", [
+    "Find the second derivative of x^3",
+    "Find the derivative of x^3 at x = 2",
+    "Solve x^2 > 4",
+    "Solve 2x + 3 = 7 and 3x - y = 2",
+    "Solve 3x = 9, y = 2",
+    "Integrate x^2 from 0 to infinity",
+    "Find the derivative of x^2 with respect to y",
+    "Integrate t^2 dt",
+    "Solve x^2 + 3x = sin(x)",
+    "What is the derivative of x^5000000",
+    # Words outside the question templates change the problem
+    "derivative of x^2 times x",
+    "derivative of x^2 multiplied by 3",
+    "Differentiate x^3 divided by 2",
+    "derivative of x^2 + 3x + 2 divided by x + 1",
+    "Integrate x^2 + 1 between 0 and 2",
+    "integral of x^2 squared",
+    "Solve x^2 = 4 where x is positive",
+    "Solve 10 percent of x = 5",
+    "derivative of x^3 + 2x at the point 1",
+    "Solve 2x = 4 modulo 3",
+    "Solve 3x + 2 = 11 and then double it",
+])
+def test_out_of_scope_falls_through(question):
+    assert FastPathSolver().solve(question) is None
+
+def test_huge_degree_is_rejected_quickly():
+    started = time.perf_counter()
+    assert FastPathSolver().solve("Integrate x^5000000 from 0 to 3") is None
+    assert time.perf_counter() - started < 0.1
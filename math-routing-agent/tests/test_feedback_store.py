@@ -0,0 +1,106 @@
+import gc
+import json
+import os
+import sqlite3
+import asyncio
+import warnings
+import pytest
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from app.agents.feedback_agent import HumanFeedbackAgent
+from app.agents.feedback_store import FeedbackAggregates, FeedbackStore
+
+def legacy_file(path, entries, learning_cycles):
+    path.write_text(json.dumps({"feedback_entries": entries, "learning_cycles": learning_cycles}), encoding="utf-8")
+
+ENTRY = {"timestamp": "2026-01-01T00:00:00", "question": "Solve 2x = 4", "original_solution": {"source": "web_search"},
+         "human_feedback": "correct", "improved_solution": "x = 2", "feedback_quality": "medium"}
+
+def test_migration_is_idempotent_when_the_rename_fails(tmp_path, monkeypatch):
+    legacy = tmp_path / "feedback_data.json"
+    legacy_file(legacy, [ENTRY, ENTRY], learning_cycles=5)
+    db = str(tmp_path / "feedback.db")
+
+    def crash(src, dst):
+        raise OSError("crashed before rename")
+
+    monkeypatch.setattr(os, "replace", crash)
+    store = FeedbackStore(db)
+    try:
+        store.migrate_json(str(legacy))
+    except OSError:
+        pass
+    store.close()
+    monkeypatch.undo()
+
+    store = FeedbackStore(db, legacy_json_path=str(legacy))
+    assert store.count() == 2
+    assert store.learning_cycles() == 5
+    assert not legacy.exists() and (tmp_path / "feedback_data.json.migrated").exists()
+    store.close()
+
+def test_connections_are_closed(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        legacy = tmp_path / "feedback_data.json"
+        legacy_file(legacy, [ENTRY], learning_cycles=1)
+        store = FeedbackStore(str(tmp_path / "feedback.db"), legacy_json_path=str(legacy))
+        store.append(dict(ENTRY))
+        assert [entry["question"] for entry in store.iter_entries()] == ["Solve 2x = 4"] * 2
+        store.compact()
+        store.close()
+        gc.collect()
+    # Nothing holds the database open: it can be removed and recreated
+    os.remove(tmp_path / "feedback.db")
+    sqlite3.connect(str(tmp_path / "feedback.db")).close()
+
+def ago(**kwargs):
+    return (datetime.now() - timedelta(**kwargs)).isoformat()
+
+def test_aggregate_windows_only_count_recent_entries():
+    aggregates = FeedbackAggregates(retention_seconds=24 * 3600)
+    aggregates.add(ago(minutes=1), "high")
+    aggregates.add(ago(minutes=2), "low")
+    aggregates.add(ago(hours=3), "high")
+    aggregates.add(ago(days=3), "high")
+    assert aggregates.count() == 4
+    assert aggregates.count("high") == 3
+    assert aggregates.window(600)["by_quality"] == {"high": 1, "low": 1}
+    assert aggregates.window(6 * 3600)["total"] == 3
+    # Windows are capped at the retention horizon
+    assert aggregates.window(30 * 24 * 3600)["window_seconds"] == 24 * 3600
+
+def test_aggregates_are_rebuilt_from_storage(tmp_path):
+    db = str(tmp_path / "feedback.db")
+    store = FeedbackStore(db, stats_retention_seconds=24 * 3600)
+    for timestamp, quality in [(ago(minutes=1), "high"), (ago(minutes=5), "medium"), (ago(days=2), "high")]:
+        store.append(dict(ENTRY, timestamp=timestamp, feedback_quality=quality))
+    live = (store.count(), store.count("high"), store.aggregates.window(3600)["by_quality"])
+    store.close()
+
+    store = FeedbackStore(db, stats_retention_seconds=24 * 3600)
+    assert (store.count(), store.count("high"), store.aggregates.window(3600)["by_quality"]) == live
+    assert live == (3, 2, {"high": 1, "medium": 1})
+    store.close()
+
+def test_window_parsing_rejects_non_finite_values():
+    assert HumanFeedbackAgent.parse_window("15m") == 900
+    assert HumanFeedbackAgent.parse_window("90") == 90
+    for window in ["inf", "nan", "-inf", "infh", "1e308d", "0", "-5m", "0.5s", "abc", "m"]:
+        with pytest.raises(ValueError, match="Invalid window"):
+            HumanFeedbackAgent.parse_window(window)
+
+def test_non_finite_window_is_a_bad_request(monkeypatch):
+    import app.main as main
+
+    class StatsOnlyAgent:
+        initialized = True
+        get_feedback_stats = HumanFeedbackAgent.get_feedback_stats
+        parse_window = staticmethod(HumanFeedbackAgent.parse_window)
+        store = type("Store", (), {"aggregates": FeedbackAggregates()})()
+
+    monkeypatch.setattr(main, "feedback_agent", StatsOnlyAgent())
+    for window in ["inf", "nan"]:
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(main.get_feedback_stats(window))
+        assert error.value.status_code == 400
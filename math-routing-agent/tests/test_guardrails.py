@@ -0,0 +1,49 @@
+from app.guardrails.ai_gateway import AIGateway, GuardrailEngine, find_private_data
+
+QUERIES = [
+    "Solve 2x + 3 = 7",
+    "What is the derivative of sin(x)?",
+    "Tell me a joke",
+    "My SSN is 123-45-6789, solve x + 1 = 2",
+    "Call 5551234567 about the triangle",
+    "Email me at student@example.com the integral",
+    "<script>alert(1)</script>Find the area of a circle",
+]
+
+def test_validation_results():
+    engine = GuardrailEngine()
+    results = [engine.validate(query) for query in QUERIES]
+    assert [result["is_valid"] for result in results] == [True, True, False, False, False, False, True]
+    assert results[2]["error_message"] == GuardrailEngine.ERROR_MESSAGE
+    assert results[6]["sanitized_query"] == "Find the area of a circle"
+
+def test_batch_matches_single_validation():
+    single, batch = GuardrailEngine(), GuardrailEngine()
+    assert batch.validate_batch(QUERIES) == [single.validate(query) for query in QUERIES]
+    assert batch.stats() == single.stats()
+
+def test_rule_hits_name_the_rule_that_fired():
+    engine = GuardrailEngine()
+    engine.validate_batch(QUERIES)
+    assert engine.stats() == {
+        "math.operation": 2,
+        "math.shape": 1,
+        "privacy.email": 1,
+        "privacy.phone": 1,
+        "privacy.ssn": 1,
+        "rejected.not_math": 1,
+    }
+
+def test_private_data_rules():
+    assert find_private_data("card 4111111111111111") == "credit_card"
+    assert find_private_data("x = 123456") is None
+    assert find_private_data("no email here @ all") is None
+
+def test_gateway_output_checks_are_counted():
+    gateway = AIGateway()
+    assert gateway.process_output_step("Step one: subtract 3")
+    assert not gateway.process_output_step("Call 555-12-3456")
+    assert not gateway.process_output_step("   ")
+    result = gateway.process_output("Therefore x = 2 by this method", ["2x = 4", "x = 2"])
+    assert result["is_valid"] and "**Step 2:** x = 2" in result["formatted_solution"]
+    assert gateway.engine.stats() == {"output.educational": 1, "output.step": 1, "output.step_rejected": 2}
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.index import VectorIndex
+from tests.conftest import mixed_questions, brute_force
+
+pytest.importorskip("hnswlib")
+from app.knowledge_base.hnsw_index import HNSWIndex
+
+def test_vector_index_is_abstract():
+    class Incomplete(VectorIndex):
+        def set(self, start_id, vectors, keep_originals=True):
+            pass
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_incremental_adds_match_brute_force():
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(1200))
+    index = HNSWIndex(encoder.vector_size, ef_search=200)
+    for start in range(0, len(vectors), 250):
+        index.set(start, vectors[start:start + 250])
+    queries = encoder.encode_batch(mixed_questions(20, seed=1))
+    for hits, expected in zip(index.search(queries, 5), brute_force(vectors, queries, 5)):
+        np.testing.assert_allclose([score for _, score in hits], expected, atol=1e-5)
+
+def test_duplicate_added_later_is_reachable():
+    encoder = SimpleEncoder()
+    index = HNSWIndex(encoder.vector_size)
+    template = encoder.encode_batch(["solve x + 1 = 2"] * 50)
+    index.set(0, template)
+    index.set(50, encoder.encode_batch(mixed_questions(200)))
+    index.set(250, template[:1])
+    hits = index.search(template[:1], 51)[0]
+    assert 250 in [point_id for point_id, _ in hits]
+    assert index.stats()["distinct_vectors"] <= 201
+
+def test_overwrite_and_save_load_roundtrip(tmp_path):
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(300))
+    index = HNSWIndex(encoder.vector_size)
+    index.set(0, vectors)
+    index.set(7, vectors[100:101])
+    index.save(str(tmp_path / "hnsw"))
+    loaded = HNSWIndex(encoder.vector_size)
+    assert loaded.load(str(tmp_path / "hnsw"))["count"] == 300
+    ids = [point_id for point_id, _ in loaded.search(vectors[100:101], 2)[0]]
+    assert set(ids) == {7, 100}
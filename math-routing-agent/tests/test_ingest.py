@@ -0,0 +1,102 @@
+import json
+import pytest
+from app.knowledge_base.ingest import BulkIngester, iter_question_rows, normalize_row
+from app.knowledge_base.snapshot import KBSnapshot
+
+@pytest.mark.parametrize("row", [
+    ["Solve 2x = 4"],
+    "Solve 2x = 4",
+    {"question": "Solve 2x = 4", "topic": ["algebra"]},
+    {"question": "Solve 2x = 4", "topic": 7},
+    {"question": {"text": "Solve 2x = 4"}},
+    {"question": "Solve 2x = 4", "solution": {"steps": {"1": "x = 2"}, "final_answer": "x = 2"}},
+    {"question": "Solve 2x = 4", "solution": {"steps": ["x = 2"], "final_answer": ["x = 2"]}},
+])
+def test_malformed_rows_raise_value_error(row):
+    with pytest.raises(ValueError):
+        normalize_row(row)
+
+def test_string_steps_are_one_step():
+    item = normalize_row({"question": "Solve 2x = 4", "solution": {"steps": "Divide by 2", "final_answer": 2}})
+    assert item["solution"] == {"steps": ["Divide by 2"], "final_answer": "2"}
+    assert item["topic"] == "general"
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / "bank.jsonl"
+    lines = [
+        json.dumps({"question": "Solve 2x = 4", "steps": ["Divide by 2"], "final_answer": "x = 2", "topic": "Algebra"}),
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"question": "Solve x + 1 = 3", "topic": 7}),
+        "{broken",
+        json.dumps({"question": "Solve x - 1 = 3", "topic": None}),
+    ]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    items = list(iter_question_rows(str(path)))
+    assert [item and item["question"] for item in items] == ["Solve 2x = 4", None, None, None, "Solve x - 1 = 3"]
+    assert items[0]["topic"] == "algebra"
+    assert items[4]["topic"] == "general"
+
+def test_snapshot_hash_covers_accepted_rows_only(tmp_path):
+    accepted = {"question": "Solve 2x = 4", "steps": ["Divide by 2"], "final_answer": "x = 2", "topic": "algebra"}
+    rejected = {"question": "Tell me a joke", "steps": [], "final_answer": "", "topic": "general"}
+    path = tmp_path / "bank.jsonl"
+    path.write_text("\n".join(json.dumps(row) for row in [accepted, rejected]), encoding="utf-8")
+    stats = BulkIngester(snapshot_dir=str(tmp_path / "snapshot"), validate=True).ingest(str(path))
+    assert stats["ingested"] == 1 and stats["skipped"] == 1
+    header = KBSnapshot(str(tmp_path / "snapshot")).read_header()
+    assert header["dataset_hash"] == KBSnapshot.dataset_hash([normalize_row(accepted)])
+
+def test_resume_into_a_fresh_kb_replays_committed_rows(in_tmp, monkeypatch):
+    from app.knowledge_base import ingest
+    from app.knowledge_base.vector_db import MathKnowledgeBase
+
+    questions = ["Find the volume of a cube with side 4", "Differentiate 7x^5 - x", "Solve 3x - 9 = 0",
+                 "What is the probability of rolling two sixes", "Integrate 6x^2 from 1 to 2",
+                 "Find the hypotenuse of a 5 by 12 right triangle", "Evaluate log base 2 of 64"]
+    path = in_tmp / "bank.jsonl"
+    path.write_text("\n".join(json.dumps({"question": q, "steps": ["Subtract 1"], "final_answer": "x = 1"})
+                              for q in questions), encoding="utf-8")
+    checkpoint = str(in_tmp / "ingest.checkpoint")
+    rows = ingest.iter_question_rows
+
+    def crash_after_five(source):
+        for index, item in enumerate(rows(source)):
+            if index == 5:
+                raise KeyboardInterrupt
+            yield item
+
+    monkeypatch.setattr(ingest, "iter_question_rows", crash_after_five)
+    first = MathKnowledgeBase(snapshot_dir=None)
+    seed_points = first.next_id
+    with pytest.raises(KeyboardInterrupt):
+        BulkIngester(knowledge_base=first, batch_size=2, checkpoint_path=checkpoint).ingest(str(path))
+    monkeypatch.undo()
+
+    # The process restarts: the in-memory KB is rebuilt from the seed data only
+    restarted = MathKnowledgeBase(snapshot_dir=None)
+    stats = BulkIngester(knowledge_base=restarted, batch_size=2, checkpoint_path=checkpoint).ingest(str(path))
+    assert stats["resumed_from_row"] == 4 and stats["replayed"] == 4
+    assert stats["ingested"] == len(questions)
+    assert all(restarted.has_question(q) for q in questions)
+    assert restarted.next_id == seed_points + len(questions)
+    assert all(restarted.search_similar_questions(q)[0]["question"] == q for q in questions)
+
+def test_resume_into_a_kb_that_kept_its_rows_does_not_replay(in_tmp):
+    from app.knowledge_base.vector_db import MathKnowledgeBase
+
+    path = in_tmp / "bank.jsonl"
+    path.write_text("\n".join(json.dumps({"question": f"Solve x + {i} = {i + 2}"}) for i in range(4)), encoding="utf-8")
+    checkpoint = str(in_tmp / "ingest.checkpoint")
+    knowledge_base = MathKnowledgeBase(snapshot_dir=None)
+    ingester = BulkIngester(knowledge_base=knowledge_base, batch_size=2, checkpoint_path=checkpoint)
+    source = str(path.resolve())
+    ingester._save_checkpoint({"source": source, "rows_done": 0, "ingested": 0, "skipped": 0,
+                               "payload_bytes": 0, "start_id": knowledge_base.next_id})
+    stats = ingester.ingest(str(path))
+    points = knowledge_base.next_id
+    # Pretend the run stopped after two rows while the same KB stays alive
+    ingester._save_checkpoint({"source": source, "rows_done": 2, "ingested": 2, "skipped": 0,
+                               "payload_bytes": 0, "start_id": points - 4})
+    stats = ingester.ingest(str(path))
+    assert stats["replayed"] == 0
+    assert knowledge_base.next_id == points
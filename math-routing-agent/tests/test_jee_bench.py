@@ -0,0 +1,71 @@
+import time
+from benchmarks.jee_bench import LoadGenerator, QuestionMix, percentiles
+
+KB_QUESTIONS = [{"question": f"Stored question {i}", "category": "algebra"} for i in range(5)]
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, question):
+        self.question = question
+
+    def json(self):
+        if self.question.startswith("Stored"):
+            return {"cache_hit": False, "solution": {"source": "knowledge_base"}}
+        return {"cache_hit": False, "solution": {"source": "web_search"}}
+
+class FakeSession:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.posts = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.posts += 1
+        time.sleep(self.delay)
+        if "fail" in json["question"]:
+            raise ConnectionError("refused")
+        return FakeResponse(json["question"])
+
+def test_question_mix_follows_the_hit_ratio():
+    mix = QuestionMix(KB_QUESTIONS, hit_ratio=0.3, seed=1)
+    items = [mix.next() for _ in range(2000)]
+    hits = sum(1 for item in items if item["expected"] == "kb_hit")
+    assert 500 < hits < 700
+    assert len({item["question"] for item in items if item["expected"] == "kb_miss"}) > 1000
+
+def test_open_loop_schedule_separates_warmup_from_steady_state():
+    generator = LoadGenerator("http://agent.test", QuestionMix(KB_QUESTIONS, hit_ratio=0.5), concurrency=4,
+                              rate=64, warmup_seconds=0.125, duration_seconds=0.25, interval_seconds=0.125)
+    generator.session = FakeSession()
+    report = generator.run()
+    assert generator.session.posts == 24
+    assert report["warmup_requests"] == 8
+    assert report["steady"]["requests"] == 16
+    assert report["steady"]["error_rate"] == 0.0
+    assert set(report["steady"]["by_expected"]) <= {"kb_hit", "kb_miss"}
+    assert sum(bucket["completed"] for bucket in report["timeline"]) == 24
+
+def test_latency_includes_queueing_behind_a_saturated_server():
+    # One worker, 10 ms per request, 1 ms between due times: later requests wait
+    generator = LoadGenerator("http://agent.test", QuestionMix(KB_QUESTIONS, hit_ratio=1.0), concurrency=1,
+                              rate=1024, warmup_seconds=0.0, duration_seconds=5 / 1024)
+    generator.session = FakeSession(delay=0.01)
+    generator.run()
+    latencies = [result["latency"] for result in generator.results]
+    assert len(latencies) == 5
+    assert latencies[-1] > latencies[0] + 0.02
+
+def test_errors_are_counted_not_timed():
+    mix = QuestionMix([{"question": "please fail", "category": "algebra"}], hit_ratio=1.0)
+    generator = LoadGenerator("http://agent.test", mix, concurrency=1, rate=64,
+                              warmup_seconds=0.0, duration_seconds=3 / 64)
+    generator.session = FakeSession()
+    report = generator.run()
+    assert report["steady"]["errors"] == {"ConnectionError": 3}
+    assert report["steady"]["error_rate"] == 1.0
+    assert report["steady"]["latency"] == {"count": 0}
+
+def test_percentiles_are_in_milliseconds():
+    summary = percentiles([0.001 * i for i in range(1, 101)])
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 50.5 and summary["max_ms"] == 100.0
@@ -0,0 +1,62 @@
+import json
+from app.agents.fast_solver import FastPathSolver
+from app.agents.local_router import LocalRouter, label_sample
+
+def kb_match(question, score=0.99, topic="calculus", final_answer=None):
+    return {"question": question, "similarity_score": score, "topic": topic,
+            "solution": {"steps": [], "final_answer": final_answer or ""}}
+
+def test_exact_match_routes_to_kb():
+    decision = LocalRouter().route("Find the derivative of x^3 - 2x", [kb_match("Find the derivative of x^3 - 2x")])
+    assert decision["use_knowledge_base"]
+
+def test_operation_mismatch_routes_away_from_kb():
+    decision = LocalRouter().route("Find the integral of x^3 - 2x", [kb_match("Find the derivative of x^3 - 2x")])
+    assert not decision["use_knowledge_base"]
+
+def test_reordered_expression_routes_away_from_kb():
+    router = LocalRouter()
+    for question in ["Find the derivative of 2x^3 - x", "Find the derivative of x^2 - 3x"]:
+        assert not router.route(question, [kb_match("Find the derivative of x^3 - 2x")])["use_knowledge_base"]
+
+def test_log_is_written_by_the_background_writer(tmp_path):
+    path = tmp_path / "router.jsonl"
+    router = LocalRouter(log_path=str(path))
+    router.route("Find the derivative of x^3 - 2x", [kb_match("Find the derivative of x^3 - 2x", final_answer="3x² - 2")])
+    router.close()
+    row = json.loads(path.read_text(encoding="utf-8"))
+    assert row["routed_to_kb"] is True
+    assert "use_knowledge_base" not in row
+    assert row["kb_results"][0]["final_answer"] == "3x² - 2"
+
+def test_labels_come_from_outcomes_not_decisions():
+    solver = FastPathSolver()
+    wrong = {"question": "Solve 2x + 3 = 9", "routed_to_kb": True,
+             "kb_results": [{"question": "Solve 2x + 3 = 7", "similarity_score": 1.0, "final_answer": "x = 2"}]}
+    assert label_sample(wrong, {}, solver) is False
+    right = dict(wrong, question="Solve 2x + 3 = 7", routed_to_kb=False)
+    assert label_sample(right, {}, solver) is True
+
+    unsolvable = {"question": "What is a prime number?", "routed_to_kb": True,
+                  "kb_results": [{"question": "What is a prime?", "similarity_score": 0.9, "final_answer": "..."}]}
+    assert label_sample(unsolvable, {}, solver) is None
+    feedback = {"what is a prime number?": [
+        {"original_solution": {"source": "knowledge_base"}, "human_feedback": "This is wrong, different problem"}
+    ]}
+    assert label_sample(unsolvable, feedback, solver) is False
+
+def test_out_of_grammar_questions_get_no_solver_label():
+    solver = FastPathSolver()
+    # The old fast path answered this with 2x; the KB match says the same wrong thing
+    misread = {"question": "derivative of x^2 times x", "routed_to_kb": True,
+               "kb_results": [{"question": "derivative of x^2", "similarity_score": 0.9, "final_answer": "f'(x) = 2x"}]}
+    assert label_sample(misread, {}, solver) is None
+
+def test_kb_answers_in_prose_match_the_solver():
+    solver = FastPathSolver()
+    row = {"question": "Solve 2x + 3 = 7",
+           "kb_results": [{"question": "Solve 2x + 3 = 7", "similarity_score": 1.0,
+                           "final_answer": "Therefore the answer is x = 2."}]}
+    assert label_sample(row, {}, solver) is True
+    row["kb_results"][0]["final_answer"] = "Therefore the answer is x = 25"
+    assert label_sample(row, {}, solver) is False
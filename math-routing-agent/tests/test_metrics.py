@@ -0,0 +1,56 @@
+import asyncio
+from app.metrics import MetricsRegistry, StageTimer, ServerTimingMiddleware
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    solutions = registry.counter("solutions_total", "Answers served", ["source"])
+    misses = registry.counter("misses_total", "KB misses")
+    latency = registry.histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0))
+    solutions.inc("knowledge_base")
+    solutions.inc("knowledge_base")
+    solutions.inc('web "search"')
+    latency.observe(0.05, "llm")
+    latency.observe(0.5, "llm")
+    latency.observe(5.0, "llm")
+    lines = registry.render().splitlines()
+    assert "# TYPE solutions_total counter" in lines
+    assert 'solutions_total{source="knowledge_base"} 2' in lines
+    assert 'solutions_total{source="web \\"search\\""} 1' in lines
+    assert "misses_total 0" in lines
+    assert 'stage_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="llm",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="llm",le="+Inf"} 3' in lines
+    assert 'stage_seconds_sum{stage="llm"} 5.55' in lines
+    assert 'stage_seconds_count{stage="llm"} 3' in lines
+
+def test_middleware_adds_server_timing_for_request_stages():
+    registry = MetricsRegistry()
+    timer = StageTimer(registry.histogram("stage_seconds", "Stage latency", ["stage"]))
+    requests = registry.histogram("request_seconds", "Request latency", ["route"])
+
+    async def app(scope, receive, send):
+        with timer.stage("kb_search"):
+            pass
+        with timer.stage("llm"):
+            pass
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(ServerTimingMiddleware(app, timer, requests)({"type": "http"}, None, send))
+    header = dict(sent[0]["headers"])[b"server-timing"].decode()
+    assert [part.split(";")[0] for part in header.split(", ")] == ["kb_search", "llm", "total"]
+    rendered = registry.render()
+    assert 'stage_seconds_count{stage="llm"} 1' in rendered
+    assert 'request_seconds_count{route="unmatched"} 1' in rendered
+
+def test_stages_outside_a_request_only_feed_the_histogram():
+    registry = MetricsRegistry()
+    timer = StageTimer(registry.histogram("stage_seconds", "Stage latency", ["stage"]))
+    with timer.stage("warmup"):
+        pass
+    assert 'stage_seconds_count{stage="warmup"} 1' in registry.render()
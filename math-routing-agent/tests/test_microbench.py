@@ -0,0 +1,30 @@
+import os
+import argparse
+import pytest
+from benchmarks.microbench import check_regressions, measure, parse_thresholds, run_suite
+
+def report(**medians):
+    return {"results": {name.replace("_", "."): {"median_us": value} for name, value in medians.items()}}
+
+def test_regressions_respect_global_and_per_case_limits():
+    baseline = report(encoder_encode=10.0, gateway_process_input=100.0, kb_search=50.0)
+    current = report(encoder_encode=12.0, gateway_process_input=114.0, kb_search=80.0, solver_new=5.0)
+    regressions = check_regressions(baseline, current, max_regression=0.15, case_thresholds={"kb.search": 1.0})
+    assert regressions == ["encoder.encode"]
+
+def test_parse_thresholds():
+    assert parse_thresholds(["kb.search_similar_questions[1000]=0.3"]) == {"kb.search_similar_questions[1000]": 0.3}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_thresholds(["0.3"])
+
+def test_measure_reports_per_call_timings():
+    stats = measure(lambda: sum(range(100)), repeats=3, min_sample_seconds=0.001)
+    assert stats["repeats"] == 3 and stats["loops"] >= 1
+    assert 0 < stats["min_us"] <= stats["median_us"]
+
+def test_filtered_suite_runs_only_matching_cases_outside_the_repo():
+    cwd = os.getcwd()
+    result = run_suite([], [], repeats=2, min_sample_seconds=0.001, name_filter="gateway")
+    assert sorted(result["results"]) == ["gateway.process_input", "gateway.process_output"]
+    assert "python" in result["meta"]
+    assert os.getcwd() == cwd and not os.path.exists("storage/feedback.db")
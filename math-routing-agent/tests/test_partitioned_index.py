@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.partitioned import PartitionedIndex
+from tests.conftest import mixed_questions
+
+def routed_brute_force(index, vectors, query, top_k):
+    """Exact top-k over the points in the partitions the query routes to"""
+    partitions = index.assign(vectors)
+    members = np.flatnonzero(np.isin(partitions, index.route(query)))
+    normalized = vectors[members] / np.linalg.norm(vectors[members], axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return np.sort(scores)[::-1][:top_k]
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_incremental_adds_and_moves_match_brute_force(workers):
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(800))
+    queries = encoder.encode_batch(mixed_questions(15, seed=1) + ["what is 2 + 2", "find x"])
+    index = PartitionedIndex(encoder, "float32", workers=workers)
+    try:
+        for start in range(0, 600, 200):
+            index.set(start, vectors[start:start + 200])
+        # Overwrites that change topic move points between partitions
+        vectors[:200] = vectors[600:800]
+        index.set(0, vectors[:200])
+        current = vectors[:600]
+        for query, hits in zip(queries, index.search(queries, 5)):
+            np.testing.assert_allclose([score for _, score in hits],
+                                       routed_brute_force(index, current, query, 5), atol=1e-5)
+        assert sum(index.stats()["partition_points"].values()) == 600
+    finally:
+        index.close()
+
+def test_queries_without_topics_search_every_partition():
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(300))
+    index = PartitionedIndex(encoder, "float32")
+    index.set(0, vectors)
+    query = encoder.encode_batch(["what is 2 + 2"])[0]
+    assert index.route(query) == list(range(len(index.names)))
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_churn_compacts_dead_rows_and_keeps_results(workers):
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(400))
+    replacements = encoder.encode_batch(mixed_questions(400, seed=2))
+    queries = encoder.encode_batch(mixed_questions(10, seed=3))
+    index = PartitionedIndex(encoder, "float32", workers=workers, compact_min_dead=20)
+    try:
+        index.set(0, vectors)
+        # Each round rewrites every point with another one's vector, flipping many topics
+        for round_number in range(6):
+            vectors = replacements if round_number % 2 == 0 else encoder.encode_batch(mixed_questions(400))
+            index.set(0, vectors)
+            stats = index.stats()
+            for name, dead in stats["partition_dead"].items():
+                assert dead <= max(20, 0.25 * stats["partition_points"][name])
+        assert index.stats()["compactions"] > 0
+        assert sum(index.stats()["partition_points"].values()) == 400
+        np.testing.assert_allclose(index.get(np.arange(400)),
+                                   vectors / np.linalg.norm(vectors, axis=1, keepdims=True), atol=1e-6)
+        for query, hits in zip(queries, index.search(queries, 5)):
+            np.testing.assert_allclose([score for _, score in hits],
+                                       routed_brute_force(index, vectors, query, 5), atol=1e-5)
+    finally:
+        index.close()
+
+def test_same_partition_overwrites_take_one_call_per_partition(monkeypatch):
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(300))
+    index = PartitionedIndex(encoder, "float32")
+    index.set(0, vectors)
+    calls = []
+    original = index._call
+    monkeypatch.setattr(index, "_call", lambda partition, method, *args: (calls.append((partition, method)),
+                                                                           original(partition, method, *args))[1])
+    # Scattered ids: every partition's rows are non-contiguous in the batch
+    index.set(0, vectors * 2)
+    writes = [call for call in calls if call[1] in ("set", "set_rows")]
+    assert sorted(writes) == sorted({(partition, "set_rows") for partition in index.assign(vectors)})
+    assert sum(index.stats()["partition_points"].values()) == 300
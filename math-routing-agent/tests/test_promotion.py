@@ -0,0 +1,127 @@
+import time
+from app.agents.math_solver import MathSolverAgent
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.promotion import FeedbackPromoter
+
+class MemoryKnowledgeBase:
+    def __init__(self):
+        self.encoder = SimpleEncoder()
+        self.items = {}
+
+    def has_question(self, question):
+        return question in self.items
+
+    def add_questions(self, items):
+        fresh = [item for item in items if item["question"] not in self.items]
+        for item in fresh:
+            self.items[item["question"]] = item
+        return len(fresh)
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+LINEAR = "1. Subtract 3 from both sides: 2x = 4\n2. Divide by 2 to get x = 2\n3. Therefore the answer is x = 2"
+
+def test_verified_solution_is_promoted_and_replayed(tmp_path):
+    log_path = str(tmp_path / "promoted.jsonl")
+    knowledge_base = MemoryKnowledgeBase()
+    promoter = FeedbackPromoter(knowledge_base, MathSolverAgent(), log_path=log_path)
+    assert promoter.submit("Solve 2x + 3 = 7", LINEAR)
+    wait_for(lambda: promoter.promoted == 1)
+    promoter.close()
+
+    restarted = MemoryKnowledgeBase()
+    replay = FeedbackPromoter(restarted, MathSolverAgent(), log_path=log_path)
+    assert replay.replayed == 1
+    assert restarted.has_question("Solve 2x + 3 = 7")
+    replay.close()
+
+def test_wrong_answer_is_rejected_whatever_the_feedback_says():
+    promoter = FeedbackPromoter(MemoryKnowledgeBase(), MathSolverAgent())
+    wrong = LINEAR.replace("x = 2", "x = 5")
+    assert not promoter.submit("Solve 2x + 3 = 7", wrong)
+    assert promoter.rejected == 1
+    promoter.close()
+
+def test_guardrails_run_before_promotion():
+    promoter = FeedbackPromoter(MemoryKnowledgeBase(), MathSolverAgent())
+    assert not promoter.submit("Tell me a joke", "1. Something long enough here\n2. Another long step = 1")
+    leaked = "1. Call me at 5551234567 for help\n2. The area is 12 = 3 * 4 square units"
+    assert not promoter.submit("What is the area of a 3 by 4 rectangle?", leaked)
+    assert promoter.rejected == 2
+    promoter.close()
+
+def test_unverifiable_solution_needs_agreeing_submissions():
+    knowledge_base = MemoryKnowledgeBase()
+    promoter = FeedbackPromoter(knowledge_base, MathSolverAgent(), min_agreement=2)
+    question = "What is the area of a circle with radius 2?"
+    solution = "1. Use the formula A = πr²\n2. Substitute r = 2: A = 4π\n3. Therefore the area = 4π"
+    assert not promoter.submit(question, solution)
+    assert promoter.submit(question, solution)
+    wait_for(lambda: promoter.promoted == 1)
+    assert knowledge_base.has_question(question)
+    promoter.close()
+
+def test_answers_must_match_exactly_not_as_substrings():
+    promoter = FeedbackPromoter(MemoryKnowledgeBase(), MathSolverAgent())
+    assert not promoter.submit("Solve 2x + 3 = 7", LINEAR.replace("x = 2", "x = 25"))
+    integral = "1. The antiderivative of 2x is x^2\n2. Evaluate from 0 to 1\n3. Therefore the answer is {}"
+    assert not promoter.submit("Integrate 2x from 0 to 1", integral.format("21"))
+    assert promoter.rejected == 2
+    assert promoter.submit("Integrate 2x from 0 to 1", integral.format("1"))
+    derivative = "1. Apply the power rule to each term\n2. Therefore f'(x) = 3x^2 - 4"
+    assert promoter.submit("What is the derivative of f(x) = x³ - 4x?", derivative)
+    promoter.close()
+
+class CountingGateway:
+    def __init__(self):
+        from app.guardrails.ai_gateway import AIGateway
+        self.gateway = AIGateway()
+        self.calls = 0
+
+    def process_input(self, question):
+        self.calls += 1
+        return self.gateway.process_input(question)
+
+def test_each_submission_runs_the_guardrails_once():
+    gateway = CountingGateway()
+    promoter = FeedbackPromoter(MemoryKnowledgeBase(), MathSolverAgent(), gateway=gateway)
+    assert promoter.submit("Solve 2x + 3 = 7", LINEAR)
+    assert gateway.calls == 1
+    promoter.close()
+
+def test_pending_votes_are_bounded():
+    promoter = FeedbackPromoter(MemoryKnowledgeBase(), MathSolverAgent(), max_pending_questions=3)
+    solution = "1. Use the formula A = πr²\n2. Therefore the area = {}π"
+    for radius in range(10):
+        assert not promoter.submit(f"What is the area of a circle with radius {radius}?", solution.format(radius ** 2))
+    stats = promoter.stats()
+    assert stats["pending_votes"] == 3 and stats["awaiting_agreement"] == 10
+    promoter.close()
+
+class Prediction:
+    improved_solution = LINEAR
+
+class RecordingPromoter:
+    def __init__(self):
+        self.submissions = []
+
+    def submit(self, question, improved_solution):
+        self.submissions.append(question)
+        return True
+
+def test_only_high_quality_feedback_reaches_the_promoter(in_tmp, monkeypatch):
+    from app.agents.feedback_agent import HumanFeedbackAgent
+    from app.config import Config
+    monkeypatch.setattr(Config, "FEEDBACK_DB_PATH", str(in_tmp / "feedback.db"))
+    monkeypatch.setattr(HumanFeedbackAgent, "dspy_available", property(lambda self: True))
+    monkeypatch.setattr(HumanFeedbackAgent, "feedback_processor", property(lambda self: lambda **kwargs: Prediction()))
+    promoter = RecordingPromoter()
+    agent = HumanFeedbackAgent(promoter=promoter)
+    agent.process_feedback("Solve 2x + 3 = 7", {"steps": []}, "wrong")
+    assert promoter.submissions == []
+    agent.process_feedback("Solve 2x + 3 = 7", {"steps": []}, "Good and clear, but you should improve step 2")
+    assert promoter.submissions == ["Solve 2x + 3 = 7"]
+    agent.store.close()
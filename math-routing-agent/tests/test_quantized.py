@@ -0,0 +1,42 @@
+import numpy as np
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.quantized import QuantizedVectorStore
+from tests.conftest import mixed_questions, brute_force
+
+def test_int8_incremental_adds_match_brute_force():
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(1000))
+    store = QuantizedVectorStore(encoder.vector_size, "int8", rescore_factor=8, chunk_size=256)
+    for start in range(0, len(vectors), 300):
+        store.set(start, vectors[start:start + 300])
+    queries = encoder.encode_batch(mixed_questions(20, seed=1))
+    for hits, expected in zip(store.search(queries, 5), brute_force(vectors, queries, 5)):
+        np.testing.assert_allclose([score for _, score in hits], expected, atol=1e-5)
+
+def test_overwrites_reuse_resident_rows():
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(200))
+    store = QuantizedVectorStore(encoder.vector_size, "int8")
+    store.set(0, vectors)
+    before = store.memory_bytes()
+    for _ in range(50):
+        store.set(10, vectors[150:160])
+    assert store.memory_bytes() == before
+    assert {point_id for point_id, _ in store.search(vectors[150:151], 2)[0]} == {10, 150}
+
+def test_overwritten_referenced_segments_are_dropped(tmp_path):
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(300))
+    store = QuantizedVectorStore(encoder.vector_size, "int8")
+    store.set(0, vectors[:100], keep_originals=False)
+    store.set(100, vectors[100:200], keep_originals=False)
+    store.set(0, vectors[200:300], keep_originals=False)
+    assert len(store._segments) == 2
+    store.set(0, vectors[:100])
+    assert len(store._segments) == 1
+    store.save(str(tmp_path / "int8"))
+    loaded = QuantizedVectorStore(encoder.vector_size, "int8")
+    loaded.load(str(tmp_path / "int8"))
+    expected = vectors[:200]
+    for hits, scores in zip(loaded.search(vectors[:5], 3), brute_force(expected, vectors[:5], 3)):
+        np.testing.assert_allclose([score for _, score in hits], scores, atol=1e-5)
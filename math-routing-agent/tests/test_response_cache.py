@@ -0,0 +1,33 @@
+import time
+from app.cache.response_cache import ResponseCache
+
+def test_normalized_resubmissions_share_an_entry():
+    cache = ResponseCache(max_size=4, ttl_seconds=60)
+    cache.set("Solve  2x + 3 = 7", {"answer": "x = 2"})
+    assert cache.get("solve 2x + 3 = 7 ") == {"answer": "x = 2"}
+    assert cache.get("Solve 2x + 3 = 8") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_expired_entries_miss_and_are_dropped():
+    cache = ResponseCache(max_size=4, ttl_seconds=60)
+    cache.set("short", "value", ttl_seconds=0.01)
+    cache.set("long", "value")
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+    assert cache.stats()["size"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_zero_size_cache_stores_nothing():
+    cache = ResponseCache(max_size=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.cache.semantic_cache import SemanticSolutionCache, math_signature
+
+def solution(answer):
+    return {"source": "web_search", "steps": [answer], "final_answer": answer, "confidence": "medium"}
+
+def test_reordered_operands_get_distinct_signatures():
+    signatures = {math_signature(q) for q in
+                  ["derivative of x^3 - 2x", "derivative of x^2 - 3x", "derivative of 2x^3 - x"]}
+    assert len(signatures) == 3
+
+def test_wording_and_notation_share_a_signature():
+    assert math_signature("Find the derivative of x³ − 2x") == math_signature("differentiate f(x) = x^3 - 2x")
+    assert math_signature("Solve x^2 - 4 = 0") != math_signature("Integrate x^2 - 4 = 0")
+
+def test_lookup_requires_the_same_expression():
+    cache = SemanticSolutionCache(capacity=8)
+    cache.store("Find the derivative of x^3 - 2x", solution("3x² - 2"))
+    assert cache.lookup("Find the derivative of 2x^3 - x") is None
+    assert cache.lookup("Find the derivative of x^2 - 3x") is None
+    hit = cache.lookup("Find the derivative of x³ − 2x")
+    assert hit["final_answer"] == "3x² - 2"
+    assert hit["source"] == "semantic_cache"
+
+def test_async_solver_looks_up_the_cache_off_the_event_loop():
+    from app.agents.math_solver import MathSolverAgent
+
+    class RecordingCache(SemanticSolutionCache):
+        def lookup(self, question):
+            threads.append(threading.get_ident())
+            return super().lookup(question)
+
+    threads = []
+    cache = RecordingCache(capacity=8)
+    cache.store("Find the derivative of x^3 - 2x", solution("3x² - 2"))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        solver = MathSolverAgent(solution_cache=cache, executor=executor)
+
+        async def solve():
+            loop_thread = threading.get_ident()
+            answer = await solver.generate_solution_from_web_async("Find the derivative of x³ − 2x", {})
+            events = [event async for event in solver.stream_solution_from_web("Find the derivative of x^3 - 2x", {})]
+            return loop_thread, answer, events
+
+        loop_thread, answer, events = asyncio.run(solve())
+    assert answer["source"] == "semantic_cache"
+    assert events[-1]["solution"]["source"] == "semantic_cache"
+    assert len(threads) == 2 and loop_thread not in threads
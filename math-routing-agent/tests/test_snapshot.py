@@ -0,0 +1,70 @@
+import numpy as np
+from app.knowledge_base.snapshot import KBSnapshot, KBSnapshotWriter
+
+def sample(count=5, dim=8):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    payloads = [{"question": f"q{i}", "answer": str(i)} for i in range(count)]
+    return vectors, payloads
+
+def test_save_load_roundtrip(tmp_path):
+    vectors, payloads = sample()
+    snapshot = KBSnapshot(str(tmp_path / "snap"))
+    digest = KBSnapshot.dataset_hash(payloads)
+    snapshot.save(vectors, payloads, digest, "enc-1")
+    loaded_vectors, loaded_payloads = snapshot.load()
+    assert np.array_equal(np.asarray(loaded_vectors), vectors)
+    assert loaded_payloads == payloads
+    assert snapshot.is_current(digest, "enc-1", 8)
+
+def test_stale_snapshot_is_not_current(tmp_path):
+    vectors, payloads = sample()
+    snapshot = KBSnapshot(str(tmp_path / "snap"))
+    digest = KBSnapshot.dataset_hash(payloads)
+    snapshot.save(vectors, payloads, digest, "enc-1")
+    assert not snapshot.is_current(digest, "enc-2", 8)
+    assert not snapshot.is_current("other", "enc-1", 8)
+    assert not snapshot.is_current(digest, "enc-1", 16)
+    with open(snapshot.vectors_path, "ab") as f:
+        f.write(b"\0\0\0\0")
+    assert not snapshot.is_current(digest, "enc-1", 8)
+
+def test_dataset_hash_is_key_order_independent():
+    assert KBSnapshot.dataset_hash([{"a": 1, "b": 2}]) == KBSnapshot.dataset_hash([{"b": 2, "a": 1}])
+    assert KBSnapshot.dataset_hash([{"a": 1}]) != KBSnapshot.dataset_hash([{"a": 2}])
+
+def test_writer_has_no_header_until_closed(tmp_path):
+    vectors, payloads = sample(count=6)
+    writer = KBSnapshotWriter(str(tmp_path / "snap"), "enc-1", 8)
+    writer.append(vectors[:3], payloads[:3])
+    writer.append(vectors[3:], payloads[3:])
+    assert writer.snapshot.read_header() is None
+    writer.close("hash")
+    loaded_vectors, loaded_payloads = KBSnapshot(str(tmp_path / "snap")).load()
+    assert np.array_equal(np.asarray(loaded_vectors), vectors)
+    assert loaded_payloads == payloads
+
+def test_writer_resume_drops_rows_after_checkpoint(tmp_path):
+    vectors, payloads = sample(count=6)
+    directory = str(tmp_path / "snap")
+    writer = KBSnapshotWriter(directory, "enc-1", 8)
+    writer.append(vectors[:3], payloads[:3])
+    writer.flush()
+    rows, payload_bytes = writer.rows, writer.payload_bytes
+    writer.append(vectors[3:5], [{"question": "lost"}, {"question": "lost"}])
+    writer.flush()
+
+    resumed = KBSnapshotWriter(directory, "enc-1", 8, resume_rows=rows, resume_payload_bytes=payload_bytes)
+    resumed.append(vectors[3:], payloads[3:])
+    resumed.close("hash")
+    loaded_vectors, loaded_payloads = KBSnapshot(directory).load()
+    assert np.array_equal(np.asarray(loaded_vectors), vectors)
+    assert loaded_payloads == payloads
+
+def test_iter_chunks_covers_every_row(tmp_path):
+    vectors, payloads = sample(count=7)
+    snapshot = KBSnapshot(str(tmp_path / "snap"))
+    snapshot.save(vectors, payloads, "hash", "enc-1")
+    chunks = list(snapshot.iter_chunks(batch_size=3))
+    assert [len(p) for _, p in chunks] == [3, 3, 1]
+    assert np.array_equal(np.concatenate([np.asarray(v) for v, _ in chunks]), vectors)
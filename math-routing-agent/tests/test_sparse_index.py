@@ -0,0 +1,42 @@
+import numpy as np
+from app.knowledge_base.encoder import SimpleEncoder
+from app.knowledge_base.sparse_index import SparseFeatureIndex
+from tests.conftest import mixed_questions, brute_force
+
+def assert_matches_brute_force(index, vectors, queries, top_k=5):
+    for hits, expected in zip(index.search(queries, top_k), brute_force(vectors, queries, top_k)):
+        np.testing.assert_allclose([score for _, score in hits], expected, atol=1e-5)
+
+def test_incremental_adds_and_overwrites_match_brute_force():
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(900))
+    queries = encoder.encode_batch(mixed_questions(20, seed=1))
+    index = SparseFeatureIndex(encoder)
+    for start in range(0, 600, 150):
+        index.set(start, vectors[start:start + 150])
+        assert_matches_brute_force(index, vectors[:start + 150], queries)
+    # Overwrites move rows between postings and word groups
+    vectors[100:400] = vectors[600:900]
+    index.set(100, vectors[100:400])
+    assert_matches_brute_force(index, vectors[:600], queries)
+
+def test_search_after_set_does_not_rebuild(monkeypatch):
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(500))
+    index = SparseFeatureIndex(encoder)
+    index.set(0, vectors[:400])
+    index.search(vectors[:1], 3)
+    monkeypatch.setattr(index, "_rebuild", lambda: (_ for _ in ()).throw(AssertionError("full rebuild")))
+    index.set(400, vectors[400:])
+    assert_matches_brute_force(index, vectors, vectors[:10])
+
+def test_save_load_roundtrip(tmp_path):
+    encoder = SimpleEncoder()
+    vectors = encoder.encode_batch(mixed_questions(300))
+    index = SparseFeatureIndex(encoder)
+    index.set(0, vectors)
+    index.save(str(tmp_path / "sparse"))
+    loaded = SparseFeatureIndex(encoder)
+    loaded.load(str(tmp_path / "sparse"))
+    loaded.set(300, vectors[:10])
+    assert_matches_brute_force(loaded, np.concatenate([vectors, vectors[:10]]), vectors[:10])
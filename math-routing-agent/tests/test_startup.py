@@ -0,0 +1,45 @@
+import time
+import threading
+from app.startup import LazyComponent, StartupReport
+
+class Widget:
+    built = 0
+
+    def __init__(self, size, label="widget"):
+        time.sleep(0.01)
+        Widget.built += 1
+        self.size = size
+        self.label = label
+
+def test_component_is_built_on_first_use_and_timed():
+    Widget.built = 0
+    report = StartupReport()
+    widget = LazyComponent("widget", "tests.test_startup:Widget", report, 3, label="lazy")
+    assert not widget.initialized and Widget.built == 0
+    assert (widget.size, widget.label) == (3, "lazy")
+    assert widget.initialized and Widget.built == 1
+    summary = report.report()
+    assert "tests.test_startup" in summary["imports_ms"]
+    assert summary["components_ms"]["widget"] >= 10
+
+def test_concurrent_first_uses_share_one_instance():
+    Widget.built = 0
+    widget = LazyComponent("widget", "tests.test_startup:Widget", StartupReport(), 1)
+    instances = []
+    threads = [threading.Thread(target=lambda: instances.append(widget.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert Widget.built == 1
+    assert all(instance is instances[0] for instance in instances)
+
+def test_import_timings_accumulate():
+    report = StartupReport()
+    report.record_import("numpy", 0.002)
+    report.record_import("numpy", 0.003)
+    with report.measure_import("json"):
+        import json  # noqa: F401
+    summary = report.report()
+    assert abs(summary["imports_ms"]["numpy"] - 5.0) < 1e-9
+    assert summary["total_import_ms"] >= 5.0
@@ -0,0 +1,90 @@
+import asyncio
+import app.main as main
+
+class FakeSolver:
+    def __init__(self):
+        self.finished = False
+
+    async def stream_solution_from_web(self, question, web_context):
+        for i in range(3):
+            yield {"type": "step", "step": f"Step number {i} of the worked solution"}
+        yield {"type": "solution", "solution": {"steps": [], "final_answer": "x = 2", "source": "web_search"}}
+        self.finished = True
+
+def test_openai_slot_is_released_before_a_slow_client_reads(monkeypatch):
+    solver = FakeSolver()
+    monkeypatch.setattr(main, "math_solver", solver)
+
+    async def scenario():
+        limit = main.service_pool.limit("openai")
+        free = limit._value
+        events = main._buffered_llm_events("Solve 2x = 4", {})
+        first = await events.__anext__()
+        assert first["type"] == "step"
+        # The client has read one event; the upstream completion has already finished
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert solver.finished
+        assert limit._value == free
+        rest = [event async for event in events]
+        assert [event["type"] for event in rest] == ["step", "step", "solution"]
+
+    asyncio.run(scenario())
+
+def test_client_disconnect_cancels_the_upstream(monkeypatch):
+    started = []
+
+    class EndlessSolver:
+        async def stream_solution_from_web(self, question, web_context):
+            started.append(True)
+            while True:
+                await asyncio.sleep(0.01)
+                yield {"type": "step", "step": "Still working on this step"}
+
+    monkeypatch.setattr(main, "math_solver", EndlessSolver())
+
+    async def scenario():
+        limit = main.service_pool.limit("openai")
+        free = limit._value
+        events = main._buffered_llm_events("Solve 2x = 4", {})
+        await events.__anext__()
+        await events.aclose()
+        await asyncio.sleep(0.05)
+        assert limit._value == free
+
+    asyncio.run(scenario())
+
+class Chunk:
+    def __init__(self, content):
+        self.choices = [type("Choice", (), {"delta": type("Delta", (), {"content": content})()})()]
+
+class TruncatedCompletions:
+    async def create(self, **kwargs):
+        async def stream():
+            yield Chunk("1. Subtract 3 from both sides: 2x = 4\n")
+            yield Chunk("2. Divide both sides by 2")
+            raise ConnectionError("stream reset")
+        return stream()
+
+def test_truncated_stream_is_not_cached(monkeypatch):
+    import app.agents.math_solver as math_solver_module
+    from app.agents.math_solver import MathSolverAgent
+
+    fake_client = type("Client", (), {"chat": type("Chat", (), {"completions": TruncatedCompletions()})()})()
+    monkeypatch.setattr(math_solver_module, "async_client", fake_client)
+    monkeypatch.setattr(main, "math_solver", MathSolverAgent())
+
+    async def route_and_search(sanitized_query, kb_results=None):
+        return [], {"use_knowledge_base": False}, None, {}
+
+    monkeypatch.setattr(main, "_route_and_search", route_and_search)
+    main.response_cache.clear()
+
+    async def scenario():
+        return [event async for event in main._stream_solution("Solve 2x + 3 = 7", "Solve 2x + 3 = 7")]
+
+    events = asyncio.run(scenario())
+    assert events[-1].startswith("event: final")
+    assert '"source": "web_search"' in events[-1]
+    assert main.response_cache.get("Solve 2x + 3 = 7") is None
+    assert main.response_cache.stats()["size"] == 0
@@ -0,0 +1,128 @@
+import threading
+import pytest
+import requests
+from app.cache.response_cache import ResponseCache
+from app.mcp import web_search
+from app.mcp.local_search_server import create_server
+from app.mcp.web_search import MCPSearch
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+    def json(self):
+        return self.body
+
+def searcher(bodies, **kwargs):
+    search = MCPSearch(api_key="test", base_url="http://search.test", max_retries=0, **kwargs)
+    calls = []
+
+    def post(url, json=None, timeout=None):
+        calls.append(json["query"])
+        return FakeResponse(bodies.pop(0))
+
+    search.session.post = post
+    return search, calls
+
+def test_non_object_body_is_a_failure_not_an_exception():
+    search, _ = searcher([["not", "an", "object"], "text", None])
+    for _ in range(3):
+        result = search.search_math_solution("Solve 2x + 3 = 7")
+        assert result["success"] is False
+        assert "expected an object" in result["error"]
+        search.cache.clear()
+
+def test_malformed_fields_are_ignored():
+    search, _ = searcher([{"answer": 5, "results": [None, "x", {"content": "x = 2 since 2x = 4", "title": None}]}])
+    result = search.search_math_solution("Solve 2x = 4")
+    assert result["success"] and result["has_mathematical_content"]
+    assert result["sources"][0]["title"] == ""
+
+def test_empty_results_use_the_short_negative_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.response_cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(max_size=16, ttl_seconds=3600)
+    search, calls = searcher([{"answer": "", "results": []}, {"answer": "x = 2", "results": []}],
+                             cache=cache, negative_ttl=30)
+    assert not search.search_math_solution("Solve 2x = 4")["success"]
+    assert search.search_math_solution("Solve 2x = 4")["cached"]
+    now[0] += 31
+    assert search.search_math_solution("Solve 2x = 4")["success"]
+    now[0] += 600
+    assert search.search_math_solution("Solve 2x = 4")["cached"]
+    assert len(calls) == 2
+
+def test_failures_are_not_cached():
+    search, calls = searcher([])
+    search.session.post = lambda *args, **kwargs: (_ for _ in ()).throw(requests.ConnectionError("down"))
+    assert not search.search_math_solution("Solve 2x = 4")["success"]
+    assert search.cache.get("Solve 2x = 4") is None
+
+@pytest.fixture
+def stub_server():
+    server = create_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def stub_searcher(server, **kwargs):
+    host, port = server.server_address
+    return MCPSearch(api_key="test", base_url=f"http://{host}:{port}", **kwargs)
+
+def test_stub_server_503s_are_retried_with_jittered_backoff(stub_server, monkeypatch):
+    backoffs = []
+
+    def uniform(low, high):
+        backoffs.append((low, high))
+        # The server recovers once the client has backed off twice
+        stub_server.fail_rate = 0.0 if len(backoffs) == 2 else 1.0
+        return high / 2
+
+    stub_server.fail_rate = 1.0
+    monkeypatch.setattr(web_search.random, "uniform", uniform)
+    search = stub_searcher(stub_server, max_retries=3, backoff_seconds=0.001, deadline=5.0)
+    try:
+        result = search.search_math_solution("Solve 2x + 3 = 7")
+        assert result["success"] and result["has_mathematical_content"]
+        assert backoffs == [(0, 0.002), (0, 0.004)]
+        assert stub_server.requests == 3
+        assert search.stats()["retries"] == 2 and search.stats()["failures"] == 0
+    finally:
+        search.close()
+
+def test_stub_server_outage_exhausts_retries_and_is_not_cached(stub_server):
+    stub_server.fail_rate = 1.0
+    search = stub_searcher(stub_server, max_retries=2, backoff_seconds=0.001, deadline=5.0)
+    try:
+        result = search.search_math_solution("Solve 2x = 4")
+        assert not result["success"] and "503" in result["error"]
+        assert stub_server.requests == 3
+        assert search.cache.get("Solve 2x = 4") is None
+    finally:
+        search.close()
+
+def test_stub_server_empty_results_expire_after_the_negative_ttl(stub_server, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.response_cache.time.monotonic", lambda: now[0])
+    stub_server.empty_rate = 1.0
+    search = stub_searcher(stub_server, max_retries=0, negative_ttl=30,
+                           cache=ResponseCache(max_size=16, ttl_seconds=3600))
+    try:
+        assert not search.search_math_solution("Solve 2x = 4")["success"]
+        assert search.search_math_solution("Solve 2x = 4")["cached"]
+        stub_server.empty_rate = 0.0
+        now[0] += 31
+        result = search.search_math_solution("Solve 2x = 4")
+        assert result["success"] and not result["cached"]
+        now[0] += 600
+        assert search.search_math_solution("Solve 2x = 4")["cached"]
+        assert stub_server.requests == 2
+    finally:
+        search.close()